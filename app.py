@@ -7,13 +7,19 @@ import plotly.graph_objects as go
 import plotly.express as px
 from PIL import Image
 import base64
+import uuid
 from io import BytesIO
 
 # Import custom modules
 from data_processor import DataProcessor
-from crop_recommendation_model import CropRecommendationModel
+from model_registry import load_or_train
 from market_trend_analyzer import MarketTrendAnalyzer
 from explanation_generator import ExplanationGenerator
+from recommendation_engine import HybridRankingEngine
+from crop_index import CropIndex
+from warmup import Warmup
+from session_history import SessionHistory, compact_recommendation, session_memory
+from recommendation_store import RecommendationStore
 
 # Set page configuration
 st.set_page_config(
@@ -30,40 +36,100 @@ if 'recommendations' not in st.session_state:
     st.session_state.recommendations = []
 if 'selected_crop' not in st.session_state:
     st.session_state.selected_crop = None
-if 'history' not in st.session_state:
-    st.session_state.history = []
 if 'show_explanation' not in st.session_state:
     st.session_state.show_explanation = False
 
-# Initialize the components
-@st.cache_resource
+# Initialize the components in the background so the page renders while they load
 def load_data_processor():
-    return DataProcessor()
+    processor = DataProcessor()
+    # Fit market forecasts once so harvest-time prices are available at request time
+    processor.enable_market_forecasts()
+    return processor
 
-@st.cache_resource
 def load_crop_model():
-    model = CropRecommendationModel()
-    # Train the model on first load
-    model.train_model()
-    return model
+    # Serve the registry's active version, training and registering a calibrated model on first run
+    model, version = load_or_train('models')
+    print(f"Serving crop model {version}")
+    return model, version
 
-@st.cache_resource
-def load_market_analyzer():
-    return MarketTrendAnalyzer()
+def prime_caches(ranking_engine, crop_model):
+    # One throwaway request fills the lazily built indexes and the explainer before the first user
+    crop_model, _ = crop_model
+    sample = {'nitrogen': 80, 'phosphorus': 50, 'potassium': 60, 'ph': 6.5,
+              'temperature': 25, 'humidity': 60, 'rainfall': 100, 'month': get_current_month()}
+    recommendations = ranking_engine.rank(sample, sample['month'], limit=10)
+    try:
+        crop_model.get_prediction_attributions(sample, [rec['crop_name'] for rec in recommendations])
+    except ValueError:
+        pass
 
 @st.cache_resource
-def load_explanation_generator():
-    return ExplanationGenerator()
+def load_recommendation_store():
+    # Shared by every session; results computed in one session are reused by the others
+    return RecommendationStore('recommendations.db')
 
-data_processor = load_data_processor()
-crop_model = load_crop_model()
-market_analyzer = load_market_analyzer()
-explanation_generator = load_explanation_generator()
+@st.cache_resource
+def start_warmup():
+    warmup = Warmup()
+    warmup.add('data', load_data_processor)
+    warmup.add('market_analyzer', MarketTrendAnalyzer)
+    warmup.add('explanations', ExplanationGenerator)
+    warmup.add('model', load_crop_model)
+    # Index-assisted ranking (exact mode): soil scores only for crops that can still make the top list
+    warmup.add('engine', lambda processor, model: HybridRankingEngine(processor, model[0], crop_index=CropIndex(processor)),
+               depends_on=('data', 'model'))
+    warmup.add('prime', prime_caches, depends_on=('engine', 'model'))
+    return warmup.start()
 
-# Helper functions
 def get_current_month():
     return datetime.now().month
 
+warmup = start_warmup()
+
+# Data, market trends and explanations load in seconds and every page needs them; the
+# model (which may have to be trained) and the ranking engine are used once ready
+data_processor = warmup.result('data')
+market_analyzer = warmup.result('market_analyzer')
+explanation_generator = warmup.result('explanations')
+recommendation_store = load_recommendation_store()
+
+# Bounded per-session history; older requests go to a local SQLite file instead of memory,
+# which keeps the newest HISTORY_MAX_SPILLED per session for HISTORY_MAX_AGE_DAYS
+HISTORY_CAPACITY = 20
+HISTORY_SPILL_PATH = 'session_history.db'
+HISTORY_MAX_SPILLED = 200
+HISTORY_MAX_AGE_DAYS = 7
+if 'history' not in st.session_state:
+    st.session_state.history = SessionHistory(data_processor.crop_catalog, capacity=HISTORY_CAPACITY,
+                                              spill_path=HISTORY_SPILL_PATH, session_id=uuid.uuid4().hex,
+                                              max_spilled=HISTORY_MAX_SPILLED, max_age_days=HISTORY_MAX_AGE_DAYS)
+
+model_ready = warmup.ready('engine')
+if model_ready:
+    crop_model, model_version = warmup.result('model')
+    ranking_engine = warmup.result('engine')
+
+# Helper functions
+@st.cache_data
+def get_feature_importance_figure(model_version):
+    """Figure spec of the model's global feature importance, cached per model version."""
+    # Importances are computed at training time and stored with the model
+    feature_importance = crop_model.get_feature_importance()
+    
+    # Create a bar chart of feature importance
+    importance_df = pd.DataFrame({
+        'Feature': list(feature_importance.keys()),
+        'Importance': list(feature_importance.values())
+    })
+    importance_df = importance_df.sort_values('Importance', ascending=False)
+    
+    fig = px.bar(importance_df, x='Importance', y='Feature', orientation='h',
+                title="Importance of different factors in crop selection",
+                color='Importance',
+                color_continuous_scale=px.colors.sequential.Viridis)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig.to_dict()
+
 def format_crop_name(name):
     return name.replace('_', ' ').title()
 
@@ -82,6 +148,7 @@ current_month = get_current_month()
 month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 month = st.sidebar.slider("Month", 1, 12, current_month)
 st.sidebar.caption(f"Selected month: {month_names[month-1]}")
+region = st.sidebar.text_input("Region (optional)").strip().lower() or None
 
 # Soil parameters input
 st.sidebar.subheader("Soil Parameters")
@@ -121,69 +188,65 @@ else:
         'month': month
     }
 
+# Warm-up status: refreshes itself until the model is ready, then reruns the page to switch over
+@st.fragment(run_every=2)
+def show_warmup_status():
+    if warmup.ready('engine') or warmup.failed('engine'):
+        st.rerun(scope='app')
+    st.progress(warmup.progress(), text="Loading the ML model...")
+    for name, task in warmup.status().items():
+        seconds = f" ({task['seconds']:.1f}s)" if task['seconds'] is not None else ""
+        st.caption(f"{name}: {task['state']}{seconds}")
+
+with st.sidebar:
+    if warmup.failed('engine'):
+        st.warning("The ML model failed to load; recommendations use soil and market rules only.")
+    elif not model_ready:
+        show_warmup_status()
+
 # Button to get recommendations
 if st.sidebar.button("Get Crop Recommendations"):
     st.session_state.soil_params = soil_params
     
-    # Get recommendations from both methods
-    ml_recommendations = crop_model.predict(soil_params)
-    rule_recommendations = data_processor.get_top_recommendations(soil_params, month)
-    
-    # Combine the recommendations
-    combined_recommendations = []
+    # Results depend on the model and the market data as well as the inputs
+    result_version = f"{model_version if model_ready else 'rules'}:{market_analyzer.market_version}"
+    combined_recommendations = recommendation_store.lookup(soil_params, result_version)
+    reused = combined_recommendations is not None
     
-    # Process ML model recommendations
-    for crop_name, probability in ml_recommendations[:10]:  # Get top 10 from ML
-        # Find if this crop is also in rule-based recommendations
-        rule_rec = next((r for r in rule_recommendations if r['crop_name'] == crop_name), None)
+    if not reused and model_ready:
+        # Score every crop with both methods and fuse the scores
+        combined_recommendations = ranking_engine.rank(soil_params, month, limit=10)
         
-        if rule_rec:
-            # Average the scores if found in both
-            combined_score = (probability + rule_rec['combined_score']) / 2
-            soil_score = rule_rec['soil_score']
-            market_score = rule_rec['market_score']
-        else:
-            # Use ML probability if not found in rule-based
-            combined_score = probability
-            soil_score = 0.5  # Default values
-            market_score = 0.5
-        
-        # Get crop details from data processor
-        crop_details = data_processor.crop_data[data_processor.crop_data['crop_name'] == crop_name]
-        if not crop_details.empty:
-            season = crop_details.iloc[0]['season']
-            growing_days = crop_details.iloc[0]['growing_days']
-        else:
-            season = "unknown"
-            growing_days = 0
-        
-        combined_recommendations.append({
-            'crop_name': crop_name,
-            'combined_score': combined_score,
-            'soil_score': soil_score,
-            'market_score': market_score,
-            'season': season,
-            'growing_days': growing_days
-        })
+        # Explain the forest's (uncalibrated) votes for every recommended crop in one call and keep it with the results
+        try:
+            attributions = crop_model.get_prediction_attributions(
+                soil_params, [rec['crop_name'] for rec in combined_recommendations])
+            for rec in combined_recommendations:
+                rec['attributions'] = attributions[rec['crop_name']]
+        except ValueError as e:
+            print(f"Prediction attributions unavailable: {e}")
+    elif not reused:
+        # Rule-based scores until the ML model has warmed up
+        combined_recommendations = data_processor.get_top_recommendations(soil_params, month, limit=10)
+        for rec in combined_recommendations:
+            rec['rule_based'] = True
     
-    # Add any remaining rule-based recommendations not already included
-    for rule_rec in rule_recommendations:
-        if not any(r['crop_name'] == rule_rec['crop_name'] for r in combined_recommendations):
-            combined_recommendations.append(rule_rec)
+    # Store in session state, as plain Python values rather than NumPy scalars
+    st.session_state.recommendations = [compact_recommendation(rec) for rec in combined_recommendations]  # Top 10 recommendations
     
-    # Sort by combined score
-    combined_recommendations.sort(key=lambda x: x['combined_score'], reverse=True)
+    # Log the query, keeping computed results for reuse by later queries on the same inputs
+    recommendation_store.record(soil_params, st.session_state.recommendations, region, result_version, reused)
     
-    # Store in session state
-    st.session_state.recommendations = combined_recommendations[:10]  # Top 10 recommendations
-    
-    # Add to history with timestamp
-    history_entry = {
-        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M"),
-        'soil_params': soil_params.copy(),
-        'top_recommendations': [rec['crop_name'] for rec in combined_recommendations[:3]]
-    }
-    st.session_state.history.append(history_entry)
+    # Add to history (a fixed-width record with the current time)
+    st.session_state.history.append(soil_params, [rec['crop_name'] for rec in combined_recommendations[:3]])
+
+# Memory held by this session's state
+with st.sidebar.expander("Session memory"):
+    memory = session_memory(st.session_state)
+    st.caption(f"Total: {sum(memory.values()) / 1024:.1f} KB, history: "
+               f"{len(st.session_state.history)}/{HISTORY_CAPACITY} requests in memory")
+    st.dataframe(pd.DataFrame({'Key': list(memory), 'KB': [size / 1024 for size in memory.values()]}),
+                 hide_index=True)
 
 # Main content area
 if st.session_state.soil_params:
@@ -288,6 +351,12 @@ if st.session_state.soil_params:
     # Display recommendations
     if st.session_state.recommendations:
         st.header("Crop Recommendations")
+        # The model can only score or explain results it produced itself, from inputs with every feature
+        ml_results = (model_ready and not st.session_state.recommendations[0].get('rule_based') and
+                      all(feature in st.session_state.soil_params for feature in crop_model.features))
+        if st.session_state.recommendations[0].get('rule_based'):
+            st.info("These recommendations use soil and market rules only; the ML model was still loading. "
+                    "Request them again once it is ready for ML-assisted scores.")
         
         # Create a selection box for the crops
         crop_options = [f"{format_crop_name(rec['crop_name'])} ({rec['combined_score']*100:.1f}%)" 
@@ -350,6 +419,64 @@ if st.session_state.soil_params:
         fig.update_layout(xaxis={'categoryorder':'total descending'})
         st.plotly_chart(fig, use_container_width=True)
         
+        # What-if analysis: score a whole grid of parameter values in one batched call
+        with st.expander("What-if Sensitivity Analysis"):
+            sweep_labels = {
+                'nitrogen': "Nitrogen (N) kg/ha",
+                'phosphorus': "Phosphorus (P) kg/ha",
+                'potassium': "Potassium (K) kg/ha",
+                'ph': "pH Level",
+                'temperature': "Temperature (°C)",
+                'humidity': "Humidity (%)",
+                'rainfall': "Rainfall (mm/month)"
+            }
+            sweep_params = st.multiselect("Parameters to vary (one or two)", list(sweep_labels),
+                                          default=['nitrogen', 'ph'], max_selections=2,
+                                          format_func=lambda param: sweep_labels[param])
+            
+            if sweep_params and not ml_results:
+                st.info("The ML model is not available for these results, so the what-if analysis "
+                        "uses soil and market rules only.")
+            if sweep_params:
+                grid = {}
+                for param in sweep_params:
+                    low, high = data_processor.soil_params_range[param]
+                    selected_range = st.slider(f"{sweep_labels[param]} range", float(low), float(high),
+                                               (float(low), float(high)), key=f"sweep_{param}")
+                    grid[param] = np.round(np.linspace(selected_range[0], selected_range[1], 25), 2)
+                
+                sweep_engine = ranking_engine if model_ready else HybridRankingEngine(data_processor, None)
+                sweep = sweep_engine.sweep(st.session_state.soil_params, st.session_state.soil_params['month'], grid,
+                                           use_ml=ml_results)
+                
+                if len(sweep_params) == 1:
+                    # Score curves of the current top crops
+                    top_names = [rec['crop_name'] for rec in st.session_state.recommendations[:5]]
+                    positions = [data_processor.crop_catalog.index_of(name) for name in top_names]
+                    curve_data = pd.DataFrame(sweep['combined_score'][:, positions] * 100,
+                                              columns=[format_crop_name(name) for name in top_names])
+                    curve_data[sweep_labels[sweep_params[0]]] = grid[sweep_params[0]]
+                    fig = px.line(curve_data, x=sweep_labels[sweep_params[0]], y=curve_data.columns[:-1],
+                                  labels={'value': 'Overall Score (%)', 'variable': 'Crop'},
+                                  title="Overall score of the top crops")
+                else:
+                    # Heatmap of the best achievable score, with the best crop on hover
+                    best_names = np.where(sweep['best_crop'] >= 0,
+                                          sweep_engine.crop_names[sweep['best_crop']], "none")
+                    fig = go.Figure(go.Heatmap(
+                        z=sweep['best_score'] * 100,
+                        x=grid[sweep_params[1]],
+                        y=grid[sweep_params[0]],
+                        text=np.vectorize(format_crop_name)(best_names),
+                        hovertemplate="%{y}, %{x}<br>Best crop: %{text}<br>Score: %{z:.0f}%<extra></extra>",
+                        colorscale='Viridis',
+                        colorbar={'title': 'Best score (%)'}
+                    ))
+                    fig.update_layout(title="Best recommendation across the parameter grid",
+                                      xaxis_title=sweep_labels[sweep_params[1]],
+                                      yaxis_title=sweep_labels[sweep_params[0]])
+                st.plotly_chart(fig, use_container_width=True)
+        
         # If a crop is selected, show detailed analysis
         if st.session_state.selected_crop:
             selected_crop = next((rec for rec in st.session_state.recommendations 
@@ -362,12 +489,10 @@ if st.session_state.soil_params:
                 tab1, tab2, tab3, tab4 = st.tabs(["Recommendation", "Market Analysis", "Growth Requirements", "Explanation"])
                 
                 with tab1:
-                    # Get the crop details from the data
-                    crop_details = data_processor.crop_data[data_processor.crop_data['crop_name'] == selected_crop['crop_name']]
+                    # Get the crop details from the catalog
+                    crop_detail = data_processor.crop_catalog.get(selected_crop['crop_name'])
                     
-                    if not crop_details.empty:
-                        crop_detail = crop_details.iloc[0]
-                        
+                    if crop_detail is not None:
                         # Create two columns for the layout
                         col1, col2 = st.columns([1, 1])
                         
@@ -410,11 +535,12 @@ if st.session_state.soil_params:
                     )
                     
                     # Generate the explanation
-                    explanation = explanation_generator.generate_comprehensive_explanation(
+                    explanation = explanation_generator.generate_cached_comprehensive_explanation(
                         selected_crop,
                         st.session_state.soil_params,
                         market_data,
-                        st.session_state.soil_params['month']
+                        st.session_state.soil_params['month'],
+                        market_version=market_analyzer.market_version
                     )
                     
                     st.markdown(explanation)
@@ -439,6 +565,17 @@ if st.session_state.soil_params:
                     st.subheader("Market Analysis Explanation")
                     st.write(market_explanation)
                     
+                    # Forecast market conditions at harvest time
+                    harvest_forecast = data_processor.market_forecaster.forecast_metrics(
+                        selected_crop['crop_name'],
+                        st.session_state.soil_params['month'],
+                        data_processor.resolve_market_year(st.session_state.soil_params['month']),
+                        selected_crop['growing_days']
+                    )
+                    if harvest_forecast is not None:
+                        st.info(f"Forecast price at harvest (in about {selected_crop['growing_days']} days): "
+                                f"Rs. {harvest_forecast['price_per_kg']:.2f} per kg")
+                    
                     # Compare with other top crops
                     st.subheader("Market Comparison with Other Top Crops")
                     
@@ -460,12 +597,10 @@ if st.session_state.soil_params:
                 with tab3:
                     st.subheader("Optimal Growing Conditions")
                     
-                    # Get the crop details from the data
-                    crop_details = data_processor.crop_data[data_processor.crop_data['crop_name'] == selected_crop['crop_name']]
+                    # Get the crop details from the catalog
+                    crop_detail = data_processor.crop_catalog.get(selected_crop['crop_name'])
                     
-                    if not crop_details.empty:
-                        crop_detail = crop_details.iloc[0]
-                        
+                    if crop_detail is not None:
                         # Display optimal soil parameters
                         st.markdown("### Soil Requirements")
                         
@@ -543,57 +678,65 @@ if st.session_state.soil_params:
                 with tab4:
                     st.subheader("Detailed Explanation")
                     
-                    # Get feature importance from the ML model
-                    feature_importance = crop_model.get_feature_importance()
-                    
-                    # Create a bar chart of feature importance
-                    importance_df = pd.DataFrame({
-                        'Feature': list(feature_importance.keys()),
-                        'Importance': list(feature_importance.values())
-                    })
-                    importance_df = importance_df.sort_values('Importance', ascending=False)
-                    
-                    st.markdown("### Factors that influence crop selection")
-                    
-                    fig = px.bar(importance_df, x='Importance', y='Feature', orientation='h',
-                                title="Importance of different factors in crop selection",
-                                color='Importance',
-                                color_continuous_scale=px.colors.sequential.Viridis)
-                    fig.update_layout(yaxis={'categoryorder':'total ascending'})
-                    st.plotly_chart(fig)
+                    if model_ready:
+                        st.markdown("### Factors that influence crop selection")
+                        
+                        # Built once per model version
+                        st.plotly_chart(get_feature_importance_figure(model_version))
                     
-                    # Generate model explanation for this prediction
-                    model_explanation = crop_model.explain_prediction(
-                        st.session_state.soil_params, 
-                        selected_crop['crop_name']
-                    )
+                    if 'attributions' in selected_crop:
+                        st.markdown("### What drove this prediction")
+                        st.caption("Contributions explain the random forest's raw vote share for this crop, before "
+                                   "the calibration used in the recommendation scores; they add up to the vote "
+                                   "share minus the forest's average vote.")
+                        attribution_df = pd.DataFrame({
+                            'Feature': list(selected_crop['attributions'].keys()),
+                            'Contribution': list(selected_crop['attributions'].values())
+                        })
+                        attribution_df['Effect'] = np.where(attribution_df['Contribution'] >= 0, 'Raises', 'Lowers')
+                        
+                        fig = px.bar(attribution_df, x='Contribution', y='Feature', orientation='h',
+                                    title=f"How your inputs moved the forest's vote share (uncalibrated) for {format_crop_name(selected_crop['crop_name'])}",
+                                    color='Effect',
+                                    color_discrete_map={'Raises': '#2e7d32', 'Lowers': '#c62828'})
+                        fig.update_layout(yaxis={'categoryorder':'total ascending'})
+                        st.plotly_chart(fig)
                     
-                    st.markdown("### Why this crop is recommended")
-                    st.write(model_explanation)
+                    if ml_results:
+                        # Generate model explanation for this prediction
+                        model_explanation = crop_model.explain_prediction(
+                            st.session_state.soil_params, 
+                            selected_crop['crop_name']
+                        )
+                        
+                        st.markdown("### Why this crop is recommended")
+                        st.write(model_explanation)
                     
                     # Get explanation from the explanation generator
-                    explanation = explanation_generator.generate_comprehensive_explanation(
+                    explanation = explanation_generator.generate_cached_comprehensive_explanation(
                         selected_crop,
                         st.session_state.soil_params,
                         market_analyzer.get_market_metrics(
                             selected_crop['crop_name'], 
                             st.session_state.soil_params['month']
                         ),
-                        st.session_state.soil_params['month']
+                        st.session_state.soil_params['month'],
+                        market_version=market_analyzer.market_version
                     )
                     
                     st.markdown("### Comprehensive Analysis")
                     st.markdown(explanation)
         
-        # Display history of recommendations
-        if st.session_state.history:
+        # Display history of recommendations: the in-memory records, then older spilled ones
+        if len(st.session_state.history):
             with st.expander("View Recommendation History"):
                 st.subheader("Previous Recommendations")
                 
-                for i, entry in enumerate(reversed(st.session_state.history), 1):
+                history_entries = st.session_state.history.entries() + st.session_state.history.spilled(limit=HISTORY_CAPACITY)
+                for i, entry in enumerate(history_entries, 1):
                     st.markdown(f"""
-                    **{entry['timestamp']}**  
-                    Soil: N={entry['soil_params']['nitrogen']}, P={entry['soil_params']['phosphorus']}, K={entry['soil_params']['potassium']}, pH={entry['soil_params']['ph']}  
+                    **{datetime.fromtimestamp(entry['timestamp']).strftime("%Y-%m-%d %H:%M")}**  
+                    Soil: N={entry['soil_params']['nitrogen']:g}, P={entry['soil_params']['phosphorus']:g}, K={entry['soil_params']['potassium']:g}, pH={entry['soil_params']['ph']:.1f}  
                     Top crops: {', '.join([format_crop_name(crop) for crop in entry['top_recommendations']])}
                     """)
                     st.markdown("---")
@@ -0,0 +1,116 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from crop_recommendation_model import CropRecommendationModel
+from model_backends import BACKENDS
+
+
+def evaluate_backends(backends=None, data=None, calibrate=True, n_requests=200, batch_size=1000, crop_catalog=None):
+    """
+    Train every backend on the same data and measure accuracy, latency and size.
+
+    Latency is measured on the serving path (predict_probabilities with one soil profile,
+    as the app calls it), one request at a time over the test profiles.
+
+    Args:
+        backends: Backend names to evaluate, defaults to every key of BACKENDS
+        data: Optional (X, y) training data shared by all backends, defaults to one
+              synthetic dataset
+        calibrate: Calibrate every backend's probabilities
+        n_requests: Single-profile requests timed per backend
+        batch_size: Profiles per call for the batch throughput measurement
+        crop_catalog: Optional CropCatalog for the models
+
+    Returns:
+        DataFrame with one row per backend: accuracy, log_loss, p50_ms and p99_ms
+        (single-request latency), batch_ms (per batch_size profiles), model_kb and
+        training_seconds
+    """
+    backends = list(backends or BACKENDS)
+    if data is None:
+        data = CropRecommendationModel(crop_catalog=crop_catalog).prepare_training_data()
+
+    rows = []
+    for backend in backends:
+        model = CropRecommendationModel(crop_catalog=crop_catalog, backend=backend)
+        model.train_model(calibrate=calibrate, data=data)
+        crop_names = model.crop_catalog.names
+
+        test_profiles = model.training_data['X_test']
+        requests = [test_profiles.iloc[i % len(test_profiles)].to_dict() for i in range(n_requests)]
+        model.predict_probabilities(requests[0], crop_names)  # warm-up
+        latencies = np.empty(n_requests)
+        for i, profile in enumerate(requests):
+            start = time.perf_counter()
+            model.predict_probabilities(profile, crop_names)
+            latencies[i] = time.perf_counter() - start
+
+        batch = test_profiles.sample(batch_size, replace=True, random_state=42)
+        start = time.perf_counter()
+        model.predict_probabilities_batch(batch, crop_names)
+        batch_seconds = time.perf_counter() - start
+
+        rows.append({
+            'backend': backend,
+            'accuracy': model.metadata['accuracy'],
+            'log_loss': model.metadata['log_loss'],
+            'p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'p99_ms': float(np.percentile(latencies, 99) * 1000),
+            'batch_ms': batch_seconds * 1000,
+            'model_kb': model.metadata['model_bytes'] / 1024,
+            'training_seconds': model.metadata['training_seconds']
+        })
+    return pd.DataFrame(rows)
+
+
+def select_backend(results, latency_budget_ms, latency='p99_ms'):
+    """
+    Pick the most accurate backend whose latency fits a budget.
+
+    Args:
+        results: DataFrame returned by evaluate_backends
+        latency_budget_ms: Maximum latency in milliseconds
+        latency: Latency column to compare with the budget ('p50_ms' or 'p99_ms')
+
+    Returns:
+        Backend name; the fastest backend if none fits the budget
+    """
+    within_budget = results[results[latency] <= latency_budget_ms]
+    if within_budget.empty:
+        fastest = results.loc[results[latency].idxmin()]
+        print(f"No backend meets the {latency_budget_ms} ms budget, using the fastest: {fastest['backend']}")
+        return fastest['backend']
+    # Most accurate first, then the faster one on ties
+    best = within_budget.sort_values(['accuracy', latency], ascending=[False, True]).iloc[0]
+    return best['backend']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare model backends on accuracy, latency and size, and optionally pick one by latency budget.")
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), help="Backends to compare (default: all)")
+    parser.add_argument('--requests', type=int, default=200, help="Single-profile requests timed per backend (default: 200)")
+    parser.add_argument('--budget-ms', type=float, help="Select the most accurate backend within this p99 latency")
+    parser.add_argument('--register', metavar='DIRECTORY',
+                        help="Train the selected backend and register it in this model registry")
+    parser.add_argument('--no-calibration', action='store_true', help="Evaluate uncalibrated probabilities")
+    args = parser.parse_args(argv)
+
+    results = evaluate_backends(args.backends, calibrate=not args.no_calibration, n_requests=args.requests)
+    print(results.to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+
+    if args.budget_ms is not None:
+        backend = select_backend(results, args.budget_ms)
+        print(f"Selected backend for a {args.budget_ms} ms p99 budget: {backend}")
+        if args.register:
+            from model_registry import ModelRegistry
+            model = CropRecommendationModel(backend=backend)
+            model.train_model(calibrate=not args.no_calibration)
+            version = ModelRegistry(args.register).register(model, note=f'selected for {args.budget_ms} ms p99 budget')
+            print(f"Registered {version}")
+
+
+if __name__ == '__main__':
+    main()
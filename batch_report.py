@@ -0,0 +1,380 @@
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from data_processor import DataProcessor
+from crop_recommendation_model import CropRecommendationModel
+from model_registry import load_or_train
+from explanation_generator import ExplanationGenerator
+from recommendation_engine import HybridRankingEngine
+from parallel_scoring import SharedScoringState, OrderedProcessPool, shared_state_directory
+
+OUTPUT_FORMATS = ('csv', 'jsonl', 'parquet')
+# Soil values every row needs to be scored
+REQUIRED_PARAMS = ('nitrogen', 'phosphorus', 'potassium', 'ph')
+
+
+class CsvReportWriter:
+    def __init__(self, path):
+        """Append report rows to a CSV file."""
+        self.path = path
+
+    def position(self):
+        """Current size of the output in bytes (0 if it does not exist yet)."""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def truncate(self, position):
+        """Drop anything written after position, e.g. a chunk interrupted by a crash."""
+        if os.path.exists(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(position)
+
+    def write(self, frame):
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            frame.to_csv(f, header=(f.tell() == 0), index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        pass
+
+
+class JsonlReportWriter(CsvReportWriter):
+    """Append report rows to a JSON Lines file."""
+
+    def write(self, frame):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            frame.to_json(f, orient='records', lines=True)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetReportWriter:
+    def __init__(self, path):
+        """Write report rows as a directory of Parquet part files, one per chunk."""
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith('part-'))
+
+    def position(self):
+        """Number of part files written so far."""
+        return len(self._parts())
+
+    def truncate(self, position):
+        """Remove part files written after position."""
+        for name in self._parts()[position:]:
+            os.remove(os.path.join(self.path, name))
+
+    def write(self, frame):
+        # Requires pyarrow or fastparquet
+        frame.to_parquet(os.path.join(self.path, f'part-{self.position():05d}.parquet'), index=False)
+
+    def close(self):
+        pass
+
+
+REPORT_WRITERS = {
+    'csv': CsvReportWriter,
+    'jsonl': JsonlReportWriter,
+    'parquet': ParquetReportWriter
+}
+
+
+class BatchReportGenerator:
+    def __init__(self, engine, explanation_generator=None, top_k=3, year=None,
+                 season_only=True, use_ml=True):
+        """
+        Initialize the bulk report generator.
+
+        Args:
+            engine: HybridRankingEngine used to score each chunk
+            explanation_generator: Optional ExplanationGenerator; no explanations if None
+            top_k: Number of crops reported per soil test, defaults to 3
+            year: Market year for rows without a 'year' column, defaults to the latest
+                  year with market data for each row's month
+            season_only: Only recommend crops that can be planted in the row's month
+            use_ml: Include ML probabilities when the input has every model feature
+        """
+        self.engine = engine
+        self.explanation_generator = explanation_generator
+        self.top_k = top_k
+        self.year = year
+        self.season_only = season_only
+        self.use_ml = use_ml
+
+    def process_chunk(self, chunk, first_row=0, id_column=None, month=None):
+        """
+        Score one chunk of soil-test rows.
+
+        Args:
+            chunk: DataFrame of soil tests (soil_params keys as columns)
+            first_row: Input row number of the first row in the chunk
+            id_column: Optional input column copied to the output to identify rows
+            month: Planting month for rows without a 'month' column
+
+        Returns:
+            DataFrame with one report row per soil test. Rows missing a required soil value
+            (or a model feature when ML is used) get no crops and list the missing
+            parameters in missing_values.
+        """
+        profiles = chunk
+        if 'month' not in profiles:
+            profiles = profiles.assign(month=month or datetime.now().month)
+
+        use_ml = self.use_ml and all(f in profiles for f in self.engine.crop_model.features)
+        crop_indices, scores = self.engine.rank_batch(
+            profiles, limit=self.top_k, year=self.year,
+            season_only=self.season_only, use_ml=use_ml)
+
+        # Rows that cannot be scored, as field rasters treat nodata cells
+        required = REQUIRED_PARAMS + tuple(f for f in self.engine.crop_model.features
+                                           if use_ml and f not in REQUIRED_PARAMS)
+        missing_values = np.full(len(chunk), '', dtype=object)
+        for param in required:
+            missing = profiles[param].isna().to_numpy() if param in profiles else np.ones(len(chunk), dtype=bool)
+            missing_values[missing] = [f'{names},{param}' if names else param for names in missing_values[missing]]
+        invalid = missing_values != ''
+        if invalid.any():
+            crop_indices[invalid] = -1
+            scores = {name: np.where(invalid[:, None], np.nan, values) for name, values in scores.items()}
+
+        report = pd.DataFrame({'row_id': np.arange(first_row, first_row + len(chunk))})
+        if id_column:
+            report[id_column] = chunk[id_column].to_numpy()
+        report['month'] = np.asarray(profiles['month'])
+        report['missing_values'] = missing_values
+
+        # Trailing empty name so that index -1 (no candidate) maps to ''
+        crop_names = np.append(self.engine.crop_names, '').astype(object)
+        for rank in range(crop_indices.shape[1]):
+            report[f'crop_{rank + 1}'] = crop_names[crop_indices[:, rank]]
+            report[f'score_{rank + 1}'] = scores['combined_score'][:, rank]
+            report[f'soil_score_{rank + 1}'] = scores['soil_score'][:, rank]
+            report[f'market_score_{rank + 1}'] = scores['market_score'][:, rank]
+
+        if self.explanation_generator is not None:
+            report['explanation'] = np.where(invalid, '', self._explain(crop_indices, scores))
+
+        return report
+
+    def _explain(self, crop_indices, scores):
+        """Generate a comparison explanation per row, reusing it for rows with identical results."""
+        explanations = []
+        cache = {}
+        for i in range(len(crop_indices)):
+            key = tuple(
+                (int(crop_indices[i, rank]), scores['combined_score'][i, rank],
+                 scores['soil_score'][i, rank], scores['market_score'][i, rank])
+                for rank in range(crop_indices.shape[1]) if crop_indices[i, rank] >= 0
+            )
+            if key not in cache:
+                recommendations = [{
+                    'crop_name': self.engine.crop_names[crop_index],
+                    'combined_score': combined_score,
+                    'soil_score': soil_score,
+                    'market_score': market_score
+                } for crop_index, combined_score, soil_score, market_score in key]
+                cache[key] = self.explanation_generator.generate_comparison_explanation(
+                    recommendations, None, None)
+            explanations.append(cache[key])
+        return explanations
+
+    def options(self):
+        """Settings needed to recreate this generator in a worker process."""
+        return {
+            'top_k': self.top_k,
+            'year': self.year,
+            'season_only': self.season_only,
+            'use_ml': self.use_ml,
+            'explain': self.explanation_generator is not None,
+            'selection': getattr(self.explanation_generator, 'selection', 'relevance'),
+            'fusion_strategy': self.engine.fusion_strategy
+        }
+
+    def run(self, input_path, output_path, output_format='csv', chunk_size=10000,
+            checkpoint_path=None, id_column=None, month=None, workers=1):
+        """
+        Stream a soil-test CSV through the engine and write the report incrementally.
+
+        Args:
+            input_path: CSV file with one soil test per row
+            output_path: Output file (csv/jsonl) or directory (parquet)
+            output_format: One of OUTPUT_FORMATS, defaults to 'csv'
+            chunk_size: Rows scored per chunk, which bounds memory use
+            checkpoint_path: Optional JSON file recording progress; an interrupted run
+                             with the same checkpoint resumes after the last complete chunk
+            id_column: Optional input column copied to the output to identify rows
+            month: Planting month for inputs without a 'month' column
+            workers: Number of worker processes; with more than 1, chunks are scored in a
+                     process pool that memory-maps the shared catalog, market index and model
+
+        Returns:
+            Total number of rows processed
+        """
+        writer = REPORT_WRITERS[output_format](output_path)
+
+        rows_done = 0
+        checkpoint = self._load_checkpoint(checkpoint_path, input_path, output_path, output_format)
+        if checkpoint:
+            rows_done = checkpoint['rows_done']
+            writer.truncate(checkpoint['output_position'])
+            print(f"Resuming from checkpoint: {rows_done} rows already processed")
+        else:
+            writer.truncate(0)
+
+        # Rows without crops because of missing values, in this run
+        rows_missing = 0
+        reader = pd.read_csv(input_path, chunksize=chunk_size,
+                             skiprows=range(1, rows_done + 1) if rows_done else None)
+        tasks = self._chunk_tasks(reader, rows_done, id_column, month)
+
+        if workers > 1:
+            state_dir = SharedScoringState.export(self.engine, shared_state_directory())
+            pool = OrderedProcessPool(workers, initializer=_init_report_worker,
+                                      initargs=(state_dir, self.options()))
+            reports = pool.imap(_process_report_chunk, tasks)
+        else:
+            state_dir = pool = None
+            reports = (self.process_chunk(*task) for task in tasks)
+
+        try:
+            for report in reports:
+                self._write_report(report, writer, checkpoint_path, input_path, output_path,
+                                   output_format, rows_done)
+                rows_done += len(report)
+                rows_missing += int((report['missing_values'] != '').sum())
+                print(f"Processed {rows_done} rows" + (f", {rows_missing} with missing values" if rows_missing else ""))
+        finally:
+            if pool is not None:
+                # Nothing is pending after a complete run; after an error, drop queued chunks
+                pool.close(cancel=True)
+                shutil.rmtree(state_dir, ignore_errors=True)
+
+        writer.close()
+        return rows_done
+
+    def _chunk_tasks(self, reader, first_row, id_column, month):
+        """Yield process_chunk arguments for each input chunk."""
+        for chunk in reader:
+            yield (chunk, first_row, id_column, month)
+            first_row += len(chunk)
+
+    def _write_report(self, report, writer, checkpoint_path, input_path, output_path,
+                      output_format, rows_done):
+        """Append a chunk report to the output, then record it in the checkpoint."""
+        writer.write(report)
+        rows_done += len(report)
+
+        if checkpoint_path:
+            self._save_checkpoint(checkpoint_path, {
+                'input_path': os.path.abspath(input_path),
+                'output_path': os.path.abspath(output_path),
+                'output_format': output_format,
+                'rows_done': rows_done,
+                'output_position': writer.position()
+            })
+
+    def _load_checkpoint(self, checkpoint_path, input_path, output_path, output_format):
+        """Load a checkpoint if it exists and belongs to the same job."""
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get('input_path') != os.path.abspath(input_path) or
+                checkpoint.get('output_path') != os.path.abspath(output_path) or
+                checkpoint.get('output_format') != output_format):
+            raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different job")
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint_path, checkpoint):
+        """Write the checkpoint atomically so a crash never leaves a partial file."""
+        tmp_path = checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, checkpoint_path)
+
+
+# Generator of the current worker process, created by _init_report_worker
+_worker_generator = None
+
+def _init_report_worker(state_dir, options):
+    """Load the shared scoring state once per worker process."""
+    global _worker_generator
+    options = dict(options)
+    explain = options.pop('explain')
+    selection = options.pop('selection')
+    engine = SharedScoringState.load(state_dir, fusion_strategy=options.pop('fusion_strategy'))
+    _worker_generator = BatchReportGenerator(
+        engine,
+        explanation_generator=ExplanationGenerator(selection=selection) if explain else None,
+        **options
+    )
+
+def _process_report_chunk(task):
+    """Score one chunk in a worker process; task holds the process_chunk arguments."""
+    return _worker_generator.process_chunk(*task)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate crop recommendations and explanations for a file of soil tests.")
+    parser.add_argument('input', help="CSV file with one soil test per row "
+                                      "(nitrogen, phosphorus, potassium, ph, optional temperature, "
+                                      "humidity, rainfall, month, year)")
+    parser.add_argument('output', help="Output file, or directory for parquet")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help="Output format (default: from the output extension, else csv)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk (default: 10000)")
+    parser.add_argument('--top-k', type=int, default=3, help="Crops per soil test (default: 3)")
+    parser.add_argument('--month', type=int, help="Planting month if the input has no month column")
+    parser.add_argument('--year', type=int, default=None,
+                        help="Market year for rows without a year column (default: latest year with data)")
+    parser.add_argument('--id-column', help="Input column to copy to the output")
+    parser.add_argument('--checkpoint', help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes to score chunks in parallel (default: 1)")
+    parser.add_argument('--models', default='models',
+                        help="Model registry directory; its active model is used, or one is trained "
+                             "and registered if it is empty (default: models)")
+    parser.add_argument('--no-ml', action='store_true', help="Use rule-based scores only")
+    parser.add_argument('--no-explanations', action='store_true', help="Skip explanation text")
+    parser.add_argument('--all-seasons', action='store_true', help="Also recommend out-of-season crops")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        extension = os.path.splitext(args.output)[1].lstrip('.').lower()
+        output_format = extension if extension in OUTPUT_FORMATS else 'csv'
+
+    data_processor = DataProcessor()
+    # Rule-based runs never call the model, so they skip loading it
+    crop_model = CropRecommendationModel() if args.no_ml else load_or_train(args.models)[0]
+
+    generator = BatchReportGenerator(
+        HybridRankingEngine(data_processor, crop_model),
+        explanation_generator=None if args.no_explanations else ExplanationGenerator(),
+        top_k=args.top_k,
+        year=args.year,
+        season_only=not args.all_seasons,
+        use_ml=not args.no_ml
+    )
+    rows = generator.run(args.input, args.output, output_format=output_format,
+                         chunk_size=args.chunk_size, checkpoint_path=args.checkpoint,
+                         id_column=args.id_column, month=args.month, workers=args.workers)
+    print(f"Report complete: {rows} rows written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+window.CROP_BUNDLE = "H4sIAAAAAAACA+1d63PiRhL/V1Tki7dKJugN+213r+5yubic2t0vV7uulAABCkIiethxcvnfr7tHI4Sz2GBsjUBdtYnRwHRPP349o57Xn715EAepnwfTX/y897ZnDkz30hhcGqOe3lv56TLIf7kN0ixMYvzWdT3Hmpmz6WgG32dJGP2S36+DrPf2z54fRcVt6Efwu3fyo94bR/5kCUXv8a92kQbzIn0D5WkwhdKP8H+9FwH/NMwDKPhJfoTSxF/dYxH9BW5+PMXnT/hX+16bBlmQ5r2/4JvAz5KYGrFc+Gk4g1/9hz5oFz8W8eWnYE0s/XGIPOGPdnE9yS//GYyxPCtWqyBFyvQBSP/hh1Pt4spPL6/8+zfIYpIma2DwpZcsU59UE88TqhvPouQOqmNZ+Ac2fJLkOagLCoos99MpFc1mAX63hqbCnyQO5S+WqyCiz+M0jH8lnU2KSbEaE81fC9JFXqTQsnCCXy7CyRLIIPO7AMyzTnI/x7as/bV/j+X+eh1hrXkYz4nKOlkF89SP/Vy0b5LERY4aCSf0Oz+NiHYUxHkY9W70XvD7OsLfh6TXL73vvtM+BpME9BNPqfStdg2a0MJM87V5kky1ySIBatosSbX7pEi1SZGmQE4DXtOQ6PS/xl/j74DSJ/Ab7UOyWgOlcRiF+f3X+L9YBx1KW/iZFvw+CaJIVK/9TLsL8wUx7mubCtAGcFH4EqpcZgV4z5SakS/gGzRcX/u8CLQ4zNME3F2Lgtsg0i5GgzfU/GnwWwGKoSpg1nuqkmlhPImKKWiw5Ick1oskg//SIpNEbIeIZMVsFk5CbDCRSbL8ETLU6vUP2oXXF23IonC+yKN7zY+WfhTGQV+72rRk4sdaBnaJtHma3JGYujYucmADMgE7ZAkGTYm/f+uHkS/0VWn8ipCsXRd5lCTLrzHZDhW9SqYEf01gXVunIGEwybO+rLOxH3wJkEMW2tgH75iAnpP1OknzIq6Mk4GraWmYLWvmJnj6kfY5XIEivsaf0TCo+rhm6DyEinmiod/lpbL+nQsHE6gmdWgQb8IJxJp70kYMCtYA41QVcJ4HCBztAlSTJQnojXi/0bU7gM0C9BvOUZAgnYGQUdnmHGwi3VUEg7JeJcI1OBjw1N5lWZBlAIL8a/zez1ABMbroGGw2JbvqpSZ1kG5akgHRZ/4ELJXpG6ck9fsP/DubJGmgJTNt0B8OtARsDJ+N/qAP4PwGBK8wCinBIHFuEoQlw6NRWKOjHobCfspwWHOf+wA6uzQpwGcFyhZ+ThKPgw3OUBfCowUPaCQgCX4GPoveDobz5wGig6DrT/11npGiEJ3TEPpAckckiLaoiZQvgPl8gR6PaMTmqASfN3oafJ9k168EgBX3JkFYY3o0EB/QUg/GjT3b3DHW1Nbl3nEfgF7heFxR7wicm+0dieEL9I4VnTb0jmi/NoOxVFengTh8Gogf6IVYCRIF6yahKDkejcU6IfVgLG3YZjRKhXUajt4e/aJIS6npGQXvRvtGyfL43rFOqQX9Y2nHVveQUmUSlJiE3QnJa3B3BCJUh1YD8i7gPTGvgHUAIGeIu9NI4nyg3LCi3hFZN9s7Co4v0DtuCLWhdyQbosJn/m0CTh7tB0VMnYgpGAICmn9b3TvBV3cbzt4c/HL4M5BXgjlk3CTiBL+j8bYhox5tZLs293pCWd3s8vYagfK8Bc9b8LyFGvBd49oDNRP3yLnRmXvB8Pip+w2dFszdk/1aPXkv1MX93yMZGLHsR1UORnBvOAsjmb5EHqZOqxWZmNKerw1LEli6RkUfHQetsAZWv4cr4A3Cf4Rf2w6mILCzW8772j+CFTo3/JI87oK89q3mfm8M3vS1T8V6DdXg2wigjvaXP7DxBxKIKx/cvaAmagvQM9CmBsiXjDSZhdCmJMe1ZH60g9uROSVpfhliyvzrriAjIgsQoJzvxVa29pAsLwgK7ncqs588xuYx9gvHE8MY9J3jA4rVYEDhl4Vjoggnp88qOd2qocmw7z0ZSrzXHptsXFBSHD4eTzjvflRAeS92OSiJKCXvJkNKxfLomLJFSX1QkXZsWVSxdgQVMjKGhAcwr0WWSoqtgYUOKgzAj8ACVXtXD4Xac6TiPR5ZtqDBoWU7tLh7jFXKbVNqRisl80bHKxXP40csW6RaMGaRtmxbfDH3SKh4T4YW56VDy/FZlY0HdDWp4nYhqeI+J6mS5H6WhcVKEjEGggp2qNLSiyCC+tTWO9zEq+FW34j0RpZJSouSKYA3wf9htBnyfCZ3+wdi8sciV5OgQMZNIlLw6wQgyaZtnuIUtuj0SnO3Gxs/3Gdt/Dh3gPJ2kNMAqfM0SD+XZ4sogalk3iRQNzw7AdXKvurAuuVhPMQ9GKKnftSO+4yjds4dlnwET/t7T6srmynd522mPPu8EO+wbP1y231eQ8sj89S8iJbMG30VrXh242VU2rfVr6OVTToKVOf8N2W6z9iUee7g5M2aJw5KnvPkOU+e82wQkzZjkjHJez54z4ei3ak8IcQTQioCzdDcI84oWFv5xLJtnt069gXjbHbDu8/dDd+BRDpvkOcN8q2aufuEt+do4vYcNUf41xrQZPDZ5tuJ+LNl67aFIPM5r1evv1vtiTj0d/jw0Gc7Bhl7THjQlV1qpjyIdaOTHiXHbkx7CMu2LNY4Zt891e2xdaxwqOlkqHGeFWr+ti/WGux/7O1jMetbzcmgxVBPDMSn+LtkvSJAg4mnIRoZsBtkYZYjWlTHD0bbax3qfvo7X5yXufLkALQ9uoXmNdHG21nO5k7MU98O6jxjO+gxmHtkV+lrIo53eJ4F2t7hVdNK4Eacm8RbyfBowNXpNIk4YSplkKt5Co8nO3hjgvMip7kegLPHFg69Js54Yd0JHybCWRLOknCWpKnDQHn0yKNHHj3yKd4vnI187BTvg7KRNULNZiP5NsnTAti/QARFB88K1k0CTHI8GmBbhJoEWGkuZb1Z3V0YbZ3dz+88cz//UZ3a40cDvGq3xtv0z+M8DU6ScJKEl6Jx2ocnDTnto2RH8hGxQ/n9UZzJ4kxWFzNZfPUcXz33irFjyGsoeA0FH4TCi0FecNEVZ/U5q3981BjsuDLuFF5WeKLiqETp6Sc6bIFX0CLqPEruMLUdToH0B2gtfEjBhgR7WfMyRecEM+bQnD+CFL14GWhFGvga8MO2QtSg3FwMhbsCjinurkwD3O97i2AC5n/nOk5iAHkAFgTaaTJZlqQQ++BQQbxAQGszajlWQKunSbIVaHbEKpuX03D+8lw39zGweSch7216fJoT1D1PIbIp2lBY48+Aby3g616ibh36Q1flXv3g9OCHBNpf5Iq6deLNMG9xvy68QxnEt9yT4X0wvM9h0RKDm7eRcZ5+d5oN06Dgm6n8vkQV59o418a5thbm2kx+CWeI80s4r+87qyl3Bjnv2uMX8LNcusvQ5h3v/M7N2XLGM2fLOaXGKTVOqfG2QN4WyFlCzhJylvC42GU6z94l8Co3oB4cwDj7ydlPDl68u4l3N/GCSU4BcbxqKgV0YMCydty2+pxxltfwlauc1DouqcVLQDlc8SF5fEjeSQSrj9Ipmg5VyPgFApW80Pk3rLF1rTMUjoM4wIMkUHtAKgr8mTyRgq5dhsH/xC8AudhSiAG3AbRhHuQUesjA0FBwGUIWYT/bFbccZ++TK4Tk3ww93iuGHrJ0mzeMCr3wdtFzP17qBCH72AFVHl/yxec3fAup18tUzVsAMu4mToXkjcOULN3mrlXohbvWp7pWeHFV1LUC5652rSS6gq4Vjd1m0Jaa6TJq95nNfJ+G8a8ib9A4bkve3URuJXzj2JUmV4beLZ/jofHBmL0qwMLpVE1fK3h3tLeVwjff35Ymb3WPK7XTzUuZ9juU8PS3V50gbh+9WsHjLVOcdtqkneJQ0amhxLmjiSchevOZJzJ2q1NPQjMdveZwj7Hwz0BezWIRYNxNtArJGwcrWbrNWBV6YajuXDjvp1E4UbNwnlh3E65S9sYBW9q7zZCVumHQPrlgQs0eY141caarJvhaL34P53kpnpdSMC916GaUHfeQnsLybp5p45uMOV/PVyHzVcinGHyKSUFLkZSEn5J5RwNQJX3zIUhavX17coeHx6BXOfbkkLewfa5aq4wt00DlCr5diSCR/YH6tGrwYmu93yHrBNe0t7IFeaDhXmuOlivw6VjVqiPBvbPrjqT4KlYelYZv3ahoj4Dkvvag6IVjUc3SHIzO+m5XS9kZAYOmzwggNa1/0C6G/TJQRUvwyPgbsmZFNAPFJvhv7sfhBITJczHpInSE2gJaqOFxQF/FRZ5S/PTHWZKu0dx88+uJ71zwunacJIcDFeGAr6Q5hVyJ241TgzgEKAkBfK1ka4Fvd+V8Q4a+mpcBvgDjpMH/Y6Fo7I+MGfYnCnvymjZnAIR3dfr93+L3fw4F/P7PI4F9b7qDCLdcB2oyAJI5h4FTfRGQ3tPqeYHKyzq6W8XiNCCHAE4Ddq//tzgNyNDnNCCDfwf4f8LlWGq2ignWDP0ThX7pOW0e9ksP40E/JwI5EJxDIpBvneUxTievRePQdsaZDb40jUMZL9niYHYeuRq+sJbD2Z6vn+/AkmpePIkzh7ITDWXCb9r2snnEuEz5eSM1JHIc245jxh7Hs4IIig4bEaw5kp1oJCs9p22hbGA+O2+mPJTVwcix7LFYdqP30q1IlvXe/tmDNhW3oPz/idXTvbdfvgz04UA3BgPdGeiDG/2LoXsjfTTERwMezc2jCY+W7g31kYuPFjzauueVj/YNsKzo43QMUndq1B2o4BI5Q3fhHzx6ZX17pHuCNzyOdBuqweOQHh2sO9qiLhZkI/0R0kP69hD+PGi+UWcIzyiAMdA9Vx/ZyNJAEQxDFgAFEmIc+ZNlTUPyB0gSZTBMKrCowBVacPSRSc8khkUFBhWgIMDT0oeiUaMNi42SKnomyWDL+oZuGkJNxADabJobBmbFAJpokwyOblobBhs9Cc2SDKb9gIKJQo2oiSPUgokyGdAoQx96uu3pJgnlUoEgMbwh/5rWteTWTG2OSC2bAmsgFFcrQcEMb2NiyxSCSF1blmQi9WS4NWtbdll/RPUd3dr41wD9yyIxhkQQVGnpllfq1iXB4ReVGDVF1cWwRls8QL8DwWNIPKAdRuW11GbbfMDTJiGg94N+Kw/q6vJqfGz7gbps8rPRBmw2CmMOagXSJlJ99nCLU6Uz4GMKsg74T0l2RFTQ48r2DkkAKCgx46G7ghIds+QrYOrBb7bY1BS3YQSU7IeMnIeM3C3CgI2HAjlCoMRf3df0Zhr1iELy1ArcAaGtVmCIoDXCsILPMgZUBdaGy7eClmuTQqAAfAajliMCkwwybhnGiB7g00UxTBE1PXQytyZGHY81FqN6mzAUDipPNtHLPKOMU0NkCrryTIHY6pmEyKAHqavK3ujSk/aQccZzSm3b6MlYIO1RFXhlqJORyxtumFTeNSIeFlrUG5XwEhVQwpKHhSShmUOj5CEK0GGwwKpVqQlSU1aNy9B+0PChs0UUuLglaA10SHDGoVf6nihAXjc3f/31fx7N619AagEA";
@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+
+CROP_FIELDS = [
+    'crop_name', 'nitrogen_requirement', 'phosphorus_requirement',
+    'potassium_requirement', 'temperature_min', 'temperature_max',
+    'rainfall_min', 'rainfall_max', 'humidity_min', 'humidity_max',
+    'ph_min', 'ph_max', 'season', 'growing_days'
+]
+# Average days per month, used to convert growing_days to months on the field
+DAYS_PER_MONTH = 30.4
+
+
+class CropRecord:
+    """Immutable record with the growing requirements of a single crop."""
+    __slots__ = tuple(CROP_FIELDS)
+
+    def __init__(self, values):
+        """
+        Args:
+            values: Dict or Series with a value for every field in CROP_FIELDS
+        """
+        for field in CROP_FIELDS:
+            object.__setattr__(self, field, values[field])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CropRecord is immutable")
+
+    def __getitem__(self, key):
+        # Allows records to be used wherever a crop row (crop['ph_min']) was used
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __repr__(self):
+        return f"CropRecord({self.crop_name!r})"
+
+    def __reduce__(self):
+        # Slots plus the immutability guard need explicit pickling support
+        return (CropRecord, (self.to_dict(),))
+
+    def get(self, key, default=None):
+        """Get a field value, or default if the field does not exist."""
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        """Convert the record to a plain dictionary."""
+        return {field: getattr(self, field) for field in CROP_FIELDS}
+
+
+class CropCatalog:
+    def __init__(self, crop_data):
+        """
+        Build an immutable crop catalog from a crop DataFrame.
+
+        Args:
+            crop_data: DataFrame with the columns in CROP_FIELDS
+        """
+        self._crop_data = crop_data
+        self._records = None
+
+        # Column-oriented storage for vectorized scoring
+        self.array = np.empty(len(crop_data), dtype=self._build_dtype(crop_data))
+        for field in CROP_FIELDS:
+            self.array[field] = crop_data[field].to_numpy()
+        self.array.flags.writeable = False
+        self._build_index()
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Wrap an existing structured array (e.g. a memory-mapped .npy file) without copying it.
+
+        The DataFrame view and the per-crop records are only built if they are used.
+
+        Args:
+            array: Structured NumPy array with the fields in CROP_FIELDS
+        """
+        catalog = cls.__new__(cls)
+        catalog.array = array
+        catalog._crop_data = None
+        catalog._records = None
+        catalog._build_index()
+        return catalog
+
+    @property
+    def crop_data(self):
+        """DataFrame with one row per crop, in catalog order."""
+        if self._crop_data is None:
+            self._crop_data = pd.DataFrame({field: self.array[field] for field in CROP_FIELDS})
+        return self._crop_data
+
+    @property
+    def records(self):
+        """Tuple of CropRecord, in catalog order."""
+        if self._records is None:
+            # Row-oriented records with native Python values for scalar access
+            self._records = tuple(CropRecord(dict(zip(CROP_FIELDS, values)))
+                                  for values in self.array.tolist())
+        return self._records
+
+    def _build_index(self):
+        """Build the name index and the season partitions from the structured array."""
+        self._index = {str(name): i for i, name in enumerate(self.array['crop_name'])}
+
+        # Season partitions: catalog positions grouped by season, each season a contiguous slice
+        seasons = self.array['season']
+        self.season_order = np.argsort(seasons, kind='stable')
+        self.season_order.flags.writeable = False
+        sorted_seasons = seasons[self.season_order]
+        unique_seasons, starts = np.unique(sorted_seasons, return_index=True)
+        stops = np.append(starts[1:], len(sorted_seasons))
+        self._season_slices = {str(season): slice(int(start), int(stop))
+                               for season, start, stop in zip(unique_seasons, starts, stops)}
+
+    @staticmethod
+    def _build_dtype(crop_data):
+        """Choose a compact storage type for each field, keeping integer columns as integers."""
+        fields = []
+        for field in CROP_FIELDS:
+            column = crop_data[field]
+            if pd.api.types.is_integer_dtype(column):
+                fields.append((field, 'i8'))
+            elif pd.api.types.is_numeric_dtype(column):
+                fields.append((field, 'f8'))
+            else:
+                width = max([len(str(value)) for value in column] + [1])
+                fields.append((field, f'U{width}'))
+        return np.dtype(fields)
+
+    @classmethod
+    def from_csv(cls, path='data/crop_data.csv'):
+        """Load a catalog from a crop CSV file."""
+        return cls(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, crop_name):
+        return crop_name in self._index
+
+    @property
+    def names(self):
+        """Array of crop names in catalog order."""
+        return self.array['crop_name']
+
+    def column(self, field):
+        """Get a read-only array of a field for all crops, in catalog order."""
+        return self.array[field]
+
+    def growing_months(self):
+        """Get the whole months each crop occupies the field (at least 1), in catalog order."""
+        return np.maximum(1, np.rint(self.array['growing_days'] / DAYS_PER_MONTH)).astype(int)
+
+    def season_positions(self, season):
+        """Get the catalog positions of a season's crops (ascending) as a read-only slice, empty if none."""
+        return self.season_order[self._season_slices.get(season, slice(0, 0))]
+
+    def index_of(self, crop_name):
+        """Get the catalog position of a crop, or None if it is unknown."""
+        return self._index.get(crop_name)
+
+    def get(self, crop_name):
+        """Get the CropRecord for a crop, or None if it is unknown."""
+        i = self._index.get(crop_name)
+        if i is None:
+            return None
+        return self.records[i]
+
+
+# Catalogs shared across components, keyed by CSV path
+_catalogs = {}
+
+def get_crop_catalog(path='data/crop_data.csv'):
+    """
+    Get the shared crop catalog for a CSV file, loading it on first use.
+
+    Args:
+        path: Path to the crop data CSV, defaults to data/crop_data.csv
+
+    Returns:
+        CropCatalog instance
+    """
+    if path not in _catalogs:
+        _catalogs[path] = CropCatalog.from_csv(path)
+    return _catalogs[path]
@@ -0,0 +1,97 @@
+import numpy as np
+from sklearn.neighbors import KDTree
+
+# Index dimension -> crop catalog fields whose mean is the crop's target value
+REQUIREMENT_FIELDS = {
+    'nitrogen': ('nitrogen_requirement',),
+    'phosphorus': ('phosphorus_requirement',),
+    'potassium': ('potassium_requirement',),
+    'ph': ('ph_min', 'ph_max'),
+    'temperature': ('temperature_min', 'temperature_max'),
+    'humidity': ('humidity_min', 'humidity_max'),
+    'rainfall': ('rainfall_min', 'rainfall_max')
+}
+# Dimensions every query must have; the others are used when the soil profile has them
+REQUIRED_DIMENSIONS = ('nitrogen', 'phosphorus', 'potassium', 'ph')
+
+
+class CropIndex:
+    def __init__(self, data_processor, leaf_size=16):
+        """
+        KD-tree over normalized crop requirement vectors for nearest-crop candidate retrieval.
+
+        Each crop is a point of its N/P/K requirements and the midpoints of its pH,
+        temperature, humidity and rainfall ranges, every dimension scaled to 0-1 by the
+        soil parameter ranges. A soil profile is scaled the same way and the k closest
+        crops are found in O(log n) per query. Closeness to the requirements is only a
+        proxy for the fused ranking score (which also weighs ML probabilities and market
+        scores), so HybridRankingEngine.rank uses the retrieved crops as a first set of
+        candidates rather than as the answer.
+
+        Profiles without some optional parameters are matched on the dimensions they
+        have, with one tree per set of dimensions built on first use.
+
+        Args:
+            data_processor: DataProcessor instance providing the catalog and parameter ranges
+            leaf_size: KD-tree leaf size
+        """
+        self.data_processor = data_processor
+        self.leaf_size = leaf_size
+        crop_catalog = data_processor.crop_catalog
+        self.n_crops = len(crop_catalog)
+
+        self.dimensions = list(REQUIREMENT_FIELDS)
+        low = np.array([data_processor.soil_params_range[dimension][0] for dimension in self.dimensions], dtype=float)
+        high = np.array([data_processor.soil_params_range[dimension][1] for dimension in self.dimensions], dtype=float)
+        self.offset = low
+        self.scale = high - low
+        targets = np.column_stack([
+            np.mean([crop_catalog.column(field) for field in fields], axis=0)
+            for fields in REQUIREMENT_FIELDS.values()
+        ])
+        self.points = (targets - self.offset) / self.scale
+        self._trees = {}
+
+    def tree(self, dimensions):
+        """Get the KD-tree over a tuple of dimension positions, building it on first use."""
+        if dimensions not in self._trees:
+            self._trees[dimensions] = KDTree(self.points[:, list(dimensions)], leaf_size=self.leaf_size)
+        return self._trees[dimensions]
+
+    def query(self, soil_params, k=20, mask=None):
+        """
+        Get the k crops whose requirements are closest to a soil profile.
+
+        Args:
+            soil_params: Dict of soil parameters (nitrogen, phosphorus, potassium and ph required)
+            k: Number of candidates
+            mask: Optional boolean array over the catalog; only crops where it is True are
+                  returned (e.g. in-season crops)
+
+        Returns:
+            Array of up to k catalog positions, nearest first
+        """
+        present = tuple(i for i, dimension in enumerate(self.dimensions)
+                        if dimension in soil_params and not np.isnan(soil_params[dimension]))
+        missing = [dimension for dimension in REQUIRED_DIMENSIONS
+                   if self.dimensions.index(dimension) not in present]
+        if missing:
+            raise ValueError(f"Missing required parameter: {missing[0]}")
+
+        point = np.array([[soil_params[self.dimensions[i]] for i in present]], dtype=float)
+        point = (point - self.offset[list(present)]) / self.scale[list(present)]
+        tree = self.tree(present)
+
+        allowed = self.n_crops if mask is None else int(np.count_nonzero(mask))
+        k = min(k, allowed)
+        if k == 0:
+            return np.array([], dtype=int)
+        # Ask for more neighbours until k of them pass the mask
+        n = k
+        while True:
+            neighbours = tree.query(point, k=min(n, self.n_crops), return_distance=False)[0]
+            if mask is not None:
+                neighbours = neighbours[mask[neighbours]]
+            if len(neighbours) >= k or n >= self.n_crops:
+                return neighbours[:k]
+            n *= 2
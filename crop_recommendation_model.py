@@ -1,31 +1,113 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from scipy.optimize import minimize_scalar
+from sklearn.base import clone
+from sklearn.inspection import permutation_importance
+from sklearn.model_selection import KFold, cross_val_predict, train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score, classification_report, log_loss
+import hashlib
 import joblib
 import os
+import pickle
+import time
+import warnings
+from datetime import datetime
+from crop_catalog import get_crop_catalog
+from model_backends import create_backend
+from tree_explainer import TreeExplainer
+
+# Cross-validation folds used to get out-of-sample votes for calibration
+CALIBRATION_FOLDS = 3
+
+
+class TemperatureCalibrator:
+    def __init__(self, smoothing=1e-3):
+        """
+        Calibrate forest vote shares with temperature scaling: p ∝ (votes + smoothing) ** (1 / T).
+        
+        A single parameter fitted on out-of-sample votes, so it works with a handful of
+        samples per crop, where per-class calibration (Platt, isotonic) cannot be fitted.
+        
+        Args:
+            smoothing: Added to the vote shares so crops without votes keep a small probability
+        """
+        self.smoothing = smoothing
+        self.temperature = 1.0
+    
+    def fit(self, probabilities, targets):
+        """
+        Fit the temperature by minimizing the log loss.
+        
+        Args:
+            probabilities: Array (n_samples, n_classes) of uncalibrated probabilities;
+                           rows with NaN are ignored
+            targets: Integer array of the true class position of each row
+        """
+        usable = ~np.isnan(probabilities).any(axis=1)
+        probabilities, targets = probabilities[usable], np.asarray(targets)[usable]
+        if len(targets) == 0:
+            return self
+        
+        def loss(log_temperature):
+            calibrated = self._scale(probabilities, np.exp(log_temperature))
+            return -np.mean(np.log(calibrated[np.arange(len(targets)), targets]))
+        
+        self.temperature = float(np.exp(minimize_scalar(loss, bounds=(-3, 3), method='bounded').x))
+        return self
+    
+    def transform(self, probabilities):
+        """Calibrate an array (n_samples, n_classes) of probabilities."""
+        return self._scale(probabilities, self.temperature)
+    
+    def _scale(self, probabilities, temperature):
+        logits = np.log(probabilities + self.smoothing) / temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        scaled = np.exp(logits)
+        return scaled / scaled.sum(axis=1, keepdims=True)
+
 
 class CropRecommendationModel:
-    def __init__(self):
-        """Initialize the crop recommendation model."""
+    def __init__(self, crop_catalog=None, backend='random_forest'):
+        """
+        Initialize the crop recommendation model.
+        
+        Args:
+            crop_catalog: Optional CropCatalog, defaults to the shared catalog of data/crop_data.csv
+            backend: Classifier to train, a key of model_backends.BACKENDS
+        """
+        self.backend = backend
         self.model = None
+        self.calibrator = None
         self.scaler = StandardScaler()
         self.features = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall', 'month']
         self.trained = False
-        self.crop_data = pd.read_csv('data/crop_data.csv')
-        
-    def prepare_training_data(self):
+        self.crop_catalog = crop_catalog or get_crop_catalog('data/crop_data.csv')
+        # Train/test splits kept for incremental updates, and metadata of the last fit
+        self.training_data = None
+        self.metadata = {}
+        # TreeExplainer of the current model, built on first use
+        self.explainer = None
+        # Importances computed at training time: 'impurity' and optionally 'permutation'
+        self.feature_importance = None
+        
+    @property
+    def crop_data(self):
+        """DataFrame of the crop catalog (see CropCatalog.crop_data)."""
+        return self.crop_catalog.crop_data
+    
+    def prepare_training_data(self, crops=None):
         """
         Prepare training data by extracting features from crop_data.
-        """
-        # Load crop data
-        crop_data = self.crop_data.copy()
         
+        Args:
+            crops: Optional collection of crop names to generate samples for, defaults to all
+        """
         # Create a synthetic dataset based on crop requirements
         rows = []
-        for _, crop in crop_data.iterrows():
+        for crop in self.crop_catalog:
+            if crops is not None and crop['crop_name'] not in crops:
+                continue
             # Generate multiple samples for each crop with slight variations in optimal conditions
             for _ in range(5):  # 5 samples per crop to create enough training data
                 # Get midpoint of optimal ranges for each parameter
@@ -92,28 +174,206 @@ class CropRecommendationModel:
         
         return X, y
     
-    def train_model(self):
-        """Train the random forest model for crop recommendation."""
-        X, y = self.prepare_training_data()
+    def train_model(self, calibrate=False, n_estimators=None, data=None, permutation=False, n_jobs=None):
+        """
+        Train the crop recommendation model with the configured backend.
+        
+        Feature importances are computed once here and saved with the model.
+        
+        Args:
+            calibrate: Calibrate the model's scores (e.g. forest vote shares) into probabilities
+            n_estimators: Number of trees for tree backends, defaults to the backend's own
+            data: Optional (X, y) training data, defaults to freshly generated synthetic data
+            permutation: Also compute permutation importance on the test split
+            n_jobs: Parallel jobs for permutation importance (-1 for all cores)
+            
+        Returns:
+            Accuracy on the held-out test split
+        """
+        X, y = data if data is not None else self.prepare_training_data()
         
         # Split the data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        self.training_data = {'X_train': X_train, 'y_train': y_train, 'X_test': X_test, 'y_test': y_test}
         
         # Scale the features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        self.scaler = StandardScaler()
+        self.scaler.fit(X_train)
         
         # Train the model
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.model.fit(X_train_scaled, y_train)
-        
-        # Evaluate the model
-        y_pred = self.model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
+        start = time.perf_counter()
+        self.model = create_backend(self.backend, n_estimators)
+        self.model.fit(self.scaler.transform(X_train), y_train)
+        self.calibrator = self._fit_calibrator() if calibrate else None
+        self.explainer = None
         
         self.trained = True
+        accuracy = self._evaluate(time.perf_counter() - start, update='full')
+        self.feature_importance = self._compute_feature_importance(permutation, n_jobs)
         return accuracy
     
+    def update_model(self, new_samples=None, n_trees=25):
+        """
+        Update the trained model with new samples without retraining from scratch.
+        
+        New samples for crops the model already knows grow n_trees extra trees (warm start)
+        on tree backends; the existing trees and the scaler are kept. Trees cannot gain
+        classes, so samples for new crops retrain the model on all data (with the same
+        number of trees). Backends without warm start (k-NN, centroids) are refitted, which
+        is cheap for them. The calibrator is refitted either way.
+        
+        Args:
+            new_samples: DataFrame with self.features and a 'crop' column, defaults to
+                         synthetic samples for catalog crops the model does not know yet
+            n_trees: Trees to add on a warm start
+            
+        Returns:
+            Accuracy on the test split (old and new test samples), or None if there was
+            nothing to add
+        """
+        if not self.trained:
+            return self.train_model()
+        if self.training_data is None:
+            raise ValueError("Model was saved without training data and cannot be updated")
+        
+        if new_samples is None:
+            missing = [crop for crop in self.crop_catalog.names if crop not in set(self.model.classes_)]
+            if not missing:
+                return None
+            X_new, y_new = self.prepare_training_data(crops=set(missing))
+        else:
+            X_new, y_new = new_samples[self.features], new_samples['crop']
+        if len(X_new) == 0:
+            return None
+        
+        # Keep the same train/test proportions for the new samples
+        if len(X_new) >= 5:
+            X_new_train, X_new_test, y_new_train, y_new_test = train_test_split(X_new, y_new, test_size=0.2, random_state=42)
+        else:
+            X_new_train, X_new_test, y_new_train, y_new_test = X_new, X_new.iloc[:0], y_new, y_new.iloc[:0]
+        data = self.training_data
+        data['X_train'] = pd.concat([data['X_train'], X_new_train], ignore_index=True)
+        data['y_train'] = pd.concat([data['y_train'], y_new_train], ignore_index=True)
+        data['X_test'] = pd.concat([data['X_test'], X_new_test], ignore_index=True)
+        data['y_test'] = pd.concat([data['y_test'], y_new_test], ignore_index=True)
+        
+        start = time.perf_counter()
+        X_train = self.scaler.transform(data['X_train'])
+        calibrate = self.calibrator is not None
+        new_crops = set(y_new_train) - set(self.model.classes_)
+        params = self.model.get_params()
+        if new_crops or 'warm_start' not in params:
+            if new_crops:
+                print(f"Retraining on {len(new_crops)} new crops: {sorted(new_crops)}")
+            update = 'retrain'
+            self.model = clone(self.model)
+            self.model.fit(X_train, data['y_train'])
+        else:
+            update = 'warm_start'
+            self.model.set_params(warm_start=True, n_estimators=params['n_estimators'] + n_trees)
+            self.model.fit(X_train, data['y_train'])
+            self.model.set_params(warm_start=False)
+        if calibrate:
+            self.calibrator = self._fit_calibrator()
+        self.explainer = None
+        
+        accuracy = self._evaluate(time.perf_counter() - start, update=update)
+        # Recompute the same kinds of importance as before the update
+        self.feature_importance = self._compute_feature_importance(
+            permutation=self.feature_importance is not None and 'permutation' in self.feature_importance)
+        return accuracy
+    
+    def _fit_calibrator(self):
+        """Fit a TemperatureCalibrator on cross-validated scores of a same-sized model over the training split."""
+        X_train = self.scaler.transform(self.training_data['X_train'])
+        y_train = self.training_data['y_train']
+        # Out-of-bag votes are not usable here: after a warm start the earlier trees' bootstrap
+        # samples no longer match the training data, so in-bag samples would count as held out
+        estimator = clone(self.model)
+        folds = KFold(n_splits=CALIBRATION_FOLDS, shuffle=True, random_state=42)
+        with warnings.catch_warnings():
+            # Folds missing a rare crop give it probability 0, which the calibrator smooths
+            warnings.simplefilter('ignore', RuntimeWarning)
+            votes = cross_val_predict(estimator, X_train, y_train, cv=folds, method='predict_proba')
+        # Columns follow the sorted labels, the same order as self.model.classes_
+        targets = np.searchsorted(self.model.classes_, np.asarray(y_train))
+        return TemperatureCalibrator().fit(votes, targets)
+    
+    def _evaluate(self, training_seconds, update):
+        """Score the model on the test split and record the metadata of this fit."""
+        data = self.training_data
+        X_test, y_test = data['X_test'], data['y_test']
+        accuracy = None
+        loss = None
+        if len(X_test):
+            probabilities = self._predict_proba(self.scaler.transform(X_test))
+            y_pred = self.model.classes_[np.argmax(probabilities, axis=1)]
+            accuracy = float(accuracy_score(y_test, y_pred))
+            # Test crops unknown to the model count as predicted with probability ~0
+            labels = list(self.model.classes_) + sorted(set(y_test) - set(self.model.classes_))
+            probabilities = np.pad(probabilities, ((0, 0), (0, len(labels) - probabilities.shape[1])))
+            loss = float(log_loss(y_test, np.clip(probabilities, 1e-15, 1), labels=labels))
+        
+        frame = data['X_train'].assign(crop=data['y_train'])
+        self.metadata = {
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'backend': self.backend,
+            'update': update,
+            'accuracy': accuracy,
+            'log_loss': loss,
+            'training_seconds': round(training_seconds, 3),
+            'data_hash': hashlib.sha1(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()).hexdigest(),
+            'n_samples': len(frame),
+            'n_crops': len(self.model.classes_),
+            'n_estimators': self.model.get_params().get('n_estimators'),
+            'model_bytes': len(pickle.dumps(self.model)),
+            'calibration': 'temperature' if self.calibrator is not None else None,
+            'temperature': self.calibrator.temperature if self.calibrator is not None else None
+        }
+        return accuracy
+    
+    def _predict_proba(self, X):
+        """Class probabilities for a scaled feature matrix, calibrated if a calibrator is fitted."""
+        probabilities = self.model.predict_proba(X)
+        if self.calibrator is not None:
+            probabilities = self.calibrator.transform(probabilities)
+        return probabilities
+    
+    def save_model(self, path):
+        """
+        Save the trained model and scaler to a file.
+        
+        Args:
+            path: Destination file path
+        """
+        if not self.trained:
+            self.train_model()
+        joblib.dump({'model': self.model, 'backend': self.backend, 'scaler': self.scaler, 'features': self.features,
+                     'calibrator': self.calibrator, 'training_data': self.training_data,
+                     'metadata': self.metadata, 'feature_importance': self.feature_importance}, path)
+    
+    def load_model(self, path, mmap_mode=None):
+        """
+        Load a model saved with save_model.
+        
+        Args:
+            path: File written by save_model
+            mmap_mode: Optional joblib mmap mode (e.g. 'r') to memory-map the model arrays
+                       instead of reading them into each process
+        """
+        saved = joblib.load(path, mmap_mode=mmap_mode)
+        self.model = saved['model']
+        self.scaler = saved['scaler']
+        self.features = saved['features']
+        # Files from before calibration and updates were added lack these keys
+        self.backend = saved.get('backend', 'random_forest')
+        self.calibrator = saved.get('calibrator')
+        self.training_data = saved.get('training_data')
+        self.metadata = saved.get('metadata', {})
+        self.feature_importance = saved.get('feature_importance')
+        self.explainer = None
+        self.trained = True
+    
     def predict(self, soil_params):
         """
         Predict the best crops for given soil parameters.
@@ -127,47 +387,182 @@ class CropRecommendationModel:
         if not self.trained:
             self.train_model()
         
+        # Get prediction probabilities
+        probabilities = self._predict_proba(self._prepare_input(soil_params))[0]
+        
+        # Get crop names
+        crop_names = self.model.classes_
+        
+        # Create crop-probability pairs and sort
+        recommendations = [(crop, prob) for crop, prob in zip(crop_names, probabilities)]
+        recommendations.sort(key=lambda x: x[1], reverse=True)
+        
+        return recommendations
+    
+    def predict_probabilities(self, soil_params, crop_names):
+        """
+        Predict the probability of every crop in crop_names in one call.
+        
+        Args:
+            soil_params: Dict with keys matching self.features
+            crop_names: Sequence of crop names defining the output order
+            
+        Returns:
+            NumPy array of probabilities aligned with crop_names (0 for crops unknown to the model)
+        """
+        return self.predict_probabilities_batch(pd.DataFrame([soil_params]), crop_names)[0]
+    
+    def predict_probabilities_batch(self, profiles, crop_names):
+        """
+        Predict crop probabilities for many soil profiles in one call.
+        
+        Args:
+            profiles: DataFrame with one row per profile and columns matching self.features
+            crop_names: Sequence of crop names defining the output column order
+            
+        Returns:
+            NumPy array of shape (n_profiles, n_crops), 0 for crops unknown to the model
+        """
+        if not self.trained:
+            self.train_model()
+        
+        probabilities = self._predict_proba(self._prepare_input(profiles))
+        crop_positions, class_positions = self._align_classes(crop_names)
+        
+        aligned = np.zeros((len(probabilities), len(crop_names)))
+        aligned[:, crop_positions] = probabilities[:, class_positions]
+        return aligned
+    
+    def get_prediction_attributions(self, soil_params, crop_names):
+        """
+        Explain one prediction: how much each feature moved each crop's share of the forest's
+        votes, i.e. the probability before calibration (see get_prediction_attributions_batch).
+        
+        Args:
+            soil_params: Dict with keys matching self.features
+            crop_names: Crops to explain
+            
+        Returns:
+            Dict mapping each crop name to a dict of feature name to attribution
+        """
+        attributions = self.get_prediction_attributions_batch(pd.DataFrame([soil_params]), crop_names)[0]
+        return {crop: dict(zip(self.features, attributions[:, i].tolist())) for i, crop in enumerate(crop_names)}
+    
+    def get_prediction_attributions_batch(self, profiles, crop_names):
+        """
+        Compute TreeSHAP feature attributions for many soil profiles in one call.
+        
+        Attributions explain the forest's probabilities before calibration: for each profile
+        and crop they sum to that probability minus the forest's average prediction.
+        Only available for the random_forest backend.
+        
+        Args:
+            profiles: DataFrame with one row per profile and columns matching self.features
+            crop_names: Sequence of crop names defining the output order
+            
+        Returns:
+            NumPy array of shape (n_profiles, n_features, n_crops), 0 for crops unknown to the model
+        """
+        if not self.trained:
+            self.train_model()
+        if self.explainer is None:
+            self.explainer = TreeExplainer(self.model)
+        
+        crop_positions, class_positions = self._align_classes(crop_names)
+        attributions = self.explainer.shap_values(self._prepare_input(profiles), classes=class_positions)
+        
+        aligned = np.zeros((len(attributions), len(self.features), len(crop_names)))
+        aligned[:, :, crop_positions] = attributions
+        return aligned
+    
+    def _align_classes(self, crop_names):
+        """Match model classes to positions in crop_names; returns (crop positions, class positions)."""
+        class_index = {crop: i for i, crop in enumerate(self.model.classes_)}
+        crop_positions = []
+        class_positions = []
+        for i, crop in enumerate(crop_names):
+            j = class_index.get(crop)
+            if j is not None:
+                crop_positions.append(i)
+                class_positions.append(j)
+        return np.array(crop_positions, dtype=int), np.array(class_positions, dtype=int)
+    
+    def _prepare_input(self, soil_params):
+        """
+        Validate soil parameters and return the scaled feature matrix for the model.
+        
+        Args:
+            soil_params: Dict of soil parameters, or a DataFrame with one profile per row
+        """
         # Ensure all required features are present
         for feature in self.features:
             if feature not in soil_params and feature != 'month':
                 raise ValueError(f"Missing required parameter: {feature}")
         
         # Convert input to DataFrame
-        input_data = pd.DataFrame([soil_params])
+        if isinstance(soil_params, pd.DataFrame):
+            input_data = soil_params
+        else:
+            input_data = pd.DataFrame([soil_params])
         
         # Get features in correct order
         input_features = input_data[self.features]
         
         # Scale the input
-        input_scaled = self.scaler.transform(input_features)
-        
-        # Get prediction probabilities
-        probabilities = self.model.predict_proba(input_scaled)[0]
-        
-        # Get crop names
-        crop_names = self.model.classes_
-        
-        # Create crop-probability pairs and sort
-        recommendations = [(crop, prob) for crop, prob in zip(crop_names, probabilities)]
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-        
-        return recommendations
+        return self.scaler.transform(input_features)
     
-    def get_feature_importance(self):
+    def get_feature_importance(self, kind='impurity'):
         """
         Get the importance of each feature in the model.
         
+        Importances are computed at training time and saved with the model, so this is a
+        lookup; models saved without them compute them once on first use.
+        
+        Args:
+            kind: 'impurity' (normalized, falls back to permutation importance for backends
+                  without impurity importances) or 'permutation' (mean accuracy drop)
+        
         Returns:
             Dict mapping feature names to importance scores
+        
+        Raises:
+            ValueError if kind is unknown, or is 'permutation' and the model has no test
+            split to compute it on (e.g. it was saved without training data)
         """
+        if kind not in ('impurity', 'permutation'):
+            raise ValueError(f"Unknown feature importance kind: {kind}")
         if not self.trained:
             self.train_model()
-        
-        importance_dict = {}
-        for feature, importance in zip(self.features, self.model.feature_importances_):
-            importance_dict[feature] = importance
-        
-        return importance_dict
+        if self.feature_importance is None or kind not in self.feature_importance:
+            self.feature_importance = self._compute_feature_importance(permutation=kind == 'permutation')
+        if kind not in self.feature_importance:
+            raise ValueError("Permutation importance needs the model's test split; "
+                             "use kind='impurity' or retrain the model")
+        return dict(self.feature_importance[kind])
+    
+    def _compute_feature_importance(self, permutation=False, n_jobs=None):
+        """Compute the importances stored in self.feature_importance."""
+        uniform = np.full(len(self.features), 1 / len(self.features))
+        has_test_data = self.training_data is not None and len(self.training_data['X_test'])
+        importance = {}
+        
+        if (permutation or not hasattr(self.model, 'feature_importances_')) and has_test_data:
+            X_test = self.scaler.transform(self.training_data['X_test'])
+            result = permutation_importance(self.model, X_test, self.training_data['y_test'], n_repeats=5,
+                                            random_state=42, n_jobs=n_jobs)
+            importance['permutation'] = dict(zip(self.features, result.importances_mean.tolist()))
+            importance['permutation_std'] = dict(zip(self.features, result.importances_std.tolist()))
+        
+        if hasattr(self.model, 'feature_importances_'):
+            importances = self.model.feature_importances_
+        elif 'permutation' in importance:
+            # Backends without impurity importances (k-NN, centroids): normalized permutation importance
+            importances = np.maximum(list(importance['permutation'].values()), 0)
+            importances = importances / importances.sum() if importances.sum() > 0 else uniform
+        else:
+            importances = uniform
+        importance['impurity'] = dict(zip(self.features, np.asarray(importances, dtype=float).tolist()))
+        return importance
     
     def explain_prediction(self, soil_params, top_crop):
         """
@@ -184,7 +579,7 @@ class CropRecommendationModel:
             self.train_model()
         
         # Get the crop data for the recommended crop
-        crop_data = self.crop_data[self.crop_data['crop_name'] == top_crop].iloc[0]
+        crop_data = self.crop_catalog.get(top_crop)
         
         # Compare soil parameters with crop requirements
         explanation_parts = []
@@ -1,12 +1,67 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
+from crop_catalog import CropCatalog, get_crop_catalog
+from market_forecaster import MARKET_METRICS, MarketForecaster
+from market_store import MarketStore
 
 class DataProcessor:
-    def __init__(self):
-        """Initialize the DataProcessor class to handle data loading and preprocessing."""
-        self.crop_data = None
+    def __init__(self, crop_catalog=None, market_data=None):
+        """
+        Initialize the DataProcessor class to handle data loading and preprocessing.
+        
+        Args:
+            crop_catalog: Optional preloaded CropCatalog
+            market_data: Optional preloaded market DataFrame; data is read from the
+                         CSV files unless both are given
+        """
+        self._init_attributes()
+        if crop_catalog is not None and market_data is not None:
+            self.crop_catalog = crop_catalog
+            self.market_data = market_data
+        else:
+            self.load_data()
+        self.build_season_index()
+        # Time-keyed view of the market data for constant-time month lookups
+        self.market_store = MarketStore(self.market_data)
+        self.build_market_score_cube()
+        
+    @classmethod
+    def from_score_cube(cls, crop_catalog, market_score_cube, market_cube_first_year, latest_years):
+        """
+        Build a scoring-only DataProcessor around precomputed market scores, e.g. the
+        memory-mapped state of a worker process, without loading or scoring market data.
+        
+        Soil scoring, season candidates and the cube-based market scores work as usual;
+        methods that need the market data itself (get_market_data_for_crop,
+        get_market_score, forecasts, add_market_data) do not.
+        
+        Args:
+            crop_catalog: CropCatalog
+            market_score_cube: Array (n_years, 12, n_crops) as build_market_score_cube sets
+            market_cube_first_year: Year of market_score_cube[0], None if it is empty
+            latest_years: Dict of month (None for any month) to the year resolve_market_year
+                          returns for it, e.g. from market_latest_years()
+        """
+        data_processor = cls.__new__(cls)
+        data_processor._init_attributes()
+        data_processor.crop_catalog = crop_catalog
+        data_processor.market_score_cube = market_score_cube
+        data_processor.market_cube_first_year = market_cube_first_year
+        data_processor.latest_years = dict(latest_years)
+        data_processor.build_season_index()
+        return data_processor
+    
+    def _init_attributes(self):
+        """Set the lookup tables and empty data attributes shared by every constructor."""
+        self.crop_catalog = None
         self.market_data = None
+        self.market_store = None
+        self.market_score_cube = None
+        self.market_cube_first_year = None
+        self.market_forecaster = None
+        # Default market year per month for processors without market data (from_score_cube)
+        self.latest_years = None
         self.soil_params_range = {
             'nitrogen': (0, 200),
             'phosphorus': (0, 150),
@@ -22,130 +77,225 @@ class DataProcessor:
             'summer': [3, 4, 5],  # Mar-May
             'annual': list(range(1, 13))  # All months
         }
-        self.load_data()
-        
+    
+    @property
+    def crop_data(self):
+        """DataFrame of the crop catalog (see CropCatalog.crop_data)."""
+        return self.crop_catalog.crop_data
+    
     def load_data(self):
         """Load crop and market data from CSV files."""
         try:
-            self.crop_data = pd.read_csv('data/crop_data.csv')
+            self.crop_catalog = get_crop_catalog('data/crop_data.csv')
             self.market_data = pd.read_csv('data/market_data.csv')
             print(f"Data loaded successfully: {len(self.crop_data)} crops, {len(self.market_data)} market entries")
         except Exception as e:
             print(f"Error loading data: {e}")
             # Create empty dataframes with expected columns if loading fails
-            self.crop_data = pd.DataFrame(columns=[
+            self.crop_catalog = CropCatalog(pd.DataFrame(columns=[
                 'crop_name', 'nitrogen_requirement', 'phosphorus_requirement', 
                 'potassium_requirement', 'temperature_min', 'temperature_max',
                 'rainfall_min', 'rainfall_max', 'humidity_min', 'humidity_max',
                 'ph_min', 'ph_max', 'season', 'growing_days'
-            ])
+            ]))
             self.market_data = pd.DataFrame(columns=[
                 'crop_name', 'month', 'year', 'price_per_kg', 
                 'demand_score', 'supply_score', 'profit_potential'
             ])
             
+    def build_season_index(self):
+        """
+        Precompute the month -> season table and the candidate crops of every month from
+        the season-partitioned catalog, so season lookups and filtering are constant time.
+        """
+        # First season in season_mapping listing the month, as the original linear search
+        self.month_seasons = {}
+        for season, months in self.season_mapping.items():
+            for month in months:
+                self.month_seasons.setdefault(month, season)
+        
+        annual = self.crop_catalog.season_positions('annual')
+        self._season_candidates = {}
+        # DataFrames of the candidates, built on first use by filter_crops_by_season
+        self._season_frames = {}
+        for season in set(self.month_seasons.values()) | {'unknown'}:
+            positions = self.crop_catalog.season_positions(season)
+            # Catalog order, as a boolean filter over crop_data would give
+            with_annual = positions if season == 'annual' else np.sort(np.concatenate([positions, annual]))
+            for include_annual, candidates in [(True, with_annual), (False, positions)]:
+                candidates.flags.writeable = False
+                self._season_candidates[season, include_annual] = candidates
+    
     def get_current_season(self, month):
         """Determine the current growing season based on the month."""
-        for season, months in self.season_mapping.items():
-            if month in months:
-                return season
-        return 'unknown'
+        return self.month_seasons.get(month, 'unknown')
+    
+    def get_season_candidates(self, month, include_annual=True):
+        """
+        Get the catalog positions of the crops that can be planted in a month.
+        
+        Args:
+            month: Month (1-12)
+            include_annual: Include annual crops
+            
+        Returns:
+            Read-only integer array of catalog positions in catalog order
+        """
+        return self._season_candidates[self.get_current_season(month), include_annual]
     
     def filter_crops_by_season(self, month, include_annual=True):
         """Filter crops that are suitable for planting in the given month."""
-        current_season = self.get_current_season(month)
-        if include_annual:
-            return self.crop_data[
-                (self.crop_data['season'] == current_season) | 
-                (self.crop_data['season'] == 'annual')
-            ]
-        return self.crop_data[self.crop_data['season'] == current_season]
+        key = self.get_current_season(month), include_annual
+        if key not in self._season_frames:
+            self._season_frames[key] = self.crop_data.iloc[self._season_candidates[key]]
+        # Built once per season; a shallow copy keeps callers from modifying the shared frame
+        return self._season_frames[key].copy(deep=False)
     
     def get_soil_compatibility_score(self, crop, soil_params):
         """
         Calculate how compatible a crop is with given soil parameters.
         Returns a score between 0 and 1, where 1 is perfectly compatible.
+        
+        Uses the same formula as get_soil_compatibility_array, for one crop record.
         """
         # Check if all required soil parameters are present
         if not all(k in soil_params for k in ['nitrogen', 'phosphorus', 'potassium', 'ph']):
             return 0
         
-        # Calculate compatibility for each parameter
-        n_score = self._get_nutrient_score(soil_params['nitrogen'], crop['nitrogen_requirement'])
-        p_score = self._get_nutrient_score(soil_params['phosphorus'], crop['phosphorus_requirement'])
-        k_score = self._get_nutrient_score(soil_params['potassium'], crop['potassium_requirement'])
+        params = {param: value for param, value in soil_params.items() if param in self.soil_params_range}
+        return float(self._score_soil(params, lambda field: np.array([crop[field]], dtype=float))[0])
+    
+    def get_soil_compatibility_scores(self, soil_params, crops=None):
+        """
+        Vectorized version of get_soil_compatibility_score for many crops at once.
         
-        # Calculate pH compatibility
-        ph_score = 0
-        if crop['ph_min'] <= soil_params['ph'] <= crop['ph_max']:
-            ph_score = 1
-        else:
-            # Decreasing score based on distance from optimal range
-            min_distance = min(abs(soil_params['ph'] - crop['ph_min']), 
-                            abs(soil_params['ph'] - crop['ph_max']))
-            ph_score = max(0, 1 - (min_distance / 2))  # Reduce score by distance, max penalty of 2 pH units
+        Args:
+            soil_params: Dict of soil parameters
+            crops: Optional DataFrame of crops, defaults to every crop in the catalog
             
-        # Optional parameters with defaults
-        temp_score = 1
-        humidity_score = 1
-        rainfall_score = 1
-        
-        if 'temperature' in soil_params:
-            if crop['temperature_min'] <= soil_params['temperature'] <= crop['temperature_max']:
-                temp_score = 1
-            else:
-                min_distance = min(abs(soil_params['temperature'] - crop['temperature_min']), 
-                                abs(soil_params['temperature'] - crop['temperature_max']))
-                temp_score = max(0, 1 - (min_distance / 10))  # Reduce score by distance
-                
-        if 'humidity' in soil_params:
-            if crop['humidity_min'] <= soil_params['humidity'] <= crop['humidity_max']:
-                humidity_score = 1
-            else:
-                min_distance = min(abs(soil_params['humidity'] - crop['humidity_min']), 
-                                abs(soil_params['humidity'] - crop['humidity_max']))
-                humidity_score = max(0, 1 - (min_distance / 20))  # Reduce score by distance
-                
-        if 'rainfall' in soil_params:
-            if crop['rainfall_min'] <= soil_params['rainfall'] <= crop['rainfall_max']:
-                rainfall_score = 1
-            else:
-                min_distance = min(abs(soil_params['rainfall'] - crop['rainfall_min']), 
-                                abs(soil_params['rainfall'] - crop['rainfall_max']))
-                rainfall_score = max(0, 1 - (min_distance / 50))  # Reduce score by distance
-        
-        # Combined score with weighted parameters
-        weights = {
-            'n_score': 0.2,
-            'p_score': 0.15,
-            'k_score': 0.15,
-            'ph_score': 0.2,
-            'temp_score': 0.1,
-            'humidity_score': 0.1,
-            'rainfall_score': 0.1
-        }
+        Returns:
+            NumPy array of scores (0-1) aligned with the rows of crops
+        """
+        if not all(k in soil_params for k in ['nitrogen', 'phosphorus', 'potassium', 'ph']):
+            return np.zeros(len(self.crop_catalog) if crops is None else len(crops))
+        
+        params = {param: value for param, value in soil_params.items() if param in self.soil_params_range}
+        if crops is None:
+            return self.get_soil_compatibility_array(params)
+        return self._score_soil(params, lambda field: crops[field].to_numpy(dtype=float))
+    
+    def get_soil_compatibility_matrix(self, profiles):
+        """
+        Score many soil profiles against every crop in the catalog at once.
         
-        total_score = (weights['n_score'] * n_score + 
-                       weights['p_score'] * p_score + 
-                       weights['k_score'] * k_score + 
-                       weights['ph_score'] * ph_score + 
-                       weights['temp_score'] * temp_score + 
-                       weights['humidity_score'] * humidity_score + 
-                       weights['rainfall_score'] * rainfall_score)
-        
-        return total_score
-    
-    def _get_nutrient_score(self, soil_value, crop_requirement):
-        """Calculate how well the soil nutrient level meets the crop requirement."""
-        if soil_value >= crop_requirement:
-            # If soil has enough or more nutrients than required
-            # Too much can also be less optimal, so we decrease the score if it's significantly higher
-            if soil_value > crop_requirement * 2:
-                return max(0.5, 1 - ((soil_value - (crop_requirement * 2)) / (crop_requirement * 2)))
-            return 1.0
+        Args:
+            profiles: DataFrame with one soil profile per row, using the soil_params keys
+                      as columns. Missing optional values (NaN) are ignored
+                      like missing keys in get_soil_compatibility_score.
+            
+        Returns:
+            NumPy array of shape (n_profiles, n_crops) with scores (0-1)
+        """
+        if not all(k in profiles for k in ['nitrogen', 'phosphorus', 'potassium', 'ph']):
+            return np.zeros((len(profiles), len(self.crop_catalog)))
+        
+        params = {param: np.asarray(profiles[param], dtype=float) for param in self.soil_params_range if param in profiles}
+        return self.get_soil_compatibility_array(params)
+    
+    def get_soil_compatibility_array(self, params, crops=None):
+        """
+        Score soil parameter arrays of any shape against every crop in the catalog.
+        
+        Args:
+            params: Dict of soil parameter name to a NumPy array (or scalar); arrays are
+                    broadcast together. nitrogen, phosphorus, potassium and ph are required,
+                    the other parameters are optional and NaN values are ignored.
+            crops: Optional integer array of catalog positions broadcastable with the
+                   parameters, to score each element against one crop only
+            
+        Returns:
+            NumPy array of shape broadcast_shape + (n_crops,) with scores (0-1), or of the
+            broadcast shape of params and crops if crops is given
+        """
+        if crops is None:
+            return self._score_soil(params, self.crop_catalog.column)
+        crops = np.asarray(crops, dtype=int)
+        return self._score_soil(params, lambda field: self.crop_catalog.column(field)[crops], crops.shape)
+    
+    def _score_soil(self, params, column, crops_shape=None):
+        """
+        The soil compatibility formula shared by every get_soil_compatibility_* method.
+        
+        Args:
+            params: Dict of soil parameter arrays, see get_soil_compatibility_array
+            column: Function returning a crop field as an array
+            crops_shape: None to score every parameter element against every crop
+                         (a new last axis), or the shape of the crop positions to
+                         broadcast with the parameters element by element
+        """
+        if crops_shape is None:
+            shape = np.broadcast_shapes(*(np.shape(value) for value in params.values()))
+            
+            def values(param):
+                return np.broadcast_to(np.asarray(params[param], dtype=float), shape)[..., None]
         else:
-            # If soil has less nutrients than required
-            return soil_value / crop_requirement
+            shape = np.broadcast_shapes(crops_shape, *(np.shape(value) for value in params.values()))
+            
+            def values(param):
+                return np.broadcast_to(np.asarray(params[param], dtype=float), shape)
+        
+        with np.errstate(invalid='ignore'):
+            n_score = self._get_nutrient_scores(values('nitrogen'), column('nitrogen_requirement'))
+            p_score = self._get_nutrient_scores(values('phosphorus'), column('phosphorus_requirement'))
+            k_score = self._get_nutrient_scores(values('potassium'), column('potassium_requirement'))
+            ph_score = self._get_range_scores(values('ph'), column('ph_min'), column('ph_max'), 2)
+            scores = 0.2 * n_score + 0.15 * p_score + 0.15 * k_score + 0.2 * ph_score
+            
+            # Optional parameters score 1 when missing
+            for param, max_penalty_distance in [('temperature', 10), ('humidity', 20), ('rainfall', 50)]:
+                if param in params:
+                    value = values(param)
+                    param_score = self._get_range_scores(value, column(f'{param}_min'), column(f'{param}_max'), max_penalty_distance)
+                    scores = scores + 0.1 * np.where(np.isnan(value), 1.0, param_score)
+                else:
+                    scores = scores + 0.1
+        
+        # Profiles missing a required parameter are not compatible with anything
+        missing = np.any([np.isnan(values(k)) for k in ['nitrogen', 'phosphorus', 'potassium', 'ph']], axis=0)
+        return np.where(missing, 0.0, scores)
+    
+    def _get_range_scores(self, value, range_min, range_max, max_penalty_distance):
+        """Score a value against arrays of optimal ranges, decreasing with distance outside the range."""
+        in_range = (range_min <= value) & (value <= range_max)
+        min_distance = np.minimum(np.abs(value - range_min), np.abs(value - range_max))
+        return np.where(in_range, 1.0, np.maximum(0, 1 - (min_distance / max_penalty_distance)))
+    
+    def _get_nutrient_scores(self, soil_value, crop_requirements):
+        """Calculate how well soil nutrient levels meet arrays of crop requirements."""
+        # Too much can also be less optimal, so the score decreases above twice the requirement
+        with np.errstate(divide='ignore', invalid='ignore'):
+            excess_score = np.maximum(0.5, 1 - ((soil_value - (crop_requirements * 2)) / (crop_requirements * 2)))
+            deficit_score = soil_value / crop_requirements
+        return np.where(
+            soil_value >= crop_requirements,
+            np.where(soil_value > crop_requirements * 2, excess_score, 1.0),
+            deficit_score
+        )
+    
+    def resolve_market_year(self, month=None, year=None):
+        """
+        Get the year to use for market lookups: the given year, or else the latest year
+        with market data for the month (the latest year overall if the month has none).
+        """
+        if year is not None:
+            return year
+        if self.market_store is None:
+            return self.latest_years.get(month, self.latest_years.get(None))
+        return self.market_store.latest_year(month)
+    
+    def market_latest_years(self):
+        """Get the default market year of every month (and of None, any month), as resolve_market_year returns it."""
+        return {month: self.resolve_market_year(month) for month in [None, *range(1, 13)]}
     
     def get_market_data_for_crop(self, crop_name, month=None, year=None):
         """Get the latest market data for a specific crop."""
@@ -168,25 +318,48 @@ class DataProcessor:
                 return None
             return data.iloc[0]
     
-    def get_market_score(self, crop_name, month, year=2023):
+    def enable_market_forecasts(self, method='auto'):
         """
-        Calculate a market score for a crop based on price, demand, and supply.
-        Returns a score between 0 and 1.
+        Fit a MarketForecaster on the market data so market scores can be computed at harvest time.
+
+        Args:
+            method: Forecast method, see market_forecaster.FORECAST_METHODS
+
+        Returns:
+            The fitted MarketForecaster
         """
-        market_data = self.get_market_data_for_crop(crop_name, month, year)
-        if market_data is None:
-            return 0.5  # Neutral score if no data
-        
+        if self.market_forecaster is None or self.market_forecaster.method != method:
+            self.market_forecaster = MarketForecaster(method=method)
+        # Refits are cached by data fingerprint, so this is cheap when the data has not changed
+        self.market_forecaster.fit(self.market_data)
+        return self.market_forecaster
+
+    def add_market_data(self, new_market_data):
+        """
+        Append new market observations and update the forecaster incrementally (if enabled).
+
+        Args:
+            new_market_data: DataFrame with the market data columns
+        """
+        # Forecaster first: if it rejects the data, nothing else has changed yet
+        if self.market_forecaster is not None:
+            self.market_forecaster.update(new_market_data)
+        self.market_data = pd.concat([self.market_data, new_market_data], ignore_index=True)
+        self.market_store.update(new_market_data)
+        self.build_market_score_cube()
+
+    def _score_market_metrics(self, price, demand, supply, profit):
+        """Combine market metrics (scalars or arrays) into a 0-1 market score."""
         # Normalize price (higher price = better score)
         all_prices = self.market_data['price_per_kg']
-        normalized_price = (market_data['price_per_kg'] - all_prices.min()) / (all_prices.max() - all_prices.min())
+        normalized_price = (price - all_prices.min()) / (all_prices.max() - all_prices.min())
         
         # Consider demand and supply scores (1-10 scale in original data)
-        demand_score = market_data['demand_score'] / 10  # Convert to 0-1 scale
-        supply_score = 1 - (market_data['supply_score'] / 10)  # Invert so low supply = higher score
+        demand_score = demand / 10  # Convert to 0-1 scale
+        supply_score = 1 - (supply / 10)  # Invert so low supply = higher score
         
         # Direct profit potential score
-        profit_score = market_data['profit_potential'] / 10  # Convert to 0-1 scale
+        profit_score = profit / 10  # Convert to 0-1 scale
         
         # Combine scores with weights
         weights = {
@@ -196,14 +369,108 @@ class DataProcessor:
             'profit': 0.2
         }
         
-        total_score = (weights['price'] * normalized_price + 
-                      weights['demand'] * demand_score +
-                      weights['supply'] * supply_score +
-                      weights['profit'] * profit_score)
+        return (weights['price'] * normalized_price + 
+                weights['demand'] * demand_score +
+                weights['supply'] * supply_score +
+                weights['profit'] * profit_score)
+
+    def get_market_score(self, crop_name, month, year=None, days_ahead=None):
+        """
+        Calculate a market score for a crop based on price, demand, and supply.
+        Returns a score between 0 and 1. year defaults to the latest year with data.
+        
+        If days_ahead is given (e.g. the crop's growing_days) and forecasts are enabled,
+        the score uses the forecast market conditions that many days after planting.
+        """
+        year = self.resolve_market_year(month, year)
+        if days_ahead is not None and self.market_forecaster is not None:
+            metrics = self.market_forecaster.forecast_metrics(crop_name, month, year, days_ahead)
+            if metrics is None:
+                return 0.5  # Neutral score if no data
+            return self._score_market_metrics(metrics['price_per_kg'], metrics['demand_score'],
+                                              metrics['supply_score'], metrics['profit_potential'])
+        
+        market_data = self.market_store.get(crop_name, month, year)
+        if market_data is None:
+            return 0.5  # Neutral score if no data
+        
+        return self._score_market_metrics(market_data['price_per_kg'], market_data['demand_score'],
+                                          market_data['supply_score'], market_data['profit_potential'])
+
+    def build_market_score_cube(self):
+        """
+        Precompute the market score of every catalog crop for every month of every year
+        in the market data, in one array expression over the market store.
+        
+        Sets market_score_cube, of shape (n_years, 12, n_crops) in catalog order with a
+        neutral 0.5 where there is no data, and market_cube_first_year (None if empty).
+        """
+        store = self.market_store
+        crop_names = list(self.crop_catalog.names)
+        if not store.n_periods:
+            self.market_score_cube = np.full((0, 12, len(crop_names)), 0.5)
+            self.market_cube_first_year = None
+            return self.market_score_cube
+        
+        # Score the whole (crop, month) timeline at once
+        price, demand, supply, profit = (store.metrics[metric].astype(float) for metric in MARKET_METRICS)
+        timeline = np.where(store.observed, self._score_market_metrics(price, demand, supply, profit), 0.5)
+        
+        # Align the timeline to whole calendar years and reshape to (year, month)
+        first_year = store.first_period // 12
+        n_years = store.last_period // 12 - first_year + 1
+        offset = store.first_period - first_year * 12
+        scores = np.full((len(store.crop_names), n_years * 12), 0.5)
+        scores[:, offset:offset + store.n_periods] = timeline
+        scores = scores.reshape(len(store.crop_names), n_years, 12)
+        
+        # Reorder to the catalog, crops without market data stay neutral
+        cube = np.full((n_years, 12, len(crop_names)), 0.5)
+        rows = np.array([-1 if store.index_of(crop) is None else store.index_of(crop) for crop in crop_names], dtype=int)
+        known = rows >= 0
+        cube[:, :, known] = scores[rows[known]].transpose(1, 2, 0)
+        
+        self.market_score_cube = cube
+        self.market_cube_first_year = first_year
+        return cube
+
+    def get_market_scores(self, month, year=None):
+        """
+        Get the market score of every catalog crop for a month, read from the score cube.
+        
+        Args:
+            month: Month (1-12)
+            year: Year, defaults to the latest year with data for the month
+            
+        Returns:
+            Array of scores between 0 and 1 aligned with crop_catalog.names
+            (neutral 0.5 for crops without data)
+        """
+        year = self.resolve_market_year(month, year)
+        cube = self.market_score_cube
+        # No market data at all (empty cube) or a year outside it: neutral, as get_market_score
+        first_year = self.market_cube_first_year
+        if year is None or first_year is None or not 0 <= year - first_year < len(cube):
+            return np.full(cube.shape[2], 0.5)
+        return cube[year - first_year, month - 1]
+
+    def _get_market_scores(self, crop_names, month, year=None, days_ahead=None):
+        """
+        Calculate market scores for a list of crops, in the order given.
+        Uses the same formula as get_market_score; crops without data get a neutral 0.5.
+        days_ahead (a number or one value per crop) scores forecast harvest-time conditions.
+        """
+        year = self.resolve_market_year(month, year)
+        if days_ahead is not None and self.market_forecaster is not None:
+            price, demand, supply, profit = self.market_forecaster.forecast_at(crop_names, month, year, days_ahead)
+            scores = self._score_market_metrics(price, demand, supply, profit)
+            return np.where(np.isnan(scores), 0.5, scores)
         
-        return total_score
+        catalog_scores = self.get_market_scores(month, year)
+        positions = [self.crop_catalog.index_of(crop) for crop in crop_names]
+        return np.array([0.5 if i is None else catalog_scores[i] for i in positions], dtype=float)
 
-    def get_combined_score(self, crop, soil_params, month, year=2023):
+    def get_combined_score(self, crop, soil_params, month, year=None):
         """
         Calculate a combined score considering soil compatibility and market factors.
         Returns a score between 0 and 1.
@@ -218,21 +485,26 @@ class DataProcessor:
         
         return (soil_weight * soil_score) + (market_weight * market_score)
     
-    def get_top_recommendations(self, soil_params, month, year=2023, limit=5):
+    def get_top_recommendations(self, soil_params, month, year=None, limit=5):
         """
         Get the top crop recommendations based on soil and market factors.
         Returns a list of dictionaries with crop information and scores.
         """
-        season_crops = self.filter_crops_by_season(month)
-        if season_crops.empty:
+        season_crops = self.get_season_candidates(month)
+        if len(season_crops) == 0:
             return []
         
         recommendations = []
+        # Soil and market scores of the whole catalog for this month in one pass each
+        soil_scores = self.get_soil_compatibility_scores(soil_params)
+        market_scores = self.get_market_scores(month, year)
         
-        for _, crop in season_crops.iterrows():
-            combined_score = self.get_combined_score(crop, soil_params, month, year)
-            soil_score = self.get_soil_compatibility_score(crop, soil_params)
-            market_score = self.get_market_score(crop['crop_name'], month, year)
+        for i in season_crops:
+            crop = self.crop_catalog.records[i]
+            soil_score = soil_scores[i]
+            market_score = market_scores[i]
+            # Same 60/40 weighting as get_combined_score
+            combined_score = (0.6 * soil_score) + (0.4 * market_score)
             
             recommendations.append({
                 'crop_name': crop['crop_name'],
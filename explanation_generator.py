@@ -1,10 +1,35 @@
 import nltk
 from nltk.tokenize import word_tokenize
 import random
+import hashlib
+import threading
+from collections import OrderedDict
+from explanation_templates import (
+    MONTH_TO_SEASON, SEASON_MONTHS, SEASONAL_MATCH, SEASONAL_TEMPLATES,
+    SEASONAL_DEFAULT_TEMPLATE, ANNUAL_CROP_TEMPLATE, SOIL_QUALITY, SOIL_PARAMETER_TEMPLATES,
+    MARKET_OUTLOOK, MARKET_PRICE_TEMPLATE, MARKET_DEMAND, MARKET_SUPPLY, MARKET_PROFIT,
+    OVERALL_RECOMMENDATION, COMPREHENSIVE_TEMPLATE, COMPARISON_SECTION_TEMPLATE,
+    COMPARISON_SUMMARY, SOIL_PARAMETER_STEPS, format_display_name
+)
 
 class ExplanationGenerator:
-    def __init__(self):
-        """Initialize the explanation generator."""
+    def __init__(self, selection='relevance', cache_size=4096):
+        """
+        Initialize the explanation generator.
+        
+        Args:
+            selection: How soil parameter sentences are chosen when there are more than 3:
+                       'relevance' (most actionable first), 'seeded' (pseudo-random, seeded
+                       from the inputs) or 'random' (differs between calls, disables caching)
+            cache_size: Maximum number of comprehensive explanations to memoize, 0 to disable
+        """
+        if selection not in ('relevance', 'seeded', 'random'):
+            raise ValueError(f"Unknown selection mode: {selection}")
+        self.selection = selection
+        self.cache_size = cache_size
+        self._explanation_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         # Download necessary NLTK resources if needed
         try:
             nltk.data.find('tokenizers/punkt')
@@ -24,68 +49,32 @@ class ExplanationGenerator:
             String explanation
         """
         # Format crop name for display
-        display_name = crop_name.replace('_', ' ').capitalize()
-        
-        if soil_score >= 0.8:
-            quality = "excellent"
-            advice = "Your soil is very well-suited for this crop."
-        elif soil_score >= 0.6:
-            quality = "good"
-            advice = "Your soil is suitable for this crop with minor adjustments."
-        elif soil_score >= 0.4:
-            quality = "moderate"
-            advice = "Your soil can support this crop, but may need some amendments."
-        else:
-            quality = "poor"
-            advice = "Your soil will need significant amendments to support this crop well."
+        display_name = format_display_name(crop_name)
         
-        # Generate specific explanations for each soil parameter
-        param_explanations = []
+        quality, advice = SOIL_QUALITY.select(soil_score)
         
-        # Nitrogen explanation
-        if 'nitrogen' in soil_params:
-            if soil_params['nitrogen'] < 50:
-                param_explanations.append(f"The nitrogen level ({soil_params['nitrogen']}) is on the lower side. Consider adding nitrogen-rich fertilizers like urea or composted manure.")
-            elif soil_params['nitrogen'] < 100:
-                param_explanations.append(f"The nitrogen level ({soil_params['nitrogen']}) is adequate for many crops including {display_name}.")
-            else:
-                param_explanations.append(f"The nitrogen level ({soil_params['nitrogen']}) is quite high, which is beneficial for leafy crops but may cause excessive vegetative growth in some plants.")
-        
-        # Phosphorus explanation
-        if 'phosphorus' in soil_params:
-            if soil_params['phosphorus'] < 30:
-                param_explanations.append(f"The phosphorus level ({soil_params['phosphorus']}) is relatively low. Consider adding bone meal or rock phosphate to enhance flowering and root development.")
-            elif soil_params['phosphorus'] < 60:
-                param_explanations.append(f"The phosphorus level ({soil_params['phosphorus']}) is sufficient for most crops including {display_name}.")
-            else:
-                param_explanations.append(f"The phosphorus level ({soil_params['phosphorus']}) is high, which generally supports good root development and flowering.")
-        
-        # Potassium explanation
-        if 'potassium' in soil_params:
-            if soil_params['potassium'] < 30:
-                param_explanations.append(f"The potassium level ({soil_params['potassium']}) is on the lower side. Wood ash or potassium sulfate can increase levels to improve crop resilience.")
-            elif soil_params['potassium'] < 80:
-                param_explanations.append(f"The potassium level ({soil_params['potassium']}) is adequate for strong plant development and disease resistance.")
-            else:
-                param_explanations.append(f"The potassium level ({soil_params['potassium']}) is high, which helps with water regulation and overall crop quality.")
-        
-        # pH explanation
-        if 'ph' in soil_params:
-            if soil_params['ph'] < 5.5:
-                param_explanations.append(f"The soil pH ({soil_params['ph']}) is acidic. Most crops prefer a slightly acidic to neutral pH. Consider adding lime to raise the pH.")
-            elif soil_params['ph'] < 7.0:
-                param_explanations.append(f"The soil pH ({soil_params['ph']}) is slightly acidic to neutral, which is ideal for most crops including {display_name}.")
-            elif soil_params['ph'] < 8.0:
-                param_explanations.append(f"The soil pH ({soil_params['ph']}) is slightly alkaline. Many crops can still grow well, but monitor for nutrient availability.")
-            else:
-                param_explanations.append(f"The soil pH ({soil_params['ph']}) is alkaline. Consider adding sulfur or organic matter to lower the pH for better nutrient absorption.")
+        # Generate specific explanations for each soil parameter, with their relevance
+        param_explanations = []
+        relevance = []
+        for param, table, ideal_band in SOIL_PARAMETER_TEMPLATES:
+            if param in soil_params:
+                param_explanations.append(table.render(soil_params[param], display_name=display_name))
+                relevance.append(abs(table.band(soil_params[param]) - ideal_band))
         
         # Put it all together
         base_explanation = f"Your soil has {quality} compatibility with {display_name}. {advice}"
         
-        # Choose 2-3 parameter explanations randomly if there are more than 3
+        # Choose 3 parameter explanations if there are more than 3
         if len(param_explanations) > 3:
-            selected_explanations = random.sample(param_explanations, 3)
+            if self.selection == 'relevance':
+                # Keep the three most relevant sentences, in parameter order
+                ranked = sorted(range(len(param_explanations)), key=lambda i: -relevance[i])
+                selected_explanations = [param_explanations[i] for i in sorted(ranked[:3])]
+            elif self.selection == 'seeded':
+                rng = random.Random(self._input_seed(crop_name, soil_params, soil_score))
+                selected_explanations = rng.sample(param_explanations, 3)
+            else:
+                selected_explanations = random.sample(param_explanations, 3)
         else:
             selected_explanations = param_explanations
         
@@ -106,57 +95,23 @@ class ExplanationGenerator:
             String explanation
         """
         # Format crop name for display
-        display_name = crop_name.replace('_', ' ').capitalize()
-        
-        if market_score >= 0.8:
-            outlook = "excellent"
-            recommendation = "Current market conditions strongly favor this crop."
-        elif market_score >= 0.6:
-            outlook = "favorable"
-            recommendation = "Market conditions are generally good for this crop."
-        elif market_score >= 0.4:
-            outlook = "moderate"
-            recommendation = "Market conditions present a balanced opportunity with some risks."
-        else:
-            outlook = "challenging"
-            recommendation = "Market conditions may be difficult for this crop right now."
+        display_name = format_display_name(crop_name)
         
+        outlook, recommendation = MARKET_OUTLOOK.select(market_score)
         base_explanation = f"{display_name} has {outlook} market prospects. {recommendation}"
         
         # Add detailed explanation if market data is available
         if market_data:
             details = []
             
-            # Price analysis
             if 'price_per_kg' in market_data:
-                details.append(f"The current market price is approximately Rs. {market_data['price_per_kg']:.2f} per kg.")
-            
-            # Demand analysis
+                details.append(MARKET_PRICE_TEMPLATE.format(value=market_data['price_per_kg']))
             if 'demand_score' in market_data:
-                if market_data['demand_score'] >= 8:
-                    details.append(f"Demand is very high (score: {market_data['demand_score']}/10).")
-                elif market_data['demand_score'] >= 6:
-                    details.append(f"Demand is good (score: {market_data['demand_score']}/10).")
-                else:
-                    details.append(f"Demand is moderate to low (score: {market_data['demand_score']}/10).")
-            
-            # Supply analysis
+                details.append(MARKET_DEMAND.render(market_data['demand_score']))
             if 'supply_score' in market_data:
-                if market_data['supply_score'] <= 4:
-                    details.append(f"Supply is limited (score: {market_data['supply_score']}/10), which may support higher prices.")
-                elif market_data['supply_score'] <= 7:
-                    details.append(f"Supply is moderate (score: {market_data['supply_score']}/10), creating balanced market conditions.")
-                else:
-                    details.append(f"Supply is abundant (score: {market_data['supply_score']}/10), which may put pressure on prices.")
-            
-            # Profit analysis
+                details.append(MARKET_SUPPLY.render(market_data['supply_score']))
             if 'profit_potential' in market_data:
-                if market_data['profit_potential'] >= 8:
-                    details.append(f"The profit potential is excellent (score: {market_data['profit_potential']}/10).")
-                elif market_data['profit_potential'] >= 6:
-                    details.append(f"The profit potential is good (score: {market_data['profit_potential']}/10).")
-                else:
-                    details.append(f"The profit potential is moderate to low (score: {market_data['profit_potential']}/10).")
+                details.append(MARKET_PROFIT.render(market_data['profit_potential']))
             
             detailed_explanation = base_explanation + " " + " ".join(details)
             return detailed_explanation
@@ -176,61 +131,23 @@ class ExplanationGenerator:
             String explanation
         """
         # Format crop name for display
-        display_name = crop_name.replace('_', ' ').capitalize()
-        
-        # Month to season mapping
-        month_to_season = {
-            1: "winter", 2: "winter",  # January, February
-            3: "spring", 4: "spring", 5: "spring",  # March, April, May
-            6: "summer", 7: "summer", 8: "summer",  # June, July, August
-            9: "fall", 10: "fall", 11: "fall",  # September, October, November
-            12: "winter"  # December
-        }
-        
-        # Season to month mapping
-        season_months = {
-            'kharif': "June to September (monsoon season)",
-            'rabi': "October to March (winter season)",
-            'summer': "March to June (summer season)",
-            'annual': "year-round with proper management"
-        }
-        
-        current_season = month_to_season[month]
+        display_name = format_display_name(crop_name)
+        
+        current_season = MONTH_TO_SEASON[month]
         
         if season == 'annual':
-            return f"{display_name} is a year-round crop that can be grown in any season with proper care and management. It adapts well to different growing conditions throughout the year."
+            return ANNUAL_CROP_TEMPLATE.format(display_name=display_name)
         
-        seasonal_match = {
-            ('kharif', "summer"): "excellent time",
-            ('kharif', "fall"): "good time",
-            ('kharif', "winter"): "challenging time",
-            ('kharif', "spring"): "early but possible",
-            
-            ('rabi', "fall"): "excellent time",
-            ('rabi', "winter"): "good time",
-            ('rabi', "spring"): "late but possible",
-            ('rabi', "summer"): "challenging time",
-            
-            ('summer', "spring"): "excellent time",
-            ('summer', "summer"): "good time",
-            ('summer', "fall"): "challenging time",
-            ('summer', "winter"): "not recommended"
-        }
-        
-        match_quality = seasonal_match.get((season, current_season), "moderate time")
-        
-        if match_quality == "excellent time":
-            explanation = f"This is an {match_quality} to plant {display_name}. It is a {season} crop typically grown in {season_months[season]}, which aligns perfectly with the current {current_season} season."
-        elif match_quality == "good time":
-            explanation = f"This is a {match_quality} to plant {display_name}. As a {season} crop typically grown in {season_months[season]}, the current {current_season} season provides suitable conditions."
-        elif match_quality == "moderate time":
-            explanation = f"This is a {match_quality} to plant {display_name}. While it's a {season} crop typically grown in {season_months[season]}, it can adapt to the current {current_season} season with proper care."
-        elif match_quality == "challenging time":
-            explanation = f"This is a {match_quality} to plant {display_name}. It's primarily a {season} crop grown in {season_months[season]}, which doesn't align well with the current {current_season} season. Consider adjusting planting time or providing additional protection."
-        else:
-            explanation = f"This is {match_quality} to plant {display_name}. It's a {season} crop traditionally grown in {season_months[season]}. The current {current_season} season is not ideal for this crop."
+        match_quality = SEASONAL_MATCH.get((season, current_season), "moderate time")
+        template = SEASONAL_TEMPLATES.get(match_quality, SEASONAL_DEFAULT_TEMPLATE)
         
-        return explanation
+        return template.format(
+            match_quality=match_quality,
+            display_name=display_name,
+            season=season,
+            season_months=SEASON_MONTHS[season],
+            current_season=current_season
+        )
     
     def generate_comprehensive_explanation(self, crop_data, soil_params, market_data, month):
         """
@@ -245,40 +162,166 @@ class ExplanationGenerator:
         Returns:
             String explanation
         """
-        crop_name = crop_data['crop_name']
-        
-        # Individual explanations
-        soil_explanation = self.generate_soil_explanation(
-            crop_name, soil_params, crop_data.get('soil_score', 0.5))
+        return self._build_comprehensive_explanation(crop_data, soil_params, market_data, month, None)
+    
+    def generate_cached_comprehensive_explanation(self, crop_data, soil_params, market_data, month,
+                                                  market_version=None):
+        """
+        Memoized version of generate_comprehensive_explanation.
         
-        market_explanation = self.generate_market_explanation(
-            crop_name, crop_data.get('market_score', 0.5), market_data)
+        Soil parameters are quantized to SOIL_PARAMETER_STEPS before rendering, so profiles
+        that only differ below that resolution share one explanation.
         
-        seasonal_explanation = self.generate_seasonal_explanation(
-            crop_name, crop_data.get('season', 'annual'), month)
+        Args:
+            crop_data: Dict with crop information
+            soil_params: Dict with soil parameters
+            market_data: Dict with market metrics
+            month: Current month (1-12)
+            market_version: Optional version of the market data (e.g.
+                            MarketTrendAnalyzer.market_version); defaults to the market_data values
+            
+        Returns:
+            String explanation
+        """
+        soil_params = self.quantize_soil_params(soil_params)
+        if self.selection == 'random' or self.cache_size <= 0:
+            return self._build_comprehensive_explanation(crop_data, soil_params, market_data, month, None)
+        
+        key = self._explanation_key(crop_data, soil_params, market_data, month, market_version)
+        with self._cache_lock:
+            explanation = self._explanation_cache.get(key)
+            if explanation is not None:
+                self._explanation_cache.move_to_end(key)
+                return explanation
+        
+        explanation = self._build_comprehensive_explanation(crop_data, soil_params, market_data, month, None)
+        
+        with self._cache_lock:
+            self._explanation_cache[key] = explanation
+            while len(self._explanation_cache) > self.cache_size:
+                self._explanation_cache.popitem(last=False)
+        return explanation
+    
+    def explanation_etag(self, crop_data, soil_params, market_data, month, market_version=None):
+        """
+        Get a stable identifier of the cached explanation for these inputs, e.g. for an HTTP ETag.
         
-        # Overall recommendation
-        combined_score = crop_data.get('combined_score', 0.5)
+        Returns:
+            Hex digest string
+        """
+        key = self._explanation_key(crop_data, self.quantize_soil_params(soil_params),
+                                    market_data, month, market_version)
+        return hashlib.sha1(repr((self.selection, key)).encode('utf-8')).hexdigest()
+    
+    def clear_cache(self):
+        """Remove all memoized explanations."""
+        with self._cache_lock:
+            self._explanation_cache.clear()
+    
+    def quantize_soil_params(self, soil_params):
+        """Round soil parameters to the resolution in SOIL_PARAMETER_STEPS."""
+        quantized = {}
+        for param, value in soil_params.items():
+            step = SOIL_PARAMETER_STEPS.get(param)
+            if step is None:
+                quantized[param] = value
+            elif isinstance(step, int):
+                quantized[param] = int(round(value / step)) * step
+            else:
+                quantized[param] = round(round(value / step) * step, 6)
+        return quantized
+    
+    def _explanation_key(self, crop_data, soil_params, market_data, month, market_version):
+        """Build the memoization key for a comprehensive explanation."""
+        if market_version is None:
+            market_version = tuple(sorted(market_data.items())) if market_data else None
+        return (
+            crop_data['crop_name'],
+            crop_data.get('season', 'annual'),
+            float(crop_data.get('soil_score', 0.5)),
+            float(crop_data.get('market_score', 0.5)),
+            float(crop_data.get('combined_score', 0.5)),
+            tuple(sorted(soil_params.items())),
+            market_version,
+            month
+        )
+    
+    def _input_seed(self, crop_name, soil_params, soil_score):
+        """Derive a stable random seed from the inputs of a soil explanation."""
+        values = []
+        for param, value in sorted(soil_params.items()):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                pass
+            values.append((param, value))
+        digest = hashlib.sha256(repr((crop_name, values, float(soil_score))).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+    
+    def generate_comprehensive_explanations(self, requests):
+        """
+        Generate comprehensive explanations for many crops and soil profiles at once.
         
-        if combined_score >= 0.8:
-            recommendation = f"{crop_name.replace('_', ' ').capitalize()} is highly recommended for your current conditions."
-        elif combined_score >= 0.6:
-            recommendation = f"{crop_name.replace('_', ' ').capitalize()} is a good choice for your current conditions."
-        elif combined_score >= 0.4:
-            recommendation = f"{crop_name.replace('_', ' ').capitalize()} is a reasonable option but will require some additional management."
-        else:
-            recommendation = f"{crop_name.replace('_', ' ').capitalize()} may be challenging to grow under your current conditions."
+        Sections that are identical across requests (same crop, scores, soil profile
+        and month) are rendered only once per batch.
         
-        # Combine everything
-        sections = [
-            f"## Recommendation: {recommendation}",
-            f"### Soil Compatibility\n{soil_explanation}",
-            f"### Market Outlook\n{market_explanation}",
-            f"### Seasonal Timing\n{seasonal_explanation}",
-            f"### Overall Assessment\nBased on combined soil, market, and seasonal factors, this crop has a compatibility score of {combined_score:.2f} out of 1.0."
+        Args:
+            requests: Iterable of dicts with keys 'crop_data', 'soil_params',
+                      'market_data' and 'month' (the generate_comprehensive_explanation arguments)
+            
+        Returns:
+            List of string explanations in request order
+        """
+        section_cache = {}
+        return [
+            self._build_comprehensive_explanation(
+                request['crop_data'], request['soil_params'],
+                request.get('market_data'), request['month'], section_cache)
+            for request in requests
         ]
+    
+    def _build_comprehensive_explanation(self, crop_data, soil_params, market_data, month, section_cache):
+        """Render a comprehensive explanation, reusing market and seasonal sections from section_cache if given."""
+        crop_name = crop_data['crop_name']
+        market_score = crop_data.get('market_score', 0.5)
+        season = crop_data.get('season', 'annual')
         
-        return "\n\n".join(sections)
+        # Individual explanations
+        soil_score = crop_data.get('soil_score', 0.5)
+        if section_cache is None or self.selection == 'random':
+            soil_explanation = self.generate_soil_explanation(crop_name, soil_params, soil_score)
+        else:
+            soil_key = ('soil', crop_name, soil_score, tuple(sorted(soil_params.items())))
+            if soil_key not in section_cache:
+                section_cache[soil_key] = self.generate_soil_explanation(crop_name, soil_params, soil_score)
+            soil_explanation = section_cache[soil_key]
+        
+        if section_cache is None:
+            market_explanation = self.generate_market_explanation(crop_name, market_score, market_data)
+            seasonal_explanation = self.generate_seasonal_explanation(crop_name, season, month)
+        else:
+            market_key = ('market', crop_name, market_score,
+                          tuple(sorted(market_data.items())) if market_data else None)
+            if market_key not in section_cache:
+                section_cache[market_key] = self.generate_market_explanation(crop_name, market_score, market_data)
+            market_explanation = section_cache[market_key]
+            
+            seasonal_key = ('seasonal', crop_name, season, month)
+            if seasonal_key not in section_cache:
+                section_cache[seasonal_key] = self.generate_seasonal_explanation(crop_name, season, month)
+            seasonal_explanation = section_cache[seasonal_key]
+        
+        # Overall recommendation
+        combined_score = crop_data.get('combined_score', 0.5)
+        recommendation = OVERALL_RECOMMENDATION.render(combined_score, display_name=format_display_name(crop_name))
+        
+        return COMPREHENSIVE_TEMPLATE.format(
+            recommendation=recommendation,
+            soil_explanation=soil_explanation,
+            market_explanation=market_explanation,
+            seasonal_explanation=seasonal_explanation,
+            combined_score=combined_score
+        )
     
     def generate_comparison_explanation(self, crop_recommendations, soil_params, month):
         """
@@ -309,27 +352,22 @@ class ExplanationGenerator:
         crop_sections = []
         
         for i, crop in enumerate(sorted_recommendations[:3], 1):  # Top 3 crops
-            crop_name = crop['crop_name'].replace('_', ' ').capitalize()
+            display_name = format_display_name(crop['crop_name'])
             combined_score = crop.get('combined_score', 0) * 100  # Convert to percentage
-            soil_score = crop.get('soil_score', 0) * 100
-            market_score = crop.get('market_score', 0) * 100
             
-            section = f"### {i}. {crop_name} (Overall: {combined_score:.0f}%)\n"
-            section += f"- Soil compatibility: {soil_score:.0f}%\n"
-            section += f"- Market potential: {market_score:.0f}%\n"
-            
-            # Add a brief explanation
-            if combined_score >= 75:
-                section += f"- {crop_name} is an excellent choice based on your soil conditions and current market trends.\n"
-            elif combined_score >= 60:
-                section += f"- {crop_name} is a good option that balances soil suitability with market potential.\n"
-            else:
-                section += f"- {crop_name} is a viable option but may require additional management attention.\n"
+            section = COMPARISON_SECTION_TEMPLATE.format(
+                rank=i,
+                display_name=display_name,
+                combined_score=combined_score,
+                soil_score=crop.get('soil_score', 0) * 100,
+                market_score=crop.get('market_score', 0) * 100
+            )
+            section += COMPARISON_SUMMARY.render(combined_score, display_name=display_name)
             
             crop_sections.append(section)
         
         # Conclusion
-        top_crop = sorted_recommendations[0]['crop_name'].replace('_', ' ').capitalize()
+        top_crop = format_display_name(sorted_recommendations[0]['crop_name'])
         conclusion = f"Based on the analysis, **{top_crop}** emerges as the most suitable crop for your specific conditions, but any of the top recommendations would be reasonable choices depending on your preferences and resources."
         
         # Combine everything
@@ -0,0 +1,211 @@
+from bisect import bisect_left, bisect_right
+
+class BandTable:
+    def __init__(self, thresholds, entries, inclusive=True):
+        """
+        Map a numeric value to one of several entries by threshold band.
+
+        Args:
+            thresholds: Ascending list of band boundaries
+            entries: One entry per band (len(thresholds) + 1), lowest band first
+            inclusive: If True a value equal to a boundary falls in the upper band (value >= t),
+                       otherwise in the lower band (value > t is required to move up)
+        """
+        if len(entries) != len(thresholds) + 1:
+            raise ValueError("BandTable needs exactly one more entry than thresholds")
+        self.thresholds = list(thresholds)
+        self.entries = tuple(entries)
+        self._bisect = bisect_right if inclusive else bisect_left
+
+    def band(self, value):
+        """Get the band index of a value."""
+        return self._bisect(self.thresholds, value)
+
+    def select(self, value):
+        """Get the entry for the band a value falls in."""
+        return self.entries[self._bisect(self.thresholds, value)]
+
+    def render(self, value, **fields):
+        """Fill in the template string of the band a value falls in; the value is available as {value}."""
+        fields['value'] = value
+        return self.entries[self._bisect(self.thresholds, value)].format_map(fields)
+
+
+# Calendar month to meteorological season
+MONTH_TO_SEASON = {
+    1: "winter", 2: "winter",  # January, February
+    3: "spring", 4: "spring", 5: "spring",  # March, April, May
+    6: "summer", 7: "summer", 8: "summer",  # June, July, August
+    9: "fall", 10: "fall", 11: "fall",  # September, October, November
+    12: "winter"  # December
+}
+
+# Growing season to typical planting months
+SEASON_MONTHS = {
+    'kharif': "June to September (monsoon season)",
+    'rabi': "October to March (winter season)",
+    'summer': "March to June (summer season)",
+    'annual': "year-round with proper management"
+}
+
+# (growing season, current season) to how good a time it is to plant
+SEASONAL_MATCH = {
+    ('kharif', "summer"): "excellent time",
+    ('kharif', "fall"): "good time",
+    ('kharif', "winter"): "challenging time",
+    ('kharif', "spring"): "early but possible",
+
+    ('rabi', "fall"): "excellent time",
+    ('rabi', "winter"): "good time",
+    ('rabi', "spring"): "late but possible",
+    ('rabi', "summer"): "challenging time",
+
+    ('summer', "spring"): "excellent time",
+    ('summer', "summer"): "good time",
+    ('summer', "fall"): "challenging time",
+    ('summer', "winter"): "not recommended"
+}
+
+# Seasonal explanation template for each match quality; other qualities use SEASONAL_DEFAULT_TEMPLATE
+SEASONAL_TEMPLATES = {
+    "excellent time": "This is an {match_quality} to plant {display_name}. It is a {season} crop typically grown in {season_months}, which aligns perfectly with the current {current_season} season.",
+    "good time": "This is a {match_quality} to plant {display_name}. As a {season} crop typically grown in {season_months}, the current {current_season} season provides suitable conditions.",
+    "moderate time": "This is a {match_quality} to plant {display_name}. While it's a {season} crop typically grown in {season_months}, it can adapt to the current {current_season} season with proper care.",
+    "challenging time": "This is a {match_quality} to plant {display_name}. It's primarily a {season} crop grown in {season_months}, which doesn't align well with the current {current_season} season. Consider adjusting planting time or providing additional protection."
+}
+SEASONAL_DEFAULT_TEMPLATE = "This is {match_quality} to plant {display_name}. It's a {season} crop traditionally grown in {season_months}. The current {current_season} season is not ideal for this crop."
+ANNUAL_CROP_TEMPLATE = "{display_name} is a year-round crop that can be grown in any season with proper care and management. It adapts well to different growing conditions throughout the year."
+
+# Soil compatibility: (quality, advice) by soil score
+SOIL_QUALITY = BandTable([0.4, 0.6, 0.8], [
+    ("poor", "Your soil will need significant amendments to support this crop well."),
+    ("moderate", "Your soil can support this crop, but may need some amendments."),
+    ("good", "Your soil is suitable for this crop with minor adjustments."),
+    ("excellent", "Your soil is very well-suited for this crop.")
+])
+
+# Soil parameter sentences, in the order they are listed in an explanation.
+# Each entry is (parameter, band table, index of the band that needs no action);
+# sentences further from that band are more relevant to the farmer.
+SOIL_PARAMETER_TEMPLATES = [
+    ('nitrogen', BandTable([50, 100], [
+        "The nitrogen level ({value}) is on the lower side. Consider adding nitrogen-rich fertilizers like urea or composted manure.",
+        "The nitrogen level ({value}) is adequate for many crops including {display_name}.",
+        "The nitrogen level ({value}) is quite high, which is beneficial for leafy crops but may cause excessive vegetative growth in some plants."
+    ]), 1),
+    ('phosphorus', BandTable([30, 60], [
+        "The phosphorus level ({value}) is relatively low. Consider adding bone meal or rock phosphate to enhance flowering and root development.",
+        "The phosphorus level ({value}) is sufficient for most crops including {display_name}.",
+        "The phosphorus level ({value}) is high, which generally supports good root development and flowering."
+    ]), 1),
+    ('potassium', BandTable([30, 80], [
+        "The potassium level ({value}) is on the lower side. Wood ash or potassium sulfate can increase levels to improve crop resilience.",
+        "The potassium level ({value}) is adequate for strong plant development and disease resistance.",
+        "The potassium level ({value}) is high, which helps with water regulation and overall crop quality."
+    ]), 1),
+    ('ph', BandTable([5.5, 7.0, 8.0], [
+        "The soil pH ({value}) is acidic. Most crops prefer a slightly acidic to neutral pH. Consider adding lime to raise the pH.",
+        "The soil pH ({value}) is slightly acidic to neutral, which is ideal for most crops including {display_name}.",
+        "The soil pH ({value}) is slightly alkaline. Many crops can still grow well, but monitor for nutrient availability.",
+        "The soil pH ({value}) is alkaline. Consider adding sulfur or organic matter to lower the pH for better nutrient absorption."
+    ]), 1)
+]
+
+# Resolution used to quantize soil parameters for explanation caching (matches the app sliders)
+SOIL_PARAMETER_STEPS = {
+    'nitrogen': 1,
+    'phosphorus': 1,
+    'potassium': 1,
+    'ph': 0.1,
+    'temperature': 1,
+    'humidity': 1,
+    'rainfall': 1,
+    'month': 1
+}
+
+# Market outlook: (outlook, recommendation) by market score
+MARKET_OUTLOOK = BandTable([0.4, 0.6, 0.8], [
+    ("challenging", "Market conditions may be difficult for this crop right now."),
+    ("moderate", "Market conditions present a balanced opportunity with some risks."),
+    ("favorable", "Market conditions are generally good for this crop."),
+    ("excellent", "Current market conditions strongly favor this crop.")
+])
+MARKET_PRICE_TEMPLATE = "The current market price is approximately Rs. {value:.2f} per kg."
+MARKET_DEMAND = BandTable([6, 8], [
+    "Demand is moderate to low (score: {value}/10).",
+    "Demand is good (score: {value}/10).",
+    "Demand is very high (score: {value}/10)."
+])
+MARKET_SUPPLY = BandTable([4, 7], [
+    "Supply is limited (score: {value}/10), which may support higher prices.",
+    "Supply is moderate (score: {value}/10), creating balanced market conditions.",
+    "Supply is abundant (score: {value}/10), which may put pressure on prices."
+], inclusive=False)
+MARKET_PROFIT = BandTable([6, 8], [
+    "The profit potential is moderate to low (score: {value}/10).",
+    "The profit potential is good (score: {value}/10).",
+    "The profit potential is excellent (score: {value}/10)."
+])
+
+# Overall recommendation by combined score
+OVERALL_RECOMMENDATION = BandTable([0.4, 0.6, 0.8], [
+    "{display_name} may be challenging to grow under your current conditions.",
+    "{display_name} is a reasonable option but will require some additional management.",
+    "{display_name} is a good choice for your current conditions.",
+    "{display_name} is highly recommended for your current conditions."
+])
+COMPREHENSIVE_TEMPLATE = (
+    "## Recommendation: {recommendation}\n\n"
+    "### Soil Compatibility\n{soil_explanation}\n\n"
+    "### Market Outlook\n{market_explanation}\n\n"
+    "### Seasonal Timing\n{seasonal_explanation}\n\n"
+    "### Overall Assessment\nBased on combined soil, market, and seasonal factors, this crop has a compatibility score of {combined_score:.2f} out of 1.0."
+)
+
+# Crop comparison: brief explanation by combined score percentage
+COMPARISON_SECTION_TEMPLATE = (
+    "### {rank}. {display_name} (Overall: {combined_score:.0f}%)\n"
+    "- Soil compatibility: {soil_score:.0f}%\n"
+    "- Market potential: {market_score:.0f}%\n"
+)
+COMPARISON_SUMMARY = BandTable([60, 75], [
+    "- {display_name} is a viable option but may require additional management attention.\n",
+    "- {display_name} is a good option that balances soil suitability with market potential.\n",
+    "- {display_name} is an excellent choice based on your soil conditions and current market trends.\n"
+])
+
+# Market trend explanation (MarketTrendAnalyzer.explain_market_trends)
+TREND_PRICE_LEVEL = BandTable([50, 100], [
+    "{display_name} currently has a relatively low market price of Rs. {value:.2f} per kg.",
+    "{display_name} currently has a moderate market price of Rs. {value:.2f} per kg.",
+    "{display_name} currently has a high market price of Rs. {value:.2f} per kg."
+], inclusive=False)
+TREND_PRICE_CHANGE = BandTable([-10, 0, 10], [
+    "The price has decreased significantly by {abs_value:.1f}% compared to last month.",
+    "The price has slightly decreased by {abs_value:.1f}% compared to last month.",
+    "The price has slightly increased by {value:.1f}% compared to last month.",
+    "The price has increased significantly by {value:.1f}% compared to last month."
+], inclusive=False)
+TREND_DEMAND = BandTable([6, 8], [
+    "The market demand for {display_name} is moderate to low (score: {value}/10).",
+    "There is good market demand for {display_name} (score: {value}/10).",
+    "There is very high market demand for {display_name} (score: {value}/10)."
+])
+TREND_SUPPLY = BandTable([6, 8], [
+    "The market supply for {display_name} is limited (score: {value}/10), which may keep prices higher.",
+    "The market has adequate supply of {display_name} (score: {value}/10).",
+    "The market has abundant supply of {display_name} (score: {value}/10)."
+])
+TREND_PROFIT = BandTable([6, 8], [
+    "{display_name} has moderate to low profit potential this season (score: {value}/10).",
+    "{display_name} has good profit potential this season (score: {value}/10).",
+    "{display_name} has excellent profit potential this season (score: {value}/10)."
+])
+TREND_CONCLUSION_FAVORABLE = "Overall, market conditions favor growing {display_name} this season due to favorable demand-supply dynamics."
+TREND_CONCLUSION_CAUTION = "Overall, market conditions suggest caution when growing {display_name} this season due to high supply relative to demand."
+TREND_CONCLUSION_BALANCED = "Overall, {display_name} presents a balanced market opportunity with moderate risk and returns."
+
+
+def format_display_name(crop_name):
+    """Format a crop name for display in explanations (e.g. 'bell_pepper' -> 'Bell pepper')."""
+    return crop_name.replace('_', ' ').capitalize()
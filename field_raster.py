@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from data_processor import DataProcessor
+from crop_recommendation_model import CropRecommendationModel
+from model_registry import load_or_train
+from recommendation_engine import HybridRankingEngine
+
+# Best-crop value of cells without a usable recommendation (nodata or nothing in season)
+NODATA_CROP = -1
+
+
+def load_layer(layer):
+    """
+    Open a raster layer without reading it into memory.
+
+    Args:
+        layer: 2-D array, path to a .npy file (memory-mapped read-only) or a scalar
+               applied to every cell
+
+    Returns:
+        Array-like layer or scalar
+    """
+    if isinstance(layer, (str, os.PathLike)):
+        return np.load(layer, mmap_mode='r')
+    return layer
+
+
+class FieldRasterScorer:
+    def __init__(self, engine, tile_size=256):
+        """
+        Score gridded soil maps cell by cell, one tile at a time.
+
+        Each parameter is a 2-D raster (or a scalar for the whole field); only one tile of
+        every layer and of the per-crop scores is in memory at once, so memory-mapped
+        layers and outputs can be larger than RAM.
+
+        Args:
+            engine: HybridRankingEngine providing rule scoring, market scores, the ML model
+                    and the fusion strategy
+            tile_size: Tile height and width in cells
+        """
+        self.engine = engine
+        self.data_processor = engine.data_processor
+        self.crop_names = engine.crop_names
+        self.tile_size = tile_size
+
+    def tiles(self, shape):
+        """Yield (row slice, column slice) tiles covering a raster of the given shape."""
+        height, width = shape
+        for row in range(0, height, self.tile_size):
+            for col in range(0, width, self.tile_size):
+                yield slice(row, min(row + self.tile_size, height)), slice(col, min(col + self.tile_size, width))
+
+    def score(self, layers, month, year=None, output_dir=None, season_only=True, use_ml=True,
+              keep_scores=False):
+        """
+        Find the best crop and its score for every cell of a field raster.
+
+        Args:
+            layers: Dict of soil parameter name to a 2-D array, .npy path or scalar; nitrogen,
+                    phosphorus, potassium and ph are required, NaN marks nodata cells
+            month: Planting month (1-12)
+            year: Market year, defaults to the latest year with market data for the month
+            output_dir: If given, outputs are written as memory-mapped .npy files there
+                        (with crop_names.json as the legend for best_crop)
+            season_only: Only consider crops that can be planted in the month
+            use_ml: Fuse ML probabilities with the rule scores; every model feature other
+                    than month must then be a layer
+            keep_scores: Also output the combined score of every crop, (height, width, n_crops)
+
+        Returns:
+            Dict with best_crop (int16 catalog positions, NODATA_CROP where none), best_score,
+            soil_score and market_score of the best crop (float32, NaN where none), optionally
+            crop_scores, and crop_names
+        """
+        layers = {param: load_layer(layer) for param, layer in layers.items()
+                  if param in self.data_processor.soil_params_range}
+        missing = [param for param in ['nitrogen', 'phosphorus', 'potassium', 'ph'] if param not in layers]
+        if missing:
+            raise ValueError(f"Missing required layers: {missing}")
+        shapes = {np.shape(layer) for layer in layers.values() if np.ndim(layer)}
+        if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+            raise ValueError("Layers must be 2-D rasters of one shape (or scalars)")
+        shape = shapes.pop()
+
+        crop_model = self.engine.crop_model
+        if use_ml:
+            missing = [feature for feature in crop_model.features if feature != 'month' and feature not in layers]
+            if missing:
+                raise ValueError(f"Missing layers for the ML model: {missing}")
+
+        n_crops = len(self.crop_names)
+        outputs = {
+            'best_crop': self._allocate(output_dir, 'best_crop', shape, np.int16),
+            'best_score': self._allocate(output_dir, 'best_score', shape, np.float32),
+            'soil_score': self._allocate(output_dir, 'soil_score', shape, np.float32),
+            'market_score': self._allocate(output_dir, 'market_score', shape, np.float32)
+        }
+        if keep_scores:
+            outputs['crop_scores'] = self._allocate(output_dir, 'crop_scores', shape + (n_crops,), np.float32)
+
+        # Market scores and the season mask are the same for every cell
+        market_scores = self.engine.market_index.lookup(month, self.data_processor.resolve_market_year(month, year))
+        in_season = self.engine.season_masks[month] if season_only else np.ones(n_crops, dtype=bool)
+
+        for rows, cols in self.tiles(shape):
+            tile = {param: self._tile(layer, rows, cols) for param, layer in layers.items()}
+            tile_shape = (rows.stop - rows.start, cols.stop - cols.start)
+            soil_scores = self.data_processor.get_soil_compatibility_array(tile).reshape(-1, n_crops)
+            # Same 60/40 weighting as DataProcessor.get_combined_score
+            combined = 0.6 * soil_scores + 0.4 * market_scores
+
+            nodata = np.zeros(tile_shape, dtype=bool)
+            for param in ['nitrogen', 'phosphorus', 'potassium', 'ph']:
+                nodata |= np.isnan(np.broadcast_to(tile[param], tile_shape))
+            nodata = nodata.ravel()
+
+            if use_ml:
+                # Cells with a missing model feature are ranked on their rule score alone
+                features = {feature: np.broadcast_to(tile[feature], tile_shape).ravel()
+                            for feature in crop_model.features if feature != 'month'}
+                features['month'] = np.full(nodata.shape, month)
+                features = pd.DataFrame(features)[crop_model.features]
+                complete = ~features.isna().to_numpy().any(axis=1)
+                if complete.any():
+                    ml_scores = crop_model.predict_probabilities_batch(features[complete], self.crop_names)
+                    combined[complete] = self.engine.fusion_strategy.fuse(ml_scores, combined[complete])
+
+            candidates = np.where(in_season, combined, -np.inf)
+            best = np.argmax(candidates, axis=1)
+            cells = np.arange(len(best))
+            best_score = candidates[cells, best]
+            valid = ~nodata & ~np.isneginf(best_score)
+
+            outputs['best_crop'][rows, cols] = np.where(valid, best, NODATA_CROP).reshape(tile_shape)
+            outputs['best_score'][rows, cols] = np.where(valid, best_score, np.nan).reshape(tile_shape)
+            outputs['soil_score'][rows, cols] = np.where(valid, soil_scores[cells, best], np.nan).reshape(tile_shape)
+            outputs['market_score'][rows, cols] = np.where(valid, market_scores[best], np.nan).reshape(tile_shape)
+            if keep_scores:
+                outputs['crop_scores'][rows, cols] = np.where(nodata[:, None], np.nan, combined).reshape(tile_shape + (n_crops,))
+
+        if output_dir is not None:
+            for array in outputs.values():
+                array.flush()
+            with open(os.path.join(output_dir, 'crop_names.json'), 'w', encoding='utf-8') as f:
+                json.dump([str(name) for name in self.crop_names], f)
+        outputs['crop_names'] = list(self.crop_names)
+        return outputs
+
+    @staticmethod
+    def _tile(layer, rows, cols):
+        """Read one tile of a layer as float, leaving scalars as they are."""
+        if np.ndim(layer) == 0:
+            return float(layer)
+        return np.asarray(layer[rows, cols], dtype=float)
+
+    @staticmethod
+    def _allocate(output_dir, name, shape, dtype):
+        """Create an output raster, memory-mapped to output_dir/<name>.npy if a directory is given."""
+        fill = NODATA_CROP if np.issubdtype(dtype, np.integer) else np.nan
+        if output_dir is None:
+            return np.full(shape, fill, dtype=dtype)
+        os.makedirs(output_dir, exist_ok=True)
+        array = np.lib.format.open_memmap(os.path.join(output_dir, f'{name}.npy'), mode='w+',
+                                          dtype=dtype, shape=shape)
+        return array
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recommend the best crop for every cell of gridded soil maps.")
+    parser.add_argument('output', help="Output directory for the .npy rasters")
+    parser.add_argument('--layer', action='append', default=[], metavar='PARAM=FILE.npy',
+                        help="Raster for a soil parameter, repeatable (nitrogen, phosphorus, potassium "
+                             "and ph are required); PARAM=VALUE sets a constant for the whole field")
+    parser.add_argument('--month', type=int, required=True, help="Planting month (1-12)")
+    parser.add_argument('--year', type=int, default=None,
+                        help="Market year (default: latest year with data for the month)")
+    parser.add_argument('--tile-size', type=int, default=256, help="Tile height and width in cells (default: 256)")
+    parser.add_argument('--keep-scores', action='store_true', help="Also write every crop's score per cell")
+    parser.add_argument('--models', default='models',
+                        help="Model registry directory; its active model is used, or one is trained "
+                             "and registered if it is empty (default: models)")
+    parser.add_argument('--no-ml', action='store_true', help="Use rule-based scores only")
+    parser.add_argument('--all-seasons', action='store_true', help="Also recommend out-of-season crops")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    layers = {}
+    for spec in args.layer:
+        param, _, value = spec.partition('=')
+        try:
+            layers[param] = float(value)
+        except ValueError:
+            layers[param] = value
+
+    data_processor = DataProcessor()
+    # Rule-based runs never call the model, so they skip loading it
+    crop_model = CropRecommendationModel() if args.no_ml else load_or_train(args.models)[0]
+
+    scorer = FieldRasterScorer(HybridRankingEngine(data_processor, crop_model), tile_size=args.tile_size)
+    result = scorer.score(layers, args.month, year=args.year, output_dir=args.output,
+                          season_only=not args.all_seasons, use_ml=not args.no_ml,
+                          keep_scores=args.keep_scores)
+    cells = result['best_crop'].size
+    print(f"Raster complete: {cells} cells, {int((result['best_crop'] >= 0).sum())} with a recommendation, "
+          f"written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+MARKET_METRICS = ['price_per_kg', 'demand_score', 'supply_score', 'profit_potential']
+FORECAST_METHODS = ('seasonal_naive', 'exponential_smoothing', 'ar1', 'auto')
+
+
+def period_of(month, year):
+    """Continuous monthly period number (months since year 0)."""
+    return year * 12 + (month - 1)
+
+
+def month_year_of(period):
+    """Inverse of period_of, returns (month, year)."""
+    return period % 12 + 1, period // 12
+
+
+class MarketForecaster:
+    def __init__(self, method='auto', alphas=None):
+        """
+        Initialize the market forecaster.
+
+        Forecasts every market metric of every crop with lightweight models fitted on all
+        series at once: seasonal naive, simple exponential smoothing and AR(1).
+
+        Args:
+            method: One of FORECAST_METHODS; 'auto' picks, per series, the method with the
+                    lowest in-sample one-step-ahead error
+            alphas: Smoothing factors tried when fitting exponential smoothing
+        """
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"Unknown forecast method: {method}")
+        self.method = method
+        self.alphas = np.asarray(alphas if alphas is not None else np.linspace(0.1, 0.9, 9))
+        self.crop_names = None
+        self.first_period = None
+        self.values = None  # (n_metrics, n_crops, n_periods), NaN where missing
+        self.params = None
+        self._fit_cache = {}
+        self._crop_index = {}
+
+    def fit(self, market_data):
+        """
+        Fit all models on a market DataFrame. Fits are cached by a fingerprint of the data,
+        so calling fit again with unchanged data is free.
+
+        Args:
+            market_data: DataFrame with crop_name, month, year and the MARKET_METRICS columns
+
+        Returns:
+            self
+        """
+        crop_names, first_period, values = self._to_array(market_data)
+        self.crop_names = crop_names
+        self.first_period = first_period
+        self.values = values
+        self._crop_index = {crop: i for i, crop in enumerate(crop_names)}
+
+        fingerprint = self._fingerprint()
+        if fingerprint not in self._fit_cache:
+            self._fit_cache[fingerprint] = self._fit_params(values)
+        self.params = self._fit_cache[fingerprint]
+        return self
+
+    def update(self, new_market_data):
+        """
+        Add new market observations and update the fitted models incrementally.
+
+        Smoothing levels and AR statistics are advanced over the new periods only; the
+        smoothing factors and the method choice are kept until the next full fit().
+
+        Args:
+            new_market_data: DataFrame with the same columns as for fit(), normally for
+                             periods after the last fitted period. Rows inside the fitted
+                             range overwrite the stored values, which the models pick up at
+                             the next fit(); rows before the first fitted period (backfilled
+                             history) trigger a full refit
+
+        Returns:
+            self
+        """
+        if self.values is None:
+            return self.fit(new_market_data)
+
+        last_period = self.first_period + self.values.shape[2] - 1
+        periods = period_of(new_market_data['month'].to_numpy(dtype=int), new_market_data['year'].to_numpy(dtype=int))
+        new_crops = [c for c in pd.unique(new_market_data['crop_name']) if c not in self._crop_index]
+        if new_crops or periods.min() < self.first_period:
+            # New crops need their own parameters and backfilled periods shift the whole
+            # series, so fall back to a full fit
+            return self.fit(pd.concat([self.to_frame(), new_market_data], ignore_index=True))
+
+        n_new = max(0, int(periods.max()) - last_period)
+        if n_new:
+            padding = np.full(self.values.shape[:2] + (n_new,), np.nan)
+            self.values = np.concatenate([self.values, padding], axis=2)
+
+        crop_positions = np.array([self._crop_index[c] for c in new_market_data['crop_name']])
+        offsets = periods - self.first_period
+        for m, metric in enumerate(MARKET_METRICS):
+            self.values[m, crop_positions, offsets] = new_market_data[metric].to_numpy(dtype=float)
+
+        # Advance the models over the new periods only
+        params = dict(self.params)
+        for t in range(self.values.shape[2] - n_new, self.values.shape[2]):
+            self._advance(params, self.values[:, :, t])
+        self.params = params
+        self._fit_cache[self._fingerprint()] = params
+        return self
+
+    def forecast(self, horizon):
+        """
+        Forecast every metric of every crop a number of months after the last observed period.
+
+        Args:
+            horizon: Months ahead (>= 1), an int or an array broadcastable to (n_metrics, n_crops)
+
+        Returns:
+            Array of shape (n_metrics, n_crops)
+        """
+        horizon = np.maximum(np.asarray(horizon), 1)
+        forecasts = {
+            'seasonal_naive': self._seasonal_naive_forecast(horizon),
+            'exponential_smoothing': self.params['level'],
+            'ar1': self._ar1_forecast(horizon)
+        }
+        choice = self.params['choice']
+        result = np.where(choice == 0, forecasts['seasonal_naive'],
+                          np.where(choice == 1, forecasts['exponential_smoothing'], forecasts['ar1']))
+        # Series without any data stay NaN
+        return np.where(np.isnan(self.params['last_value']), np.nan, result)
+
+    def forecast_period(self, month, year):
+        """
+        Forecast all metrics of all crops for a calendar month.
+
+        Returns:
+            Array of shape (n_metrics, n_crops); observed values are returned as-is for
+            periods inside the data
+        """
+        target = period_of(month, year)
+        offset = target - self.first_period
+        if 0 <= offset < self.values.shape[2]:
+            observed = self.values[:, :, offset]
+            if not np.isnan(observed).all():
+                return observed
+        return self.forecast(target - (self.first_period + self.values.shape[2] - 1))
+
+    def forecast_at(self, crop_names, month, year, days_ahead=0):
+        """
+        Forecast the market metrics of many crops some days after a planting month.
+
+        Args:
+            crop_names: Sequence of crop names
+            month: Planting month (1-12)
+            year: Planting year
+            days_ahead: Days after planting, a number or one value per crop (e.g. growing_days)
+
+        Returns:
+            Array of shape (n_metrics, len(crop_names)); NaN for crops without market data
+        """
+        positions = np.array([self._crop_index.get(crop, -1) for crop in crop_names], dtype=int)
+        targets = period_of(month, year) + np.rint(np.broadcast_to(np.asarray(days_ahead, dtype=float), positions.shape) / 30.4).astype(int)
+
+        result = np.full((len(MARKET_METRICS), len(positions)), np.nan)
+        known = positions >= 0
+        # Crops usually share only a handful of harvest months
+        for target in np.unique(targets[known]):
+            columns = known & (targets == target)
+            result[:, columns] = self.forecast_period(*month_year_of(int(target)))[:, positions[columns]]
+        return result
+
+    def forecast_metrics(self, crop_name, month, year, days_ahead=0):
+        """
+        Forecast the market metrics of a crop some days after a planting month, e.g. at harvest.
+
+        Args:
+            crop_name: Name of the crop
+            month: Planting month (1-12)
+            year: Planting year
+            days_ahead: Days after planting (e.g. the crop's growing_days)
+
+        Returns:
+            Dict with the MARKET_METRICS keys, or None if the crop has no market data
+        """
+        values = self.forecast_at([crop_name], month, year, days_ahead)[:, 0]
+        if np.isnan(values).any():
+            return None
+        return dict(zip(MARKET_METRICS, values.tolist()))
+
+    def to_frame(self):
+        """Convert the stored observations back to a long market DataFrame."""
+        n_metrics, n_crops, n_periods = self.values.shape
+        crop_idx, period_idx = np.nonzero(~np.isnan(self.values[0]))
+        months, years = month_year_of(self.first_period + period_idx)
+        frame = pd.DataFrame({
+            'crop_name': np.asarray(self.crop_names)[crop_idx],
+            'month': months,
+            'year': years
+        })
+        for m, metric in enumerate(MARKET_METRICS):
+            frame[metric] = self.values[m, crop_idx, period_idx]
+        return frame
+
+    def _to_array(self, market_data):
+        """Pivot market data to a dense (metric, crop, period) array over continuous months."""
+        crop_names = list(pd.unique(market_data['crop_name']))
+        crop_index = {crop: i for i, crop in enumerate(crop_names)}
+        periods = period_of(market_data['month'].to_numpy(dtype=int), market_data['year'].to_numpy(dtype=int))
+        first_period = int(periods.min())
+        n_periods = int(periods.max()) - first_period + 1
+
+        values = np.full((len(MARKET_METRICS), len(crop_names), n_periods), np.nan)
+        crop_positions = market_data['crop_name'].map(crop_index).to_numpy()
+        for m, metric in enumerate(MARKET_METRICS):
+            values[m, crop_positions, periods - first_period] = market_data[metric].to_numpy(dtype=float)
+        return crop_names, first_period, values
+
+    def _fingerprint(self):
+        digest = hashlib.sha1(self.values.tobytes())
+        digest.update(repr((self.first_period, list(self.crop_names), self.method, self.alphas.tolist())).encode())
+        return digest.hexdigest()
+
+    def _fit_params(self, values):
+        """Fit every model on every series and choose a method per series."""
+        n_metrics, n_crops, n_periods = values.shape
+        shape = (n_metrics, n_crops)
+
+        # Exponential smoothing: run all smoothing factors at once and keep the best per series
+        alphas = self.alphas[:, None, None]
+        levels = np.full((len(self.alphas),) + shape, np.nan)
+        ses_error = np.zeros((len(self.alphas),) + shape)
+        for t in range(n_periods):
+            observed = values[:, :, t]
+            has_value = ~np.isnan(observed)
+            has_level = ~np.isnan(levels)
+            error = np.where(has_value & has_level, np.abs(observed - levels), 0)
+            ses_error += error
+            updated = np.where(has_level, alphas * observed + (1 - alphas) * levels, observed)
+            levels = np.where(has_value, updated, levels)
+        best_alpha = np.argmin(ses_error, axis=0)
+        level = np.take_along_axis(levels, best_alpha[None], axis=0)[0]
+        alpha = self.alphas[best_alpha]
+
+        # AR(1) sufficient statistics over consecutive observed pairs
+        previous, current = values[:, :, :-1], values[:, :, 1:]
+        pairs = ~np.isnan(previous) & ~np.isnan(current)
+        x = np.where(pairs, previous, 0)
+        y = np.where(pairs, current, 0)
+        ar_stats = np.stack([pairs.sum(axis=2), x.sum(axis=2), y.sum(axis=2),
+                             (x * x).sum(axis=2), (x * y).sum(axis=2)]).astype(float)
+
+        params = {
+            'alpha': alpha,
+            'level': level,
+            'ar_stats': ar_stats,
+            'last_value': self._last_values(values),
+            'seasonal': self._seasonal_values(values),
+            'n_periods': n_periods
+        }
+
+        # In-sample one-step-ahead errors of the other methods
+        intercept, slope = self._ar1_coefficients(ar_stats)
+        ar_error = np.where(pairs, np.abs(current - (intercept[..., None] + slope[..., None] * previous)), 0).sum(axis=2)
+        seasonal_pairs = ~np.isnan(values[:, :, 12:]) & ~np.isnan(values[:, :, :-12]) if n_periods > 12 else None
+        if seasonal_pairs is not None and seasonal_pairs.any():
+            seasonal_error = np.where(seasonal_pairs, np.abs(values[:, :, 12:] - values[:, :, :-12]), 0).sum(axis=2)
+            seasonal_error = np.where(seasonal_pairs.sum(axis=2) > 0, seasonal_error / np.maximum(seasonal_pairs.sum(axis=2), 1), np.inf)
+        else:
+            seasonal_error = np.full(shape, np.inf)
+
+        n_ses = np.maximum((~np.isnan(values)).sum(axis=2) - 1, 1)
+        n_ar = np.maximum(ar_stats[0], 1)
+        errors = np.stack([seasonal_error,
+                           np.take_along_axis(ses_error, best_alpha[None], axis=0)[0] / n_ses,
+                           np.where(ar_stats[0] >= 3, ar_error / n_ar, np.inf)])
+
+        if self.method == 'auto':
+            # Ties go to exponential smoothing, the most robust choice on short series
+            errors[1] -= 1e-12
+            params['choice'] = np.argmin(errors, axis=0)
+        else:
+            params['choice'] = np.full(shape, ['seasonal_naive', 'exponential_smoothing', 'ar1'].index(self.method))
+        return params
+
+    def _advance(self, params, observed):
+        """Advance fitted state by one period of observations (used by update)."""
+        has_value = ~np.isnan(observed)
+        level = params['level']
+        alpha = params['alpha']
+        params['level'] = np.where(has_value,
+                                   np.where(np.isnan(level), observed, alpha * observed + (1 - alpha) * level),
+                                   level)
+
+        last_value = params['last_value']
+        pairs = has_value & ~np.isnan(last_value)
+        x = np.where(pairs, last_value, 0)
+        y = np.where(pairs, observed, 0)
+        params['ar_stats'] = params['ar_stats'] + np.stack([pairs, x, y, x * x, x * y]).astype(float)
+
+        params['last_value'] = np.where(has_value, observed, last_value)
+        seasonal = params['seasonal'].copy()
+        month_slot = (self.first_period + params['n_periods']) % 12
+        seasonal[:, :, month_slot] = np.where(has_value, observed, seasonal[:, :, month_slot])
+        params['seasonal'] = seasonal
+        params['n_periods'] += 1
+
+    def _last_values(self, values):
+        """Last observed value of each series (NaN if never observed)."""
+        observed = ~np.isnan(values)
+        last_index = values.shape[2] - 1 - np.argmax(observed[:, :, ::-1], axis=2)
+        last = np.take_along_axis(values, last_index[..., None], axis=2)[..., 0]
+        return np.where(observed.any(axis=2), last, np.nan)
+
+    def _seasonal_values(self, values):
+        """Latest observed value of each series for each calendar month slot (period % 12)."""
+        seasonal = np.full(values.shape[:2] + (12,), np.nan)
+        for t in range(values.shape[2]):
+            slot = (self.first_period + t) % 12
+            observed = values[:, :, t]
+            seasonal[:, :, slot] = np.where(np.isnan(observed), seasonal[:, :, slot], observed)
+        return seasonal
+
+    def _seasonal_naive_forecast(self, horizon):
+        target_slot = (self.first_period + self.params['n_periods'] - 1 + horizon) % 12
+        same_month = np.take_along_axis(self.params['seasonal'],
+                                        np.broadcast_to(target_slot, self.params['level'].shape)[..., None],
+                                        axis=2)[..., 0]
+        return np.where(np.isnan(same_month), self.params['last_value'], same_month)
+
+    def _ar1_coefficients(self, ar_stats):
+        """OLS intercept and slope of x_t on x_(t-1); falls back to the mean without enough pairs."""
+        n, sum_x, sum_y, sum_xx, sum_xy = ar_stats
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = n * sum_xx - sum_x ** 2
+            slope = np.where((n >= 3) & (variance > 1e-9), (n * sum_xy - sum_x * sum_y) / variance, 0)
+            slope = np.clip(slope, -0.99, 0.99)
+            intercept = np.where(n > 0, (sum_y - slope * sum_x) / np.maximum(n, 1), np.nan)
+        return intercept, slope
+
+    def _ar1_forecast(self, horizon):
+        intercept, slope = self._ar1_coefficients(self.params['ar_stats'])
+        last_value = self.params['last_value']
+        # x_(T+h) = c * (1 + phi + ... + phi^(h-1)) + phi^h * x_T
+        powers = slope ** horizon
+        with np.errstate(divide='ignore', invalid='ignore'):
+            geometric = np.where(np.abs(1 - slope) > 1e-12, (1 - powers) / (1 - slope), horizon)
+        forecast = intercept * geometric + powers * last_value
+        return np.where(np.isnan(intercept), last_value, forecast)
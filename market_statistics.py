@@ -0,0 +1,165 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Moving-average windows in months
+MOVING_AVERAGE_WINDOWS = (3, 12)
+# Months of returns used for volatility
+VOLATILITY_WINDOW = 12
+# Months of history any statistic looks back over (volatility needs one more price than returns)
+HISTORY = max(max(MOVING_AVERAGE_WINDOWS), VOLATILITY_WINDOW + 1, 12)
+# Rolling statistics kept per (crop, period)
+STATISTICS = ('mom_change', 'yoy_change', *[f'ma_{window}' for window in MOVING_AVERAGE_WINDOWS], 'volatility')
+
+
+class MarketStatistics:
+    def __init__(self, store):
+        """
+        Precompute rolling per-crop market statistics over the continuous monthly timeline
+        of a MarketStore.
+
+        Every statistic is a (crop, period) array aligned with the store, so a lookup is a
+        dict access plus an array index. Built in one vectorized pass over all crops and
+        updated incrementally with apply(): new or changed months recompute only their own
+        windows, appended to the existing arrays, while added crops or months before the
+        start of the timeline recompute everything.
+
+        Statistics (on price_per_kg):
+            mom_change      month-over-month change in percent
+            yoy_change      year-over-year change in percent
+            ma_3, ma_12     moving averages over the last 3 and 12 months
+            volatility      standard deviation of monthly log returns over the last 12 months
+            seasonal_index  mean price in a calendar month divided by the crop's mean price
+
+        Args:
+            store: MarketStore instance
+        """
+        self.store = store
+        self.stats = {}
+        # Statistic name to a (crop, capacity) array; stats holds views of the filled periods
+        self._buffers = {}
+
+        # Per-crop price sums and counts by calendar month for the seasonal index
+        n_crops = len(store.crop_names)
+        self._seasonal_sum = np.zeros((n_crops, 12))
+        self._seasonal_count = np.zeros((n_crops, 12))
+        crop_idx, offsets = np.nonzero(store.observed)
+        slots = (store.first_period + offsets) % 12
+        np.add.at(self._seasonal_sum, (crop_idx, slots), store.metrics['price_per_kg'][crop_idx, offsets])
+        np.add.at(self._seasonal_count, (crop_idx, slots), 1)
+
+        self._compute_stats(0)
+
+    def apply(self, change):
+        """
+        Update the statistics after MarketStore.update, recomputing only affected periods.
+
+        Args:
+            change: Change record returned by MarketStore.update (None is ignored)
+        """
+        if change is None:
+            return
+        n_new = len(change['new_crops'])
+        if n_new:
+            self._seasonal_sum = np.pad(self._seasonal_sum, ((0, n_new), (0, 0)))
+            self._seasonal_count = np.pad(self._seasonal_count, ((0, n_new), (0, 0)))
+
+        # Replace earlier observations of the same crop and month in the seasonal sums
+        rows, replaced = change['rows'], change['replaced']
+        slots = (change['periods'] % 12).astype(int)
+        columns = change['periods'] - self.store.first_period
+        prices = self.store.metrics['price_per_kg'][rows, columns].astype(float)
+        old_prices = change['previous']['price_per_kg'].astype(float)
+        np.add.at(self._seasonal_sum, (rows, slots), prices - np.where(replaced, old_prices, 0))
+        np.add.at(self._seasonal_count, (rows, slots), np.where(replaced, 0, 1))
+
+        # Statistics before the first changed month only look backwards, so they are unchanged
+        # unless the timeline shifted or crops were added
+        self._compute_stats(0 if n_new else change['start'])
+
+    def get(self, crop_name, month, year):
+        """
+        Get the market metrics and rolling statistics of a crop for a month in O(1).
+
+        Args:
+            crop_name: Name of the crop
+            month: Month (1-12)
+            year: Year
+
+        Returns:
+            Dict with the MARKET_METRICS values and the statistics (NaN where there is not
+            enough history), or None if the crop has no data for that month
+        """
+        result = self.store.get(crop_name, month, year)
+        if result is None:
+            return None
+        i = self.store.index_of(crop_name)
+        t = self.store.column(month, year)
+        for name, values in self.stats.items():
+            result[name] = float(values[i, t])
+        result['seasonal_index'] = float(self.seasonal_index[i, month - 1])
+        return result
+
+    @property
+    def seasonal_index(self):
+        """(crop, calendar month) array of mean monthly price relative to the crop's mean price."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            monthly_mean = self._seasonal_sum / self._seasonal_count
+            overall_mean = self._seasonal_sum.sum(axis=1) / self._seasonal_count.sum(axis=1)
+            return monthly_mean / overall_mean[:, None]
+
+    def _compute_stats(self, start):
+        """
+        Compute the rolling statistics for periods from start onwards, for all crops at once.
+
+        Only those periods and the HISTORY months their windows look back over are read;
+        results are written into per-statistic buffers that grow by doubling, so appending
+        a month costs O(crops) rather than a pass over the whole timeline.
+        """
+        n_crops, n_periods = self.store.observed.shape
+        capacity = self._buffers['mom_change'].shape[1] if self._buffers else 0
+        if start == 0 or self._buffers['mom_change'].shape[0] != n_crops:
+            # Timeline shifted or crops added: start over
+            start = 0
+            self._buffers = {name: np.full((n_crops, n_periods), np.nan) for name in STATISTICS}
+        elif n_periods > capacity:
+            grown = max(n_periods, 2 * capacity)
+            for name, buffer in self._buffers.items():
+                self._buffers[name] = np.concatenate([buffer, np.full((n_crops, grown - capacity), np.nan)], axis=1)
+
+        # The changed periods plus the history before them, NaN-padded where the data starts
+        first = max(start - HISTORY, 0)
+        observed = self.store.observed[:, first:]
+        price = np.where(observed, self.store.metrics['price_per_kg'][:, first:], np.nan).astype(float)
+        padded = np.concatenate([np.full((n_crops, HISTORY - (start - first)), np.nan), price], axis=1)
+        # padded[:, HISTORY] is period start
+        n_changed = n_periods - start
+        current = padded[:, HISTORY:]
+
+        def lag(months):
+            return padded[:, HISTORY - months:HISTORY - months + n_changed]
+
+        def rolling(values, window):
+            # Windows ending at each period from start onwards
+            return sliding_window_view(values, window, axis=1)[:, HISTORY - window + 1:]
+
+        new_stats = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_stats['mom_change'] = (current - lag(1)) / lag(1) * 100
+            new_stats['yoy_change'] = (current - lag(12)) / lag(12) * 100
+            for window in MOVING_AVERAGE_WINDOWS:
+                windows = rolling(padded, window)
+                counts = (~np.isnan(windows)).sum(axis=2)
+                new_stats[f'ma_{window}'] = np.where(counts > 0, np.nansum(windows, axis=2) / np.maximum(counts, 1), np.nan)
+
+            log_returns = np.log(padded[:, 1:]) - np.log(padded[:, :-1])
+            log_returns = np.concatenate([np.full((n_crops, 1), np.nan), log_returns], axis=1)
+            windows = rolling(log_returns, VOLATILITY_WINDOW)
+            counts = (~np.isnan(windows)).sum(axis=2)
+            means = np.nansum(windows, axis=2) / np.maximum(counts, 1)
+            squares = np.nansum((windows - means[..., None]) ** 2, axis=2)
+            new_stats['volatility'] = np.where(counts >= 2, np.sqrt(squares / np.maximum(counts - 1, 1)), np.nan)
+
+        for name, values in new_stats.items():
+            self._buffers[name][:, start:n_periods] = values
+        # Views of the filled part of the buffers, aligned with the store
+        self.stats = {name: buffer[:, :n_periods] for name, buffer in self._buffers.items()}
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+from market_forecaster import MARKET_METRICS, period_of, month_year_of
+
+
+class MarketStore:
+    def __init__(self, market_data):
+        """
+        Time-keyed market data: one dense (crop, period) array per metric over a continuous
+        monthly timeline (period = year * 12 + month - 1), so any month range, including
+        ranges across year boundaries, is a single slice.
+
+        Args:
+            market_data: DataFrame with crop_name, month, year and the MARKET_METRICS columns
+        """
+        # One row per crop and month; the first row wins, as in the original DataFrame lookups
+        data = market_data.drop_duplicates(subset=['crop_name', 'month', 'year'], keep='first')
+        periods = period_of(data['month'].to_numpy(dtype=int), data['year'].to_numpy(dtype=int))
+
+        self.crop_names = list(pd.unique(data['crop_name']))
+        self._crop_index = {crop: i for i, crop in enumerate(self.crop_names)}
+        self.first_period = int(periods.min()) if len(periods) else 0
+        n_periods = int(periods.max()) - self.first_period + 1 if len(periods) else 0
+
+        # Metrics keep their column type so they format exactly as the raw data
+        shape = (len(self.crop_names), n_periods)
+        self.observed = np.zeros(shape, dtype=bool)
+        self.metrics = {metric: np.zeros(shape, dtype=data[metric].to_numpy().dtype) for metric in MARKET_METRICS}
+        self._latest_years = {}
+        self._write(data, periods)
+
+    @property
+    def n_periods(self):
+        return self.observed.shape[1]
+
+    @property
+    def last_period(self):
+        """Last period on the timeline, or None if the store is empty."""
+        return self.first_period + self.n_periods - 1 if self.n_periods else None
+
+    def latest_year(self, month=None):
+        """
+        Get the latest year with market data, used when callers do not pass a year.
+
+        Args:
+            month: If given, the latest year with data for that calendar month
+
+        Returns:
+            Year, or None if the store is empty
+        """
+        if not self.n_periods:
+            return None
+        if month not in self._latest_years:
+            periods = self.first_period + np.flatnonzero(self.observed.any(axis=0))
+            if month is not None:
+                periods = periods[periods % 12 == month - 1]
+            if len(periods) == 0:
+                periods = [self.last_period]
+            self._latest_years[month] = int(periods[-1] // 12)
+        return self._latest_years[month]
+
+    def index_of(self, crop_name):
+        """Get the row of a crop, or None if it has no market data."""
+        return self._crop_index.get(crop_name)
+
+    def column(self, month, year):
+        """Timeline position of a month, or None if it is outside the stored range (or year is None)."""
+        if year is None:
+            # Callers pass the resolved default year, which is None for an empty store
+            return None
+        t = period_of(month, year) - self.first_period
+        return t if 0 <= t < self.n_periods else None
+
+    def get(self, crop_name, month, year):
+        """
+        Get the metrics of a crop for a month in O(1).
+
+        Returns:
+            Dict with the MARKET_METRICS values, or None if there is no data
+        """
+        i = self._crop_index.get(crop_name)
+        t = self.column(month, year)
+        if i is None or t is None or not self.observed[i, t]:
+            return None
+        return {metric: values[i, t] for metric, values in self.metrics.items()}
+
+    def period_slice(self, month, year):
+        """
+        Get every crop's metrics for one month.
+
+        Returns:
+            Tuple (observed, metrics): a boolean array per crop and a dict of metric arrays,
+            both aligned with self.crop_names
+        """
+        t = self.column(month, year)
+        if t is None:
+            empty = np.zeros(len(self.crop_names), dtype=bool)
+            return empty, {metric: np.zeros(len(self.crop_names), dtype=values.dtype)
+                           for metric, values in self.metrics.items()}
+        return self.observed[:, t], {metric: values[:, t] for metric, values in self.metrics.items()}
+
+    def history(self, crop_name, start_month, start_year, end_month, end_year):
+        """
+        Get a crop's observations over an inclusive month range with a single slice.
+
+        Args:
+            crop_name: Name of the crop
+            start_month, start_year: First month of the range
+            end_month, end_year: Last month of the range
+
+        Returns:
+            DataFrame with month, year and MARKET_METRICS columns, one row per observed month
+        """
+        i = self._crop_index.get(crop_name)
+        start = max(period_of(start_month, start_year) - self.first_period, 0)
+        end = min(period_of(end_month, end_year) - self.first_period, self.n_periods - 1)
+        if i is None or end < start:
+            return pd.DataFrame(columns=['month', 'year'] + MARKET_METRICS)
+
+        offsets = start + np.flatnonzero(self.observed[i, start:end + 1])
+        months, years = month_year_of(self.first_period + offsets)
+        frame = pd.DataFrame({'month': months, 'year': years})
+        for metric, values in self.metrics.items():
+            frame[metric] = values[i, offsets]
+        return frame
+
+    def window(self, crop_name, months, end_month=None, end_year=None):
+        """
+        Get a crop's observations over the last `months` months up to and including an end month.
+
+        Args:
+            crop_name: Name of the crop
+            months: Window length (e.g. 24 for "last 24 months")
+            end_month, end_year: Last month of the window, defaults to the latest stored month
+
+        Returns:
+            DataFrame as returned by history()
+        """
+        if end_month is None or end_year is None:
+            if not self.n_periods:
+                return self.history(crop_name, 1, 0, 1, 0)
+            end_month, end_year = month_year_of(self.last_period)
+        start_month, start_year = month_year_of(period_of(end_month, end_year) - months + 1)
+        return self.history(crop_name, start_month, start_year, end_month, end_year)
+
+    def update(self, new_market_data):
+        """
+        Add or replace market observations, growing the timeline and crop list as needed.
+
+        Args:
+            new_market_data: DataFrame with the same columns as the initial market data
+
+        Returns:
+            Dict describing the change, for derived structures to update incrementally:
+            start (first timeline position whose data changed, 0 if positions shifted),
+            rows, periods, replaced (rows that overwrote an observation) and previous
+            (the overwritten metric values); None if there was nothing to add
+        """
+        data = new_market_data.drop_duplicates(subset=['crop_name', 'month', 'year'], keep='first')
+        if data.empty:
+            return None
+        periods = period_of(data['month'].to_numpy(dtype=int), data['year'].to_numpy(dtype=int))
+
+        new_crops = [crop for crop in pd.unique(data['crop_name']) if crop not in self._crop_index]
+        for crop in new_crops:
+            self._crop_index[crop] = len(self.crop_names)
+            self.crop_names.append(crop)
+        if not self.n_periods:
+            self.first_period = int(periods.min())
+        start = min(int(periods.min()), self.first_period)
+        end = max(int(periods.max()), self.first_period + self.n_periods - 1)
+        before = self.first_period - start
+        after = end - (self.first_period + self.n_periods - 1)
+        pad = ((0, len(new_crops)), (before, after))
+
+        self.observed = np.pad(self.observed, pad)
+        for metric in MARKET_METRICS:
+            dtype = np.result_type(self.metrics[metric], data[metric].to_numpy())
+            self.metrics[metric] = np.pad(self.metrics[metric], pad).astype(dtype, copy=False)
+        self.first_period = start
+
+        change = self._write(data, periods)
+        change['new_crops'] = new_crops
+        change['start'] = 0 if before else int(periods.min()) - self.first_period
+        return change
+
+    def to_frame(self):
+        """Convert the store back to a long market DataFrame."""
+        crop_idx, offsets = np.nonzero(self.observed)
+        months, years = month_year_of(self.first_period + offsets)
+        frame = pd.DataFrame({
+            'crop_name': np.asarray(self.crop_names, dtype=object)[crop_idx],
+            'month': months,
+            'year': years
+        })
+        for metric, values in self.metrics.items():
+            frame[metric] = values[crop_idx, offsets]
+        return frame
+
+    def _write(self, data, periods):
+        """Write rows into the dense arrays, returning what was overwritten."""
+        rows = np.array([self._crop_index[crop] for crop in data['crop_name']], dtype=int)
+        columns = periods - self.first_period
+        change = {
+            'rows': rows,
+            'periods': periods,
+            'replaced': self.observed[rows, columns].copy(),
+            'previous': {metric: values[rows, columns].copy() for metric, values in self.metrics.items()}
+        }
+        self.observed[rows, columns] = True
+        for metric in MARKET_METRICS:
+            self.metrics[metric][rows, columns] = data[metric].to_numpy()
+        self._latest_years.clear()
+        return change
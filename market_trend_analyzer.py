@@ -4,11 +4,22 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import io
 import base64
+import hashlib
+from market_store import MarketStore
+from market_statistics import MarketStatistics
+from explanation_templates import (
+    TREND_PRICE_LEVEL, TREND_PRICE_CHANGE, TREND_DEMAND, TREND_SUPPLY, TREND_PROFIT,
+    TREND_CONCLUSION_FAVORABLE, TREND_CONCLUSION_CAUTION, TREND_CONCLUSION_BALANCED,
+    format_display_name
+)
 
 class MarketTrendAnalyzer:
     def __init__(self):
         """Initialize the market trend analyzer."""
         self.market_data = None
+        self.market_version = None
+        self.market_store = None
+        self.market_stats = None
         self.load_data()
         
     def load_data(self):
@@ -23,73 +34,131 @@ class MarketTrendAnalyzer:
                 'crop_name', 'month', 'year', 'price_per_kg', 
                 'demand_score', 'supply_score', 'profit_potential'
             ])
+        self.market_version = self._compute_market_version()
+        self.market_store = MarketStore(self.market_data)
+        self.market_stats = MarketStatistics(self.market_store)
     
-    def get_price_trend(self, crop_name, year=2023):
+    def add_market_data(self, new_market_data):
+        """
+        Append new market observations and update the rolling statistics incrementally.
+        
+        Args:
+            new_market_data: DataFrame with the market data columns
+        """
+        self.market_data = pd.concat([self.market_data, new_market_data], ignore_index=True)
+        self.market_version = self._compute_market_version()
+        self.market_stats.apply(self.market_store.update(new_market_data))
+    
+    def _compute_market_version(self):
+        """Fingerprint the market data so caches keyed on it are invalidated when it changes."""
+        row_hashes = pd.util.hash_pandas_object(self.market_data, index=False).to_numpy()
+        return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:12]
+    
+    def _resolve_year(self, month=None, year=None):
+        """Use the given year, or else the latest year with data for the month."""
+        return year if year is not None else self.market_store.latest_year(month)
+    
+    def get_price_trend(self, crop_name, year=None):
         """
         Get price trend data for a specific crop.
         
         Args:
             crop_name: Name of the crop
-            year: Year to analyze, defaults to 2023
+            year: Year to analyze, defaults to the latest year with data
             
         Returns:
             DataFrame with monthly prices
         """
-        # Filter data for the specified crop and year
-        crop_data = self.market_data[
-            (self.market_data['crop_name'] == crop_name) & 
-            (self.market_data['year'] == year)
-        ]
+        year = self._resolve_year(year=year)
+        if year is None:
+            return pd.DataFrame(columns=['month', 'price_per_kg'])
         
-        # Sort by month
-        crop_data = crop_data.sort_values('month')
+        # One slice of the crop's timeline, already in month order
+        crop_data = self.market_store.history(crop_name, 1, year, 12, year)
         
         return crop_data[['month', 'price_per_kg']]
     
-    def get_market_metrics(self, crop_name, month, year=2023):
+    def get_price_history(self, crop_name, months=24, end_month=None, end_year=None):
+        """
+        Get a crop's prices over the last months, across year boundaries.
+        
+        Args:
+            crop_name: Name of the crop
+            months: Number of months to include, defaults to 24
+            end_month: Last month of the window, defaults to the latest month with data
+            end_year: Year of end_month
+            
+        Returns:
+            DataFrame with month, year and price_per_kg columns in time order
+        """
+        history = self.market_store.window(crop_name, months, end_month, end_year)
+        return history[['month', 'year', 'price_per_kg']]
+    
+    def get_market_metrics(self, crop_name, month, year=None):
         """
         Get comprehensive market metrics for a crop.
         
         Args:
             crop_name: Name of the crop
             month: Month (1-12)
-            year: Year, defaults to 2023
+            year: Year, defaults to the latest year with data for the month
             
         Returns:
             Dict with market metrics or None if data not found
         """
-        # Get data for the specified crop, month, and year
-        data = self.market_data[
-            (self.market_data['crop_name'] == crop_name) & 
-            (self.market_data['month'] == month) & 
-            (self.market_data['year'] == year)
-        ]
+        # Precomputed per crop and month, so this is a constant-time lookup
+        return self.market_store.get(crop_name, month, self._resolve_year(month, year))
+    
+    def get_market_statistics(self, crop_name, month, year=None):
+        """
+        Get market metrics with rolling statistics (MoM/YoY change, moving averages,
+        volatility and seasonal index) for a crop.
         
-        if data.empty:
-            return None
+        Args:
+            crop_name: Name of the crop
+            month: Month (1-12)
+            year: Year, defaults to the latest year with data for the month
+            
+        Returns:
+            Dict with metrics and statistics or None if data not found
+        """
+        return self.market_stats.get(crop_name, month, self._resolve_year(month, year))
+    
+    def get_risk_adjusted_score(self, crop_name, month, market_score, year=None, risk_aversion=0.5):
+        """
+        Discount a market score by the price volatility of the crop.
         
-        # Extract the first (should be only) row
-        row = data.iloc[0]
+        Args:
+            crop_name: Name of the crop
+            month: Month (1-12)
+            market_score: Market score between 0 and 1 (e.g. DataProcessor.get_market_score)
+            year: Year, defaults to the latest year with data for the month
+            risk_aversion: How strongly volatility is penalized (0 disables the penalty)
+            
+        Returns:
+            Risk-adjusted score between 0 and 1
+        """
+        stats = self.market_stats.get(crop_name, month, self._resolve_year(month, year))
+        if stats is None or np.isnan(stats['volatility']):
+            return market_score  # Not enough history to estimate risk
         
-        return {
-            'price_per_kg': row['price_per_kg'],
-            'demand_score': row['demand_score'],
-            'supply_score': row['supply_score'],
-            'profit_potential': row['profit_potential']
-        }
+        penalty = min(1.0, risk_aversion * stats['volatility'])
+        return market_score * (1 - penalty)
     
-    def get_top_profitable_crops(self, month, year=2023, limit=5):
+    def get_top_profitable_crops(self, month, year=None, limit=5):
         """
         Get the top most profitable crops for a given month and year.
         
         Args:
             month: Month (1-12)
-            year: Year, defaults to 2023
+            year: Year, defaults to the latest year with data for the month
             limit: Number of crops to return, defaults to 5
             
         Returns:
             List of dicts with crop information
         """
+        year = self._resolve_year(month, year)
+        
         # Filter data for the specified month and year
         data = self.market_data[
             (self.market_data['month'] == month) & 
@@ -115,17 +184,19 @@ class MarketTrendAnalyzer:
         
         return top_crops
     
-    def generate_price_chart(self, crop_name, year=2023):
+    def generate_price_chart(self, crop_name, year=None):
         """
         Generate a price chart for a specific crop.
         
         Args:
             crop_name: Name of the crop
-            year: Year to analyze, defaults to 2023
+            year: Year to analyze, defaults to the latest year with data
             
         Returns:
             Base64-encoded image of the chart
         """
+        year = self._resolve_year(year=year)
+        
         # Get price trend data
         price_data = self.get_price_trend(crop_name, year)
         
@@ -152,18 +223,20 @@ class MarketTrendAnalyzer:
         
         return img_str
     
-    def generate_market_comparison(self, crop_names, month, year=2023):
+    def generate_market_comparison(self, crop_names, month, year=None):
         """
         Generate a comparison chart for multiple crops.
         
         Args:
             crop_names: List of crop names
             month: Month (1-12)
-            year: Year, defaults to 2023
+            year: Year, defaults to the latest year with data for the month
             
         Returns:
             Base64-encoded image of the chart
         """
+        year = self._resolve_year(month, year)
+        
         # Initialize data lists
         prices = []
         demand_scores = []
@@ -225,84 +298,47 @@ class MarketTrendAnalyzer:
         
         return img_str
     
-    def explain_market_trends(self, crop_name, month, year=2023):
+    def explain_market_trends(self, crop_name, month, year=None):
         """
         Generate a textual explanation of market trends.
         
         Args:
             crop_name: Name of the crop
             month: Month (1-12)
-            year: Year, defaults to 2023
+            year: Year, defaults to the latest year with data for the month
             
         Returns:
             String explanation of market trends
         """
-        metrics = self.get_market_metrics(crop_name, month, year)
+        year = self._resolve_year(month, year)
+        metrics = self.market_stats.get(crop_name, month, year)
         if not metrics:
             return f"No market data available for {crop_name} in month {month}, {year}."
         
-        # Get data for previous month for comparison
-        prev_month = 12 if month == 1 else month - 1
-        prev_year = year - 1 if month == 1 else year
-        prev_metrics = self.get_market_metrics(crop_name, prev_month, prev_year)
-        
-        explanation_parts = []
-        
         # Format crop name for display
-        display_name = crop_name.replace('_', ' ').capitalize()
+        display_name = format_display_name(crop_name)
         
         # Current price analysis
-        if metrics['price_per_kg'] > 100:
-            explanation_parts.append(f"{display_name} currently has a high market price of Rs. {metrics['price_per_kg']:.2f} per kg.")
-        elif metrics['price_per_kg'] > 50:
-            explanation_parts.append(f"{display_name} currently has a moderate market price of Rs. {metrics['price_per_kg']:.2f} per kg.")
-        else:
-            explanation_parts.append(f"{display_name} currently has a relatively low market price of Rs. {metrics['price_per_kg']:.2f} per kg.")
+        explanation_parts = [TREND_PRICE_LEVEL.render(metrics['price_per_kg'], display_name=display_name)]
         
         # Price trend analysis
-        if prev_metrics:
-            price_change = metrics['price_per_kg'] - prev_metrics['price_per_kg']
-            price_change_pct = (price_change / prev_metrics['price_per_kg']) * 100
-            
-            if price_change_pct > 10:
-                explanation_parts.append(f"The price has increased significantly by {price_change_pct:.1f}% compared to last month.")
-            elif price_change_pct > 0:
-                explanation_parts.append(f"The price has slightly increased by {price_change_pct:.1f}% compared to last month.")
-            elif price_change_pct > -10:
-                explanation_parts.append(f"The price has slightly decreased by {abs(price_change_pct):.1f}% compared to last month.")
-            else:
-                explanation_parts.append(f"The price has decreased significantly by {abs(price_change_pct):.1f}% compared to last month.")
-        
-        # Demand analysis
-        if metrics['demand_score'] >= 8:
-            explanation_parts.append(f"There is very high market demand for {display_name} (score: {metrics['demand_score']}/10).")
-        elif metrics['demand_score'] >= 6:
-            explanation_parts.append(f"There is good market demand for {display_name} (score: {metrics['demand_score']}/10).")
-        else:
-            explanation_parts.append(f"The market demand for {display_name} is moderate to low (score: {metrics['demand_score']}/10).")
+        # Month-over-month change is precomputed (NaN when the previous month has no data)
+        price_change_pct = metrics['mom_change']
+        if not np.isnan(price_change_pct):
+            explanation_parts.append(TREND_PRICE_CHANGE.render(price_change_pct, abs_value=abs(price_change_pct)))
         
-        # Supply analysis
-        if metrics['supply_score'] >= 8:
-            explanation_parts.append(f"The market has abundant supply of {display_name} (score: {metrics['supply_score']}/10).")
-        elif metrics['supply_score'] >= 6:
-            explanation_parts.append(f"The market has adequate supply of {display_name} (score: {metrics['supply_score']}/10).")
-        else:
-            explanation_parts.append(f"The market supply for {display_name} is limited (score: {metrics['supply_score']}/10), which may keep prices higher.")
-        
-        # Profit potential analysis
-        if metrics['profit_potential'] >= 8:
-            explanation_parts.append(f"{display_name} has excellent profit potential this season (score: {metrics['profit_potential']}/10).")
-        elif metrics['profit_potential'] >= 6:
-            explanation_parts.append(f"{display_name} has good profit potential this season (score: {metrics['profit_potential']}/10).")
-        else:
-            explanation_parts.append(f"{display_name} has moderate to low profit potential this season (score: {metrics['profit_potential']}/10).")
+        # Demand, supply and profit potential analysis
+        explanation_parts.append(TREND_DEMAND.render(metrics['demand_score'], display_name=display_name))
+        explanation_parts.append(TREND_SUPPLY.render(metrics['supply_score'], display_name=display_name))
+        explanation_parts.append(TREND_PROFIT.render(metrics['profit_potential'], display_name=display_name))
         
         # Add a conclusion
         if metrics['demand_score'] > metrics['supply_score'] and metrics['profit_potential'] >= 6:
-            explanation_parts.append(f"Overall, market conditions favor growing {display_name} this season due to favorable demand-supply dynamics.")
+            conclusion = TREND_CONCLUSION_FAVORABLE
         elif metrics['demand_score'] < metrics['supply_score'] and metrics['profit_potential'] < 6:
-            explanation_parts.append(f"Overall, market conditions suggest caution when growing {display_name} this season due to high supply relative to demand.")
+            conclusion = TREND_CONCLUSION_CAUTION
         else:
-            explanation_parts.append(f"Overall, {display_name} presents a balanced market opportunity with moderate risk and returns.")
+            conclusion = TREND_CONCLUSION_BALANCED
+        explanation_parts.append(conclusion.format(display_name=display_name))
         
         return " ".join(explanation_parts)
@@ -0,0 +1,83 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.neighbors import KNeighborsClassifier
+
+
+class SoftNearestCentroid(ClassifierMixin, BaseEstimator):
+    def __init__(self, bandwidth=1.0):
+        """
+        Nearest-centroid classifier with probabilities from a softmax over centroid distances.
+
+        One centroid per crop in the scaled feature space, so prediction is a single
+        (n_samples, n_crops) distance computation.
+
+        Args:
+            bandwidth: Scale of the squared distances in the softmax; smaller is sharper
+        """
+        self.bandwidth = bandwidth
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        self.classes_, targets = np.unique(np.asarray(y), return_inverse=True)
+        counts = np.bincount(targets, minlength=len(self.classes_))
+        self.centroids_ = np.zeros((len(self.classes_), X.shape[1]))
+        np.add.at(self.centroids_, targets, X)
+        self.centroids_ /= counts[:, None]
+        return self
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2; |x|^2 is constant per row and cancels in the softmax
+        logits = (2 * X @ self.centroids_.T - (self.centroids_ ** 2).sum(axis=1)) / (2 * self.bandwidth)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def random_forest(n_estimators=None):
+    """Default backend: accurate, supports warm starts and exact feature importances."""
+    return RandomForestClassifier(n_estimators=n_estimators or 100, random_state=42)
+
+
+def gradient_boosting(n_estimators=None):
+    """Shallow boosted trees: one depth-3 tree per crop and round, small on disk."""
+    return GradientBoostingClassifier(n_estimators=n_estimators or 50, max_depth=3, learning_rate=0.1, random_state=42)
+
+
+def nearest_neighbors(n_estimators=None):
+    """Distance-weighted k-NN over the scaled training profiles."""
+    return KNeighborsClassifier(n_neighbors=5, weights='distance')
+
+
+def nearest_centroid(n_estimators=None):
+    """One centroid per crop: the smallest and fastest backend."""
+    return SoftNearestCentroid()
+
+
+# Backend name -> factory taking the ensemble size (None for the default, ignored by non-ensemble backends)
+BACKENDS = {
+    'random_forest': random_forest,
+    'gradient_boosting': gradient_boosting,
+    'knn': nearest_neighbors,
+    'nearest_centroid': nearest_centroid
+}
+
+
+def create_backend(name, n_estimators=None):
+    """
+    Create an unfitted estimator for a backend.
+
+    Args:
+        name: Key of BACKENDS
+        n_estimators: Ensemble size for the tree backends, defaults to the backend's own
+
+    Returns:
+        scikit-learn classifier with predict_proba and classes_
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](n_estimators)
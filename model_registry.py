@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+
+from crop_recommendation_model import CropRecommendationModel
+from model_backends import BACKENDS
+
+
+class ModelRegistry:
+    def __init__(self, directory='models'):
+        """
+        Local on-disk registry of trained model versions.
+
+        Layout:
+            registry.json           manifest: active version, activation history and the
+                                    metadata of every version
+            <version>/model.joblib  model saved with CropRecommendationModel.save_model
+
+        Versions are never modified once registered, so activating or rolling back only
+        rewrites the manifest.
+
+        Args:
+            directory: Registry directory (created if needed)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, 'registry.json')
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'active': None, 'history': [], 'versions': {}}
+
+    @property
+    def active_version(self):
+        """Version served by load(), or None if nothing is registered."""
+        return self.manifest['active']
+
+    def versions(self):
+        """
+        List the registered versions.
+
+        Returns:
+            List of metadata dicts (oldest first), each with its 'version' and whether it is 'active'
+        """
+        return [dict(metadata, version=version, active=version == self.active_version)
+                for version, metadata in self.manifest['versions'].items()]
+
+    def register(self, model, activate=True, **metadata):
+        """
+        Save a trained model as a new version.
+
+        Args:
+            model: Trained CropRecommendationModel
+            activate: Make the new version the active one
+            **metadata: Extra metadata to store (e.g. a note), next to model.metadata
+
+        Returns:
+            The new version name
+        """
+        number = max([int(version[1:]) for version in self.manifest['versions']] + [0]) + 1
+        version = f'v{number:04d}'
+        path = os.path.join(self.directory, version)
+        os.makedirs(path, exist_ok=True)
+        model.save_model(os.path.join(path, 'model.joblib'))
+
+        self.manifest['versions'][version] = dict(
+            model.metadata,
+            registered_at=datetime.now().isoformat(timespec='seconds'),
+            parent=self.active_version,
+            **metadata
+        )
+        if activate:
+            self._set_active(version)
+        else:
+            self._write_manifest()
+        return version
+
+    def load(self, version=None):
+        """
+        Load a registered model.
+
+        Args:
+            version: Version name, defaults to the active version
+
+        Returns:
+            CropRecommendationModel instance
+        """
+        version = version or self.active_version
+        if version not in self.manifest['versions']:
+            raise KeyError(f"Unknown model version: {version}")
+        model = CropRecommendationModel()
+        model.load_model(os.path.join(self.directory, version, 'model.joblib'))
+        return model
+
+    def activate(self, version):
+        """Make a registered version the active one."""
+        if version not in self.manifest['versions']:
+            raise KeyError(f"Unknown model version: {version}")
+        self._set_active(version)
+
+    def rollback(self, steps=1):
+        """
+        Reactivate the version that was active before the last activation(s).
+
+        Args:
+            steps: Number of activations to undo
+
+        Returns:
+            The version that is active now
+        """
+        history = self.manifest['history']
+        if steps >= len(history):
+            raise ValueError(f"Cannot roll back {steps} activation(s), history has {len(history)} entries")
+        del history[len(history) - steps:]
+        self.manifest['active'] = history[-1]
+        self._write_manifest()
+        return self.active_version
+
+    def delete(self, version):
+        """Remove an inactive version and its files."""
+        if version == self.active_version:
+            raise ValueError("Cannot delete the active model version")
+        self.manifest['versions'].pop(version)
+        self.manifest['history'] = [entry for entry in self.manifest['history'] if entry != version]
+        self._write_manifest()
+        shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
+
+    def _set_active(self, version):
+        self.manifest['active'] = version
+        self.manifest['history'].append(version)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        # Write to a temporary file and swap it in, so readers never see a partial manifest
+        temporary = self.manifest_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+
+def load_or_train(directory='models', calibrate=True):
+    """
+    Load the active model of a registry, training and registering one if it is empty.
+
+    Args:
+        directory: Registry directory
+        calibrate: Calibrate a newly trained model
+
+    Returns:
+        Tuple (model, version)
+    """
+    registry = ModelRegistry(directory)
+    if registry.active_version is not None:
+        try:
+            return registry.load(), registry.active_version
+        except Exception as e:
+            print(f"Error loading model {registry.active_version}: {e}")
+    model = CropRecommendationModel()
+    model.train_model(calibrate=calibrate)
+    return model, registry.register(model, note='initial training')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage crop model versions.")
+    parser.add_argument('command', choices=['list', 'train', 'update', 'activate', 'rollback'],
+                        help="list versions, train a new one, update the active one with new crops, "
+                             "activate a version or roll back the last activation")
+    parser.add_argument('version', nargs='?', help="Version to activate")
+    parser.add_argument('--directory', default='models', help="Registry directory (default: models)")
+    parser.add_argument('--no-calibration', action='store_true', help="Train without probability calibration")
+    parser.add_argument('--permutation', action='store_true',
+                        help="Also compute permutation importance at training time, on all cores")
+    parser.add_argument('--trees', type=int, default=25, help="Trees added by update (default: 25)")
+    parser.add_argument('--backend', default='random_forest', choices=list(BACKENDS),
+                        help="Model backend for train (default: random_forest)")
+    args = parser.parse_args(argv)
+    if args.command == 'activate' and not args.version:
+        parser.error("activate needs a version")
+
+    registry = ModelRegistry(args.directory)
+    if args.command == 'train':
+        model = CropRecommendationModel(backend=args.backend)
+        model.train_model(calibrate=not args.no_calibration, permutation=args.permutation, n_jobs=-1)
+        print(f"Registered {registry.register(model)} (accuracy {model.metadata['accuracy']:.3f})")
+    elif args.command == 'update':
+        model = registry.load()
+        if model.update_model(n_trees=args.trees) is None:
+            print("Model already covers every crop in the catalog")
+        else:
+            print(f"Registered {registry.register(model)} (accuracy {model.metadata['accuracy']:.3f})")
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Active version: {registry.active_version}")
+    elif args.command == 'rollback':
+        print(f"Active version: {registry.rollback()}")
+    else:
+        for metadata in registry.versions():
+            marker = '*' if metadata['active'] else ' '
+            print(f"{marker} {metadata['version']}  {metadata['registered_at']}  "
+                  f"{metadata.get('backend', 'random_forest'):<17}  {metadata['update']:<10}  "
+                  f"accuracy={metadata['accuracy']}  trees={metadata['n_estimators']}  data={metadata['data_hash'][:10]}")
+
+
+if __name__ == '__main__':
+    main()
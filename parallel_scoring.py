@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from crop_catalog import CropCatalog
+from data_processor import DataProcessor
+from crop_recommendation_model import CropRecommendationModel
+from recommendation_engine import HybridRankingEngine, MarketScoreIndex
+
+
+class SharedScoringState:
+    """
+    Read-only scoring state written once to a directory and memory-mapped by worker processes.
+
+    Workers build their engine from these files alone: the catalog and the market
+    score cube are memory-mapped, and neither the market data nor the DataFrame view of
+    the catalog is loaded or recomputed.
+
+    Layout:
+        crop_catalog.npy    structured array of the crop catalog
+        market_scores.npy   market score cube, (year, month, crop)
+        model.joblib        trained model and scaler (CropRecommendationModel.save_model)
+        state.json          manifest with the first year of the score cube, the default
+                            market year of each month and whether a model is included
+    """
+
+    @staticmethod
+    def export(engine, directory):
+        """
+        Write the state of a ranking engine to a directory.
+
+        Args:
+            engine: HybridRankingEngine to share
+            directory: Output directory (created if needed)
+
+        Returns:
+            The directory path
+        """
+        os.makedirs(directory, exist_ok=True)
+        data_processor = engine.data_processor
+
+        np.save(os.path.join(directory, 'crop_catalog.npy'), np.asarray(data_processor.crop_catalog.array))
+        # The engine's crops are the catalog's, so its index holds the processor's cube
+        np.save(os.path.join(directory, 'market_scores.npy'), engine.market_index.scores)
+
+        has_model = engine.crop_model.trained
+        if has_model:
+            engine.crop_model.save_model(os.path.join(directory, 'model.joblib'))
+
+        # The fusion strategy is small, so callers pass it to load() instead of exporting it
+        with open(os.path.join(directory, 'state.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'has_model': has_model,
+                'first_year': engine.market_index.first_year,
+                'latest_years': list(data_processor.market_latest_years().items())
+            }, f)
+        return directory
+
+    @staticmethod
+    def load(directory, fusion_strategy=None):
+        """
+        Build a ranking engine from an exported directory, memory-mapping the large arrays.
+
+        Args:
+            directory: Directory written by export
+            fusion_strategy: FusionStrategy for the engine, defaults to the engine default
+
+        Returns:
+            HybridRankingEngine instance
+        """
+        def array(name):
+            return np.load(os.path.join(directory, name), mmap_mode='r')
+
+        with open(os.path.join(directory, 'state.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        crop_catalog = CropCatalog.from_array(array('crop_catalog.npy'))
+        market_scores = array('market_scores.npy')
+        data_processor = DataProcessor.from_score_cube(crop_catalog, market_scores, manifest['first_year'],
+                                                       dict(manifest['latest_years']))
+
+        crop_model = CropRecommendationModel(crop_catalog=crop_catalog)
+        if manifest['has_model']:
+            crop_model.load_model(os.path.join(directory, 'model.joblib'), mmap_mode='r')
+
+        market_index = MarketScoreIndex(market_scores, manifest['first_year'])
+        return HybridRankingEngine(data_processor, crop_model, fusion_strategy=fusion_strategy,
+                                   market_index=market_index)
+
+
+class OrderedProcessPool:
+    def __init__(self, workers, initializer=None, initargs=(), max_pending=None):
+        """
+        Process pool that returns results in submission order with a bounded number of
+        tasks in flight, so memory stays bounded for arbitrarily long inputs.
+
+        Args:
+            workers: Number of worker processes
+            initializer: Optional function run once in each worker (e.g. to load shared state)
+            initargs: Arguments for initializer
+            max_pending: Maximum tasks in flight, defaults to 2 per worker
+        """
+        self.workers = workers
+        self.max_pending = max_pending or 2 * workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                                            initargs=initargs)
+
+    def imap(self, function, items):
+        """
+        Apply function to every item in worker processes.
+
+        Args:
+            function: Module-level function taking one item
+            items: Iterable of picklable items
+
+        Yields:
+            Results in the same order as items
+        """
+        pending = deque()
+        for item in items:
+            pending.append(self.executor.submit(function, item))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self, cancel=False):
+        """Shut the workers down, optionally cancelling tasks that have not started."""
+        self.executor.shutdown(cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(cancel=exc_type is not None)
+        return False
+
+
+def shared_state_directory():
+    """Create a temporary directory for SharedScoringState, preferring RAM-backed /dev/shm."""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    return tempfile.mkdtemp(prefix='crop_scoring_', dir=base)
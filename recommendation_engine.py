@@ -0,0 +1,543 @@
+import numpy as np
+import pandas as pd
+
+class FusionStrategy:
+    """Base class for strategies that fuse ML probabilities with rule-based scores."""
+
+    # Whether each crop's fused score depends only on its own two scores and never
+    # decreases when its rule score increases; candidate pruning in
+    # HybridRankingEngine.rank relies on it
+    monotone = False
+
+    def fuse(self, ml_scores, rule_scores):
+        """
+        Fuse two aligned score arrays into one.
+
+        Args:
+            ml_scores: NumPy array of ML probabilities (0-1)
+            rule_scores: NumPy array of rule-based combined scores (0-1)
+
+        Returns:
+            NumPy array of fused scores (0-1)
+        """
+        raise NotImplementedError
+
+
+class WeightedMeanFusion(FusionStrategy):
+    def __init__(self, ml_weight=0.5):
+        """Weighted mean of the two scores; the default weight is a plain average."""
+        self.ml_weight = ml_weight
+
+    @property
+    def monotone(self):
+        return self.ml_weight <= 1
+
+    def fuse(self, ml_scores, rule_scores):
+        return self.ml_weight * ml_scores + (1 - self.ml_weight) * rule_scores
+
+
+class RankFusion(FusionStrategy):
+    def __init__(self, k=60):
+        """Reciprocal rank fusion, which ignores the scale of the scores and only uses their order."""
+        self.k = k
+
+    def _ranks(self, scores):
+        """Return 1-based ranks along the last axis, with the highest score ranked 1."""
+        order = np.argsort(-scores, axis=-1, kind='stable')
+        ranks = np.empty(scores.shape)
+        positions = np.broadcast_to(np.arange(1, scores.shape[-1] + 1), scores.shape)
+        np.put_along_axis(ranks, order, positions, axis=-1)
+        return ranks
+
+    def fuse(self, ml_scores, rule_scores):
+        fused = 1 / (self.k + self._ranks(ml_scores)) + 1 / (self.k + self._ranks(rule_scores))
+        # Normalize so a crop ranked first by both methods scores 1
+        return fused / (2 / (self.k + 1))
+
+
+class LearnedBlendFusion(FusionStrategy):
+    def __init__(self, weights=(0.5, 0.5), intercept=0.0):
+        """
+        Linear blend of the two scores with weights learned from feedback data.
+
+        Args:
+            weights: (ml_weight, rule_weight) tuple used until fit() is called
+            intercept: Constant term of the blend
+        """
+        self.weights = np.asarray(weights, dtype=float)
+        self.intercept = intercept
+
+    @property
+    def monotone(self):
+        return self.weights[1] >= 0
+
+    def fit(self, ml_scores, rule_scores, targets):
+        """
+        Learn the blend weights by least squares.
+
+        Args:
+            ml_scores: Array of ML probabilities
+            rule_scores: Array of rule-based scores
+            targets: Array of observed outcomes (0-1), e.g. whether the crop was chosen
+
+        Returns:
+            self
+        """
+        X = np.column_stack([ml_scores, rule_scores, np.ones(len(ml_scores))])
+        coefficients = np.linalg.lstsq(X, np.asarray(targets, dtype=float), rcond=None)[0]
+        self.weights = coefficients[:2]
+        self.intercept = coefficients[2]
+        return self
+
+    def fuse(self, ml_scores, rule_scores):
+        fused = self.weights[0] * ml_scores + self.weights[1] * rule_scores + self.intercept
+        return np.clip(fused, 0, 1)
+
+
+class MarketScoreIndex:
+    def __init__(self, scores, first_year):
+        """
+        Precomputed market scores for every crop, indexed by year and month.
+
+        Args:
+            scores: Array of shape (n_years, 12, n_crops) with market scores (0-1),
+                    e.g. DataProcessor.market_score_cube
+            first_year: Year of scores[0], or None if there are no scores
+        """
+        self.scores = scores
+        self.first_year = first_year
+
+    @classmethod
+    def build(cls, data_processor, crop_names):
+        """Take the market score cube of a DataProcessor, reordered to crop_names if needed."""
+        cube = data_processor.market_score_cube
+        catalog_names = data_processor.crop_catalog.names
+        if len(crop_names) != len(catalog_names) or np.any(np.asarray(crop_names) != catalog_names):
+            positions = np.array([data_processor.crop_catalog.index_of(crop) for crop in crop_names])
+            cube = cube[:, :, positions]
+        return cls(cube, data_processor.market_cube_first_year)
+
+    def lookup(self, month, year):
+        """Get the market scores of all crops for a period (neutral 0.5 if there is no data)."""
+        if year is None or self.first_year is None or not 0 <= int(year) - self.first_year < len(self.scores):
+            return np.full(self.scores.shape[2], 0.5)
+        return self.scores[int(year) - self.first_year, int(month) - 1]
+
+    def lookup_many(self, months, years):
+        """
+        Get the market scores of all crops for many periods with one gather.
+
+        Args:
+            months: Integer array of months (1-12)
+            years: Integer array of years, same length as months
+
+        Returns:
+            Array of shape (len(months), n_crops)
+        """
+        months = np.asarray(months, dtype=int)
+        offsets = np.asarray(years, dtype=int) - (self.first_year if self.first_year is not None else 0)
+        valid = (offsets >= 0) & (offsets < len(self.scores))
+        result = np.full((len(months), self.scores.shape[2]), 0.5)
+        result[valid] = self.scores[offsets[valid], months[valid] - 1]
+        return result
+
+
+class HybridRankingEngine:
+    def __init__(self, data_processor, crop_model, fusion_strategy=None, market_index=None,
+                 crop_index=None, candidate_k=20, approximate=False):
+        """
+        Initialize the ranking engine that scores every crop with both the ML model and the rules.
+
+        Args:
+            data_processor: DataProcessor instance providing crop data and rule-based scoring
+            crop_model: CropRecommendationModel instance providing ML probabilities
+            fusion_strategy: FusionStrategy instance, defaults to WeightedMeanFusion()
+            market_index: Optional prebuilt MarketScoreIndex, built from data_processor if None
+            crop_index: Optional CropIndex; rank() then computes soil scores only for the
+                        candidate_k crops whose requirements are closest to the soil
+                        profile, plus any other crop that could still beat them (see rank)
+            candidate_k: Candidates retrieved per request when crop_index is set
+            approximate: With crop_index, skip the pruning bound and score only the
+                         retrieved candidates and the crops the model ranks highest;
+                         faster, but may miss crops (see measure_recall)
+        """
+        self.data_processor = data_processor
+        self.crop_model = crop_model
+        self.fusion_strategy = fusion_strategy or WeightedMeanFusion()
+        self.crop_index = crop_index
+        self.candidate_k = candidate_k
+        self.approximate = approximate
+
+        crop_catalog = data_processor.crop_catalog
+        self.crop_names = crop_catalog.names
+        self.seasons = crop_catalog.column('season')
+        self.growing_days = crop_catalog.column('growing_days')
+
+        # In-season mask for every month (row 0 unused)
+        self.season_masks = np.zeros((13, len(self.crop_names)), dtype=bool)
+        for month in range(1, 13):
+            self.season_masks[month, data_processor.get_season_candidates(month)] = True
+
+        self.market_index = market_index or MarketScoreIndex.build(data_processor, self.crop_names)
+
+    def refresh_market_index(self):
+        """Rebuild the market score index after the market data has changed."""
+        self.market_index = MarketScoreIndex.build(self.data_processor, self.crop_names)
+
+    def score_all(self, soil_params, month, year=None):
+        """
+        Compute ML, soil, market and fused scores for every crop in one pass.
+
+        Args:
+            soil_params: Dict of soil parameters
+            month: Month (1-12)
+            year: Year, defaults to the latest year with market data for the month
+
+        Returns:
+            Dict of NumPy arrays aligned with self.crop_names
+        """
+        soil_scores = self.data_processor.get_soil_compatibility_scores(soil_params)
+        market_scores = self.market_index.lookup(month, self.data_processor.resolve_market_year(month, year))
+
+        # Same 60/40 weighting as DataProcessor.get_combined_score
+        rule_scores = 0.6 * soil_scores + 0.4 * market_scores
+        ml_scores = self.crop_model.predict_probabilities(soil_params, self.crop_names)
+
+        in_season = self.season_masks[month]
+
+        return {
+            'ml_score': ml_scores,
+            'soil_score': soil_scores,
+            'market_score': market_scores,
+            'rule_score': rule_scores,
+            'combined_score': self.fusion_strategy.fuse(ml_scores, rule_scores),
+            'in_season': in_season
+        }
+
+    def score_candidates(self, soil_params, month, candidates, year=None, ml_scores=None, market_scores=None):
+        """
+        Compute the same scores as score_all for a subset of crops only.
+
+        Fusion strategies that compare crops with each other (not monotone, e.g.
+        RankFusion) need every crop's scores, so for them this scores all crops and
+        returns the candidates' share.
+
+        Args:
+            soil_params: Dict of soil parameters
+            month: Month (1-12)
+            candidates: Integer array of catalog positions
+            year: Year, defaults to the latest year with market data for the month
+            ml_scores: Optional ML probabilities of every crop, if already computed
+            market_scores: Optional market scores of every crop, if already computed
+
+        Returns:
+            Dict of NumPy arrays aligned with candidates
+        """
+        if not self.fusion_strategy.monotone:
+            return {name: values[candidates] for name, values in self.score_all(soil_params, month, year).items()}
+
+        soil_scores = self.data_processor.get_soil_compatibility_array(
+            {param: value for param, value in soil_params.items() if param in self.data_processor.soil_params_range},
+            candidates)
+        if market_scores is None:
+            market_scores = self.market_index.lookup(month, self.data_processor.resolve_market_year(month, year))
+        market_scores = market_scores[candidates]
+
+        rule_scores = 0.6 * soil_scores + 0.4 * market_scores
+        if ml_scores is None:
+            # The forest predicts every class in one pass, so this costs the same as for all crops
+            ml_scores = self.crop_model.predict_probabilities(soil_params, self.crop_names)
+        ml_scores = ml_scores[candidates]
+
+        return {
+            'ml_score': ml_scores,
+            'soil_score': soil_scores,
+            'market_score': market_scores,
+            'rule_score': rule_scores,
+            'combined_score': self.fusion_strategy.fuse(ml_scores, rule_scores),
+            'in_season': self.season_masks[month][candidates]
+        }
+
+    def rank(self, soil_params, month, year=None, limit=10, season_only=True):
+        """
+        Get the top crop recommendations.
+
+        Without a crop index every crop is scored. With one, the ML probabilities and
+        market scores of all crops are computed as usual (one forest pass and one lookup),
+        but soil scores only for the candidate_k crops closest to the soil profile and for
+        any other crop whose score with a perfect soil match would still reach the
+        limit-th best candidate score. The result is the same ranking as scoring every
+        crop, for monotone fusion strategies; others score every crop. In approximate
+        mode the bound is skipped and the candidates are the retrieved crops plus the
+        limit crops with the highest ML probability.
+
+        Args:
+            soil_params: Dict of soil parameters
+            month: Month (1-12)
+            year: Year, defaults to the latest year with market data for the month
+            limit: Number of recommendations to return, defaults to 10
+            season_only: Only rank crops that can be planted in the given month
+
+        Returns:
+            List of dicts with crop information and scores, sorted by combined score
+        """
+        if (self.crop_index is not None and self.candidate_k < len(self.crop_names)
+                and self.fusion_strategy.monotone):
+            candidates, scores = self._score_retrieved(soil_params, month, year, limit, season_only)
+        else:
+            scores = self.score_all(soil_params, month, year)
+            candidates = np.arange(len(self.crop_names))
+            if season_only:
+                in_season = scores['in_season']
+                scores = {name: values[in_season] for name, values in scores.items()}
+                candidates = candidates[in_season]
+        if len(candidates) == 0:
+            return []
+
+        # Top-k of the scored crops: partial partition, then sort only the selected crops
+        combined = scores['combined_score']
+        if limit < len(candidates):
+            top = np.argpartition(-combined, limit - 1)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-combined[top], kind='stable')]
+
+        recommendations = []
+        for j in top:
+            i = candidates[j]
+            recommendations.append({
+                'crop_name': str(self.crop_names[i]),
+                'combined_score': float(scores['combined_score'][j]),
+                'soil_score': float(scores['soil_score'][j]),
+                'market_score': float(scores['market_score'][j]),
+                'ml_score': float(scores['ml_score'][j]),
+                'rule_score': float(scores['rule_score'][j]),
+                'season': str(self.seasons[i]),
+                'growing_days': int(self.growing_days[i])
+            })
+
+        return recommendations
+
+    def _score_retrieved(self, soil_params, month, year, limit, season_only):
+        """Candidate selection for rank() with a crop index; returns (candidates, scores)."""
+        allowed = self.season_masks[month] if season_only else np.ones(len(self.crop_names), dtype=bool)
+        market_scores = self.market_index.lookup(month, self.data_processor.resolve_market_year(month, year))
+        ml_scores = self.crop_model.predict_probabilities(soil_params, self.crop_names)
+
+        candidates = self.crop_index.query(soil_params, max(self.candidate_k, limit),
+                                           mask=allowed if season_only else None)
+        if self.approximate:
+            # Over-fetch the crops the model likes best, their probabilities are already known
+            top_ml = np.argsort(-np.where(allowed, ml_scores, -np.inf), kind='stable')[:limit]
+            candidates = np.union1d(candidates, top_ml[allowed[top_ml]])
+            return candidates, self.score_candidates(soil_params, month, candidates, year, ml_scores, market_scores)
+
+        candidates = np.sort(candidates)
+        scores = self.score_candidates(soil_params, month, candidates, year, ml_scores, market_scores)
+        if len(candidates) >= limit:
+            threshold = np.partition(scores['combined_score'], len(candidates) - limit)[len(candidates) - limit]
+        else:
+            threshold = -np.inf
+        # Best possible fused score of every crop: a perfect soil score
+        upper_bound = self.fusion_strategy.fuse(ml_scores, 0.6 + 0.4 * market_scores)
+        retrieved = np.zeros(len(self.crop_names), dtype=bool)
+        retrieved[candidates] = True
+        extra = np.flatnonzero(allowed & ~retrieved & (upper_bound >= threshold))
+        if len(extra):
+            candidates = np.union1d(candidates, extra)
+            scores = self.score_candidates(soil_params, month, candidates, year, ml_scores, market_scores)
+        return candidates, scores
+
+    def measure_recall(self, profiles, limit=5, season_only=True):
+        """
+        Compare rank() with its current crop index settings against scoring every crop.
+
+        Args:
+            profiles: List of soil parameter dicts, each with a month
+            limit: Recommendations compared per profile
+            season_only: Passed to rank()
+
+        Returns:
+            Dict with recall (share of the exhaustive top-limit crops found) and top1
+            (share of profiles with the same best crop)
+        """
+        crop_index = self.crop_index
+        recall, top1 = [], []
+        for profile in profiles:
+            self.crop_index = None
+            exact = [rec['crop_name'] for rec in self.rank(profile, profile['month'], limit=limit, season_only=season_only)]
+            self.crop_index = crop_index
+            found = [rec['crop_name'] for rec in self.rank(profile, profile['month'], limit=limit, season_only=season_only)]
+            if exact:
+                # Unique names: the catalog can list a crop twice
+                recall.append(len(set(found) & set(exact)) / len(set(exact)))
+                top1.append(found[:1] == exact[:1])
+        return {'recall': float(np.mean(recall)), 'top1': float(np.mean(top1))}
+
+    def tune_candidate_k(self, profiles, target_recall=0.99, limit=5, candidate_ks=(10, 15, 20, 25, 30, 40)):
+        """
+        Set candidate_k to the smallest value whose measured recall meets a target.
+
+        Meant for approximate mode, where candidate_k trades recall for speed; exact
+        mode returns the full ranking at any candidate_k.
+
+        Args:
+            profiles: List of soil parameter dicts, each with a month (e.g. past requests)
+            target_recall: Minimum recall of the exhaustive top-limit crops
+            limit: Recommendations compared per profile
+            candidate_ks: Values tried, in increasing order
+
+        Returns:
+            Dict with the chosen candidate_k and its recall and top1 (see measure_recall);
+            the largest value tried if none meets the target
+        """
+        for candidate_k in candidate_ks:
+            self.candidate_k = candidate_k
+            measured = self.measure_recall(profiles, limit=limit)
+            if measured['recall'] >= target_recall:
+                break
+        return {'candidate_k': self.candidate_k, **measured}
+
+    def score_batch(self, profiles, year=None, use_ml=True):
+        """
+        Compute scores for many soil profiles against every crop in one vectorized pass.
+
+        Args:
+            profiles: DataFrame with one profile per row; needs a 'month' column and
+                      optionally a 'year' column (defaults to year)
+            year: Year used for rows without a 'year' column, defaults to the latest
+                  year with market data for each row's month
+            use_ml: Include ML probabilities; requires every model feature as a column
+
+        Returns:
+            Dict of NumPy arrays of shape (n_profiles, n_crops); 'ml_score' is omitted
+            when use_ml is False and the rule score is used as the combined score
+        """
+        months = np.asarray(profiles['month'], dtype=int)
+        if 'year' in profiles:
+            years = np.asarray(profiles['year'], dtype=int)
+        else:
+            # Resolve the default year once per calendar month (index 0 unused)
+            month_years = [0] + [self.data_processor.resolve_market_year(month, year) or 0 for month in range(1, 13)]
+            years = np.asarray(month_years, dtype=int)[months]
+
+        soil_scores = self.data_processor.get_soil_compatibility_matrix(profiles)
+
+        # One gather from the precomputed score cube for the whole batch
+        market_scores = self.market_index.lookup_many(months, years)
+
+        rule_scores = 0.6 * soil_scores + 0.4 * market_scores
+        scores = {
+            'soil_score': soil_scores,
+            'market_score': market_scores,
+            'rule_score': rule_scores,
+            'in_season': self.season_masks[months]
+        }
+
+        if use_ml:
+            # Rows with missing model features are ranked on their rule score alone
+            complete = ~profiles[self.crop_model.features].isna().to_numpy().any(axis=1)
+            ml_scores = np.zeros_like(rule_scores)
+            if complete.any():
+                ml_scores[complete] = self.crop_model.predict_probabilities_batch(
+                    profiles[complete], self.crop_names)
+            combined_scores = self.fusion_strategy.fuse(ml_scores, rule_scores)
+            combined_scores[~complete] = rule_scores[~complete]
+            scores['ml_score'] = ml_scores
+            scores['combined_score'] = combined_scores
+        else:
+            scores['combined_score'] = rule_scores
+
+        return scores
+
+    def rank_batch(self, profiles, limit=3, year=None, season_only=True, use_ml=True):
+        """
+        Get the exact top crops for many soil profiles at once.
+
+        Args:
+            profiles: DataFrame with one profile per row (see score_batch)
+            limit: Number of crops per profile, defaults to 3
+            year: Year used for rows without a 'year' column, defaults to the latest
+                  year with market data for each row's month
+            season_only: Only rank crops that can be planted in each row's month
+            use_ml: Include ML probabilities (see score_batch)
+
+        Returns:
+            Tuple (crop_indices, scores): crop_indices has shape (n_profiles, limit) with
+            catalog positions (-1 where a profile has fewer candidates), and scores is the
+            score_batch dict with every array gathered to the same shape (NaN where -1)
+        """
+        scores = self.score_batch(profiles, year=year, use_ml=use_ml)
+        combined = scores['combined_score']
+        if season_only:
+            combined = np.where(scores['in_season'], combined, -np.inf)
+
+        limit = min(limit, combined.shape[1])
+        if limit < combined.shape[1]:
+            top = np.argpartition(-combined, limit - 1, axis=1)[:, :limit]
+        else:
+            top = np.tile(np.arange(combined.shape[1]), (len(combined), 1))
+        order = np.argsort(-np.take_along_axis(combined, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+
+        missing = np.isneginf(np.take_along_axis(combined, top, axis=1))
+        gathered = {}
+        for name, values in scores.items():
+            if name == 'in_season':
+                continue
+            values = np.take_along_axis(values, top, axis=1)
+            gathered[name] = np.where(missing, np.nan, values)
+
+        return np.where(missing, -1, top), gathered
+
+    def sweep(self, base_profile, month, grid, year=None, season_only=True, use_ml=True):
+        """
+        Score every crop over a grid of one or two varied parameters in one batched call.
+
+        Args:
+            base_profile: Dict of soil parameters held fixed
+            month: Month (1-12), unless 'month' is one of the swept parameters
+            grid: Dict of one or two parameter names to the values to try,
+                  e.g. {'nitrogen': np.arange(0, 201, 10), 'ph': np.linspace(4, 9, 11)}
+            year: Year, defaults to the latest year with market data for the month
+            season_only: Leave out-of-season crops out of best_crop
+            use_ml: Include ML probabilities (see score_batch)
+
+        Returns:
+            Dict with 'params' (swept names), 'values' (one array per name), every
+            score_batch array reshaped to the grid shape plus the crop axis, and
+            'best_crop' (catalog position, -1 if none) and 'best_score' per grid cell
+        """
+        if not 1 <= len(grid) <= 2:
+            raise ValueError("sweep needs one or two parameters")
+        valid_params = set(self.data_processor.soil_params_range) | {'month'}
+        unknown = [param for param in grid if param not in valid_params]
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {unknown}")
+
+        params = list(grid)
+        values = [np.asarray(grid[param]) for param in params]
+        shape = tuple(len(v) for v in values)
+
+        # One profile per grid cell; swept columns vary, everything else is the base profile
+        profiles = pd.DataFrame({key: np.repeat(value, np.prod(shape)) for key, value in base_profile.items()})
+        profiles['month'] = month
+        for param, mesh in zip(params, np.meshgrid(*values, indexing='ij')):
+            profiles[param] = mesh.ravel()
+        if year is not None:
+            profiles['year'] = year
+
+        scores = self.score_batch(profiles, year=year, use_ml=use_ml)
+        combined = scores['combined_score']
+        if season_only:
+            combined = np.where(scores['in_season'], combined, -np.inf)
+        best_crop = np.argmax(combined, axis=1)
+        best_score = combined[np.arange(len(combined)), best_crop]
+
+        result = {name: array.reshape(shape + (-1,)) for name, array in scores.items()}
+        result['params'] = params
+        result['values'] = values
+        result['best_crop'] = np.where(np.isneginf(best_score), -1, best_crop).reshape(shape)
+        result['best_score'] = np.where(np.isneginf(best_score), np.nan, best_score).reshape(shape)
+        return result
+
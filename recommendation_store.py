@@ -0,0 +1,214 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+# Input parameter -> quantization step; the app's slider steps, so app inputs quantize exactly
+QUANTIZATION = {
+    'nitrogen': 5,
+    'phosphorus': 5,
+    'potassium': 5,
+    'ph': 0.1,
+    'temperature': 1,
+    'humidity': 5,
+    'rainfall': 10
+}
+DEFAULT_REGION = 'unspecified'
+
+
+def quantize(soil_params):
+    """
+    Snap a soil profile to the quantization grid.
+
+    Args:
+        soil_params: Dict of soil parameters (and month)
+
+    Returns:
+        Tuple of (input_key, quantized) where quantized maps each QUANTIZATION parameter
+        to its grid value (None if absent) plus month, and input_key is a string of them
+    """
+    quantized = {}
+    for param, step in QUANTIZATION.items():
+        value = soil_params.get(param)
+        quantized[param] = None if value is None else round(round(value / step) * step, 6)
+    quantized['month'] = soil_params.get('month')
+    input_key = '|'.join('-' if value is None else f'{value:g}' for value in quantized.values())
+    return input_key, quantized
+
+
+class RecommendationStore:
+    def __init__(self, path='recommendations.db', max_age_days=30):
+        """
+        Durable SQLite store of recommendation queries and their results.
+
+        Every query is logged (time, region, quantized inputs, whether it was answered
+        from the store) for demand analytics, and every computed result is kept keyed by
+        the quantized input and version (model and market data), so a later query on the
+        same grid point is answered without rescoring, from any session and region
+        (recommendations do not depend on the region). The database runs in WAL
+        mode, so the app's sessions can read while one of them writes.
+
+        Args:
+            path: SQLite database file
+            max_age_days: Stored results older than this are recomputed
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        params = ', '.join(f'{param} REAL' for param in QUANTIZATION)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (input_key TEXT, version TEXT, "
+                "created_at INTEGER, results TEXT, PRIMARY KEY (input_key, version))")
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS queries (id INTEGER PRIMARY KEY, created_at INTEGER, region TEXT, "
+                f"input_key TEXT, {params}, month INTEGER, version TEXT, reused INTEGER)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS queries_time ON queries (created_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS queries_region ON queries (region, created_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS queries_input ON queries (input_key, region)")
+
+    def close(self):
+        self.connection.close()
+
+    def lookup(self, soil_params, version=None):
+        """
+        Get stored results for a query's grid point.
+
+        Args:
+            soil_params: Dict of soil parameters (and month)
+            version: Version the results must have been computed with
+
+        Returns:
+            List of recommendation dicts, or None if nothing recent is stored
+        """
+        input_key, _ = quantize(soil_params)
+        oldest = int(time.time()) - self.max_age_days * 86400
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT results FROM results WHERE input_key = ? AND version = ? AND created_at >= ?",
+                (input_key, version or '', oldest)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def record(self, soil_params, results=None, region=None, version=None, reused=False):
+        """
+        Log a query and, for a computed result, store it for reuse.
+
+        Args:
+            soil_params: Dict of soil parameters (and month)
+            results: List of JSON-serializable recommendation dicts; stored unless reused
+            region: Region name, defaults to DEFAULT_REGION
+            version: Version the results were computed with
+            reused: The query was answered from the store
+        """
+        input_key, quantized = quantize(soil_params)
+        region = region or DEFAULT_REGION
+        now = int(time.time())
+        with self._lock, self.connection:
+            self.connection.execute(
+                f"INSERT INTO queries (created_at, region, input_key, {', '.join(quantized)}, version, reused) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(quantized))}, ?, ?)",
+                (now, region, input_key, *quantized.values(), version or '', int(reused)))
+            if results is not None and not reused:
+                self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                        (input_key, version or '', now, json.dumps(results)))
+
+    def recent(self, region=None, limit=20):
+        """
+        Get the latest logged queries.
+
+        Args:
+            region: Only this region's queries, defaults to all
+            limit: Maximum number of queries
+
+        Returns:
+            List of dicts with created_at, region, the quantized inputs, month and reused
+        """
+        columns = ['created_at', 'region', *QUANTIZATION, 'month', 'reused']
+        query = f"SELECT {', '.join(columns)} FROM queries"
+        args = ()
+        if region is not None:
+            query += " WHERE region = ?"
+            args = (region,)
+        with self._lock:
+            rows = self.connection.execute(query + " ORDER BY created_at DESC, id DESC LIMIT ?", (*args, limit)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def hotspots(self, days=7, region=None, limit=10):
+        """
+        Find the most requested grid points.
+
+        Args:
+            days: Look-back window in days
+            region: Only this region's queries, defaults to all
+            limit: Number of hotspots
+
+        Returns:
+            List of dicts with input_key, region, queries, reused and last_seen, most
+            requested first
+        """
+        since = int(time.time()) - days * 86400
+        query = ("SELECT input_key, region, COUNT(*), SUM(reused), MAX(created_at) FROM queries "
+                 "WHERE created_at >= ?")
+        args = (since,)
+        if region is not None:
+            query += " AND region = ?"
+            args += (region,)
+        query += " GROUP BY input_key, region ORDER BY COUNT(*) DESC LIMIT ?"
+        with self._lock:
+            rows = self.connection.execute(query, (*args, limit)).fetchall()
+        return [dict(zip(('input_key', 'region', 'queries', 'reused', 'last_seen'), row)) for row in rows]
+
+    def summary(self, days=7):
+        """
+        Query volume and reuse per region.
+
+        Args:
+            days: Look-back window in days
+
+        Returns:
+            List of dicts with region, queries, reused and reuse_rate
+        """
+        since = int(time.time()) - days * 86400
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT region, COUNT(*), SUM(reused) FROM queries WHERE created_at >= ? "
+                "GROUP BY region ORDER BY COUNT(*) DESC", (since,)).fetchall()
+        return [{'region': region, 'queries': queries, 'reused': reused, 'reuse_rate': reused / queries}
+                for region, queries, reused in rows]
+
+    def prune(self):
+        """Delete stored results older than max_age_days. Returns the number deleted."""
+        oldest = int(time.time()) - self.max_age_days * 86400
+        with self._lock, self.connection:
+            return self.connection.execute("DELETE FROM results WHERE created_at < ?", (oldest,)).rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on the recommendation store: demand hotspots and result reuse.")
+    parser.add_argument('command', choices=['hotspots', 'summary', 'prune'],
+                        help="most requested inputs, queries and reuse per region, or delete expired results")
+    parser.add_argument('--database', default='recommendations.db', help="Store file (default: recommendations.db)")
+    parser.add_argument('--days', type=int, default=7, help="Look-back window in days (default: 7)")
+    parser.add_argument('--region', help="Only this region")
+    parser.add_argument('--limit', type=int, default=10, help="Number of hotspots (default: 10)")
+    args = parser.parse_args(argv)
+
+    store = RecommendationStore(args.database)
+    if args.command == 'hotspots':
+        print("queries  reused  region           N|P|K|pH|temp|humidity|rain|month")
+        for hotspot in store.hotspots(args.days, args.region, args.limit):
+            print(f"{hotspot['queries']:>7}  {hotspot['reused']:>6}  {hotspot['region']:<15}  {hotspot['input_key']}")
+    elif args.command == 'summary':
+        for row in store.summary(args.days):
+            print(f"{row['region']:<15}  queries={row['queries']}  reused={row['reused']}  reuse_rate={row['reuse_rate']:.1%}")
+    else:
+        print(f"Deleted {store.prune()} expired results")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
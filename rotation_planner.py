@@ -0,0 +1,225 @@
+import numpy as np
+
+from soil_simulator import NUTRIENTS, SoilSimulator
+
+
+class RotationPlanner:
+    def __init__(self, data_processor, repeat_penalty=0.15, soil_simulator=None):
+        """
+        Plan sequences of plantings (crop rotations) over a multi-month horizon.
+
+        Crops can only be planted in season, occupy the field for their growing_days,
+        and earn their combined soil/market score for every month they occupy it.
+        Planting the same crop twice in a row is discounted by repeat_penalty.
+
+        Args:
+            data_processor: DataProcessor instance providing the catalog and scoring
+            repeat_penalty: Fraction of the score lost when a crop follows itself
+            soil_simulator: SoilSimulator used by plan_with_depletion, defaults to SoilSimulator()
+        """
+        self.data_processor = data_processor
+        self.repeat_penalty = repeat_penalty
+        self.soil_simulator = soil_simulator or SoilSimulator(data_processor)
+
+        crop_catalog = data_processor.crop_catalog
+        self.crop_names = crop_catalog.names
+        self.seasons = crop_catalog.column('season')
+        self.growing_days = crop_catalog.column('growing_days')
+        self.durations = crop_catalog.growing_months()
+
+        # In-season mask for each calendar month (row 0 is January)
+        self.season_masks = np.zeros((12, len(self.crop_names)), dtype=bool)
+        for month in range(1, 13):
+            self.season_masks[month - 1, data_processor.get_season_candidates(month)] = True
+
+    def market_matrix(self, year=None):
+        """
+        Get the market score of every crop for every calendar month.
+
+        Args:
+            year: Market year, defaults to the latest year with data for each month
+
+        Returns:
+            Array of shape (12, n_crops)
+        """
+        return np.vstack([self.data_processor.get_market_scores(month, year) for month in range(1, 13)])
+
+    def score_matrix(self, soil_params, year=None):
+        """
+        Precompute the combined score of planting every crop in every calendar month.
+
+        Args:
+            soil_params: Dict of soil parameters
+            year: Market year, see market_matrix
+
+        Returns:
+            Tuple (combined, soil, market) of arrays with shape (12, n_crops)
+        """
+        soil = self.data_processor.get_soil_compatibility_scores(soil_params)
+        market = self.market_matrix(year)
+        # Same 60/40 weighting as DataProcessor.get_combined_score
+        combined = 0.6 * soil[None, :] + 0.4 * market
+        return combined, np.broadcast_to(soil, market.shape), market
+
+    def plan(self, soil_params, start_month, years=1, year=None):
+        """
+        Find the best rotation with dynamic programming over (month, previous crop).
+
+        The soil is assumed to stay as given; use plan_with_depletion to model nutrient
+        uptake between plantings.
+
+        Args:
+            soil_params: Dict of soil parameters
+            start_month: First month of the plan (1-12)
+            years: Planning horizon in years (1-3)
+            year: Market year, see market_matrix
+
+        Returns:
+            Dict with 'plantings' (list of dicts in planting order) and 'score' (mean
+            score per month of the horizon, 0-1)
+        """
+        combined, soil, market = self.score_matrix(soil_params, year)
+        horizon = 12 * years
+        n_crops = len(self.crop_names)
+        fallow = n_crops  # "previous crop" state after an empty month or at the start
+
+        # value[t, last]: best total score from month t onwards given the previous crop
+        value = np.zeros((horizon + 1, n_crops + 1))
+        choice = np.full((horizon, n_crops + 1), -1, dtype=int)
+        crops = np.arange(n_crops)
+
+        for t in range(horizon - 1, -1, -1):
+            month_index = (start_month - 1 + t) % 12
+            # Crops running past the horizon only earn the months inside it
+            months_used = np.minimum(self.durations, horizon - t)
+            next_t = t + months_used
+            gain = combined[month_index] * months_used + value[next_t, crops]
+            gain = np.where(self.season_masks[month_index], gain, -np.inf)
+
+            # Rows are the previous crop; repeating it loses part of its score
+            gains = np.broadcast_to(gain, (n_crops + 1, n_crops)).copy()
+            gains[crops, crops] -= self.repeat_penalty * combined[month_index] * months_used
+
+            best = np.argmax(gains, axis=1)
+            best_gain = gains[np.arange(n_crops + 1), best]
+            leave_fallow = value[t + 1, fallow]
+            plant = best_gain > leave_fallow
+            value[t] = np.where(plant, best_gain, leave_fallow)
+            choice[t] = np.where(plant, best, -1)
+
+        # Follow the choices forward from the start
+        path = []
+        t, last = 0, fallow
+        while t < horizon:
+            c = choice[t, last]
+            if c < 0:
+                t, last = t + 1, fallow
+                continue
+            path.append((t, c))
+            t, last = t + min(self.durations[c], horizon - t), c
+
+        return self._build_plan(path, start_month, horizon, combined, soil, market, year,
+                                total=value[0, fallow])
+
+    def plan_with_depletion(self, soil_params, start_month, years=1, year=None, beam_width=64,
+                            fertilizer=None):
+        """
+        Find a good rotation with beam search, tracking soil nutrients between plantings.
+
+        The soil simulator applies each crop's N/P/K uptake (and any fertilizer) after every
+        planting, so later plantings are scored against the soil left by earlier ones. All
+        partial plans of a month are scored in one vectorized call.
+
+        Args:
+            soil_params: Dict of soil parameters
+            start_month: First month of the plan (1-12)
+            years: Planning horizon in years (1-3)
+            year: Market year, see market_matrix
+            beam_width: Number of partial plans kept per month
+            fertilizer: Optional N/P/K added at every planting
+
+        Returns:
+            Dict as returned by plan(), with each planting scored against the soil at that time
+        """
+        horizon = 12 * years
+        market = self.market_matrix(year)
+        other_params = {param: value for param, value in soil_params.items()
+                        if param in self.data_processor.soil_params_range and param not in NUTRIENTS}
+        start_soil = np.array([soil_params[nutrient] for nutrient in NUTRIENTS], dtype=float)
+
+        # Partial plans waiting at each month: (value, soil N/P/K, previous crop, plantings)
+        buckets = [[] for _ in range(horizon + 1)]
+        buckets[0].append((0.0, start_soil, -1, ()))
+
+        for t in range(horizon):
+            beam = sorted(buckets[t], key=lambda state: -state[0])[:beam_width]
+            buckets[t] = []
+            if not beam:
+                continue
+            month_index = (start_month - 1 + t) % 12
+            totals = np.array([state[0] for state in beam])
+            soils = np.array([state[1] for state in beam])
+            lasts = np.array([state[2] for state in beam])
+
+            # Leaving the field empty for a month keeps every plan, with a month of recovery
+            rested = self.soil_simulator.step(soils, np.full(len(beam), -1), months=1)
+            for b, (total, _, _, plantings) in enumerate(beam):
+                buckets[t + 1].append((total, rested[b], -1, plantings))
+
+            # Score every crop against every plan's soil (after fertilizer) at once
+            planting_soils = soils if fertilizer is None else np.clip(soils + fertilizer, 0, self.soil_simulator.upper_limits)
+            soil_scores = self.soil_simulator.score(planting_soils, other_params)
+            combined = 0.6 * soil_scores + 0.4 * market[month_index]
+            months_used = np.minimum(self.durations, horizon - t)
+
+            # Expand every plan with every in-season crop at once: (plan, crop) arrays
+            candidates = np.flatnonzero(self.season_masks[month_index])
+            gains = combined[:, candidates] * months_used[candidates]
+            gains = gains - np.where(lasts[:, None] == candidates, self.repeat_penalty * gains, 0)
+            values = totals[:, None] + gains
+
+            # Only the best beam_width expansions per destination month can survive pruning
+            for months in np.unique(months_used[candidates]):
+                columns = np.flatnonzero(months_used[candidates] == months)
+                keep = np.argsort(-values[:, columns].ravel(), kind='stable')[:beam_width]
+                rows, kept = np.unravel_index(keep, (len(beam), len(columns)))
+                crops = candidates[columns[kept]]
+                next_soils = self.soil_simulator.step(planting_soils[rows], crops, months=months)
+                for b, k, c, soil in zip(rows, kept, crops, next_soils):
+                    planting = (t, c, soil_scores[b, c], combined[b, c])
+                    buckets[t + months].append((values[b, columns[k]], soil, c, beam[b][3] + (planting,)))
+
+        best = max(buckets[horizon], key=lambda state: state[0])
+        plantings = []
+        for t, c, soil_score, combined_score in best[3]:
+            plantings.append(self._planting(t, c, start_month, horizon, combined_score, soil_score,
+                                            market[(start_month - 1 + t) % 12, c], year))
+        return {'plantings': plantings, 'score': float(best[0] / horizon)}
+
+    def _build_plan(self, path, start_month, horizon, combined, soil, market, year, total):
+        plantings = []
+        for t, c in path:
+            month_index = (start_month - 1 + t) % 12
+            plantings.append(self._planting(t, c, start_month, horizon, combined[month_index, c],
+                                            soil[month_index, c], market[month_index, c], year))
+        return {'plantings': plantings, 'score': float(total / horizon)}
+
+    def _planting(self, t, c, start_month, horizon, combined_score, soil_score, market_score, year):
+        """Describe one planting of a plan with native Python values."""
+        start_year = self.data_processor.resolve_market_year(start_month, year) or 0
+        planting = int(start_year * 12 + start_month - 1 + t)
+        harvest = planting + int(self.durations[c])
+        return {
+            'crop_name': str(self.crop_names[c]),
+            'planting_month': planting % 12 + 1,
+            'planting_year': planting // 12,
+            'harvest_month': harvest % 12 + 1,
+            'harvest_year': harvest // 12,
+            'growing_days': int(self.growing_days[c]),
+            'season': str(self.seasons[c]),
+            'combined_score': float(combined_score),
+            'soil_score': float(soil_score),
+            'market_score': float(market_score),
+            # Plantings cut off by the end of the horizon are marked
+            'completes_in_horizon': bool(t + self.durations[c] <= horizon)
+        }
@@ -0,0 +1,237 @@
+import sqlite3
+import sys
+import threading
+import time
+import numpy as np
+
+# Soil parameters stored per history record, NaN when the profile did not have them
+HISTORY_PARAMS = ('nitrogen', 'phosphorus', 'potassium', 'ph', 'temperature', 'humidity', 'rainfall')
+TOP_CROPS = 3
+
+# One fixed-width record (43 bytes) per recommendation request
+HISTORY_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    *[(param, np.float32) for param in HISTORY_PARAMS],
+    ('month', np.int8),
+    ('top_crops', np.int16, (TOP_CROPS,))
+])
+
+
+class SessionHistory:
+    def __init__(self, crop_catalog, capacity=50, spill_path=None, session_id=None, max_spilled=500, max_age_days=30):
+        """
+        Bounded recommendation history: a ring buffer of fixed-width records.
+
+        Each request is one HISTORY_DTYPE record (timestamp, soil parameters as float32,
+        month and the top crops as catalog positions) instead of a dict of Python objects,
+        and at most capacity records are kept, so a session's history has a fixed size
+        however long it lives. Records pushed out of the buffer are dropped, or appended
+        to a local SQLite file when spill_path is set. The file keeps at most max_spilled
+        records per session, and records older than max_age_days (from any session,
+        including ones that have ended) are deleted when a history first opens it.
+
+        Args:
+            crop_catalog: CropCatalog the stored crop positions refer to (shared, not copied)
+            capacity: Records kept in memory
+            spill_path: Optional SQLite file receiving records pushed out of the buffer
+            session_id: Key of this session's records in the spill file
+            max_spilled: Records kept in the spill file for this session
+            max_age_days: Spilled records older than this are deleted
+        """
+        self.crop_catalog = crop_catalog
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        self.count = 0
+        self.spill_path = spill_path
+        self.session_id = session_id
+        self.max_spilled = max_spilled
+        self.max_age_days = max_age_days
+        # Opened on the first spill or read, then kept for the life of the history
+        self.connection = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self):
+        """Memory held by the record buffer."""
+        return self.records.nbytes
+
+    def append(self, soil_params, top_crops, timestamp=None):
+        """
+        Add a request to the history, spilling or dropping the oldest record when full.
+
+        Args:
+            soil_params: Dict of soil parameters (and month)
+            top_crops: Names of the top recommended crops, best first
+            timestamp: Unix time of the request, defaults to now
+        """
+        slot = self.count % self.capacity
+        if self.count >= self.capacity and self.spill_path:
+            self._spill(self.records[slot])
+
+        record = self.records[slot]
+        record['timestamp'] = int(time.time() if timestamp is None else timestamp)
+        for param in HISTORY_PARAMS:
+            record[param] = soil_params.get(param, np.nan)
+        record['month'] = soil_params.get('month', 0)
+        positions = [self.crop_catalog.index_of(name) for name in top_crops[:TOP_CROPS]]
+        positions = [-1 if i is None else i for i in positions]
+        record['top_crops'] = positions + [-1] * (TOP_CROPS - len(positions))
+        self.count += 1
+
+    def entries(self):
+        """
+        Get the buffered records as dicts, newest first.
+
+        Returns:
+            List of dicts with timestamp, soil_params and top_recommendations
+        """
+        newest = (self.count - 1) % self.capacity
+        order = [(newest - i) % self.capacity for i in range(len(self))]
+        return [self._entry(self.records[i]) for i in order]
+
+    def _entry(self, record):
+        soil_params = {param: float(record[param]) for param in HISTORY_PARAMS if not np.isnan(record[param])}
+        soil_params['month'] = int(record['month'])
+        return {
+            'timestamp': int(record['timestamp']),
+            'soil_params': soil_params,
+            'top_recommendations': [self.crop_catalog.records[i]['crop_name'] for i in record['top_crops'] if i >= 0]
+        }
+
+    def _connect(self):
+        if self.connection is None:
+            # Streamlit reruns a session's script on different threads; the lock serializes use
+            self.connection = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            columns = ', '.join(f'{param} REAL' for param in HISTORY_PARAMS)
+            with self.connection:
+                self.connection.execute(f"CREATE TABLE IF NOT EXISTS history (session TEXT, timestamp INTEGER, "
+                                        f"{columns}, month INTEGER, top_crops TEXT)")
+                self.connection.execute("CREATE INDEX IF NOT EXISTS history_session ON history (session, timestamp)")
+                self.connection.execute("CREATE INDEX IF NOT EXISTS history_time ON history (timestamp)")
+            self._prune_expired()
+        return self.connection
+
+    def _prune_expired(self):
+        oldest = int(time.time()) - self.max_age_days * 86400
+        with self.connection:
+            return self.connection.execute("DELETE FROM history WHERE timestamp < ?", (oldest,)).rowcount
+
+    def prune(self):
+        """Delete spilled records older than max_age_days. Returns the number deleted."""
+        if not self.spill_path:
+            return 0
+        with self._lock:
+            self._connect()
+            return self._prune_expired()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _spill(self, record):
+        entry = self._entry(record)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    f"INSERT INTO history VALUES (?, ?, {', '.join('?' * len(HISTORY_PARAMS))}, ?, ?)",
+                    (self.session_id, entry['timestamp'],
+                     *[entry['soil_params'].get(param) for param in HISTORY_PARAMS],
+                     entry['soil_params']['month'], ','.join(entry['top_recommendations'])))
+                # Keep the newest max_spilled records of this session
+                connection.execute(
+                    "DELETE FROM history WHERE session = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM history WHERE session = ? ORDER BY timestamp DESC, rowid DESC LIMIT ?)",
+                    (self.session_id, self.session_id, self.max_spilled))
+
+    def spilled(self, limit=50):
+        """
+        Get this session's records that were spilled to SQLite, newest first.
+
+        Args:
+            limit: Maximum number of records
+
+        Returns:
+            List of dicts like entries()
+        """
+        if not self.spill_path:
+            return []
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM history WHERE session = ? ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+                (self.session_id, limit)).fetchall()
+        return [{
+            'timestamp': row[1],
+            'soil_params': {**{param: value for param, value in zip(HISTORY_PARAMS, row[2:-2]) if value is not None},
+                            'month': row[-2]},
+            'top_recommendations': row[-1].split(',') if row[-1] else []
+        } for row in rows]
+
+
+def compact_recommendation(recommendation):
+    """
+    Copy a recommendation dict with NumPy scalars replaced by plain Python numbers.
+
+    Args:
+        recommendation: Recommendation dict, possibly with nested dicts (e.g. attributions)
+
+    Returns:
+        Dict with the same keys
+    """
+    compact = {}
+    for key, value in recommendation.items():
+        if isinstance(value, dict):
+            value = compact_recommendation(value)
+        elif isinstance(value, np.generic):
+            value = value.item()
+        compact[key] = value
+    return compact
+
+
+def deep_sizeof(value, seen=None):
+    """
+    Estimate the memory held by an object and everything it references.
+
+    NumPy arrays count their buffers; containers count their items. Shared objects are
+    counted once.
+
+    Args:
+        value: Any object
+        seen: Ids of objects already counted (used by the recursion)
+
+    Returns:
+        Size in bytes
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    # Arrays owning their data include the buffer in getsizeof
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    elif isinstance(value, SessionHistory):
+        # The crop catalog is shared by every session
+        size += deep_sizeof(value.records, seen)
+    return size
+
+
+def session_memory(session_state):
+    """
+    Per-key memory accounting of a session's state.
+
+    Args:
+        session_state: Mapping of keys to values (e.g. st.session_state)
+
+    Returns:
+        Dict of key to estimated bytes, largest first
+    """
+    sizes = {key: deep_sizeof(value) for key, value in session_state.items()}
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
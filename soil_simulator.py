@@ -0,0 +1,128 @@
+import numpy as np
+
+NUTRIENTS = ('nitrogen', 'phosphorus', 'potassium')
+# Share of a crop's N/P/K requirement removed from the soil by one planting
+DEFAULT_UPTAKE_RATES = (0.3, 0.3, 0.3)
+
+
+class SoilSimulator:
+    def __init__(self, data_processor, uptake_rates=DEFAULT_UPTAKE_RATES, recovery=(0.0, 0.0, 0.0)):
+        """
+        Simulate soil N/P/K over a sequence of plantings for many fields and scenarios at once.
+
+        Soil states are arrays whose last axis is (nitrogen, phosphorus, potassium); any
+        leading axes (fields, scenarios, ...) are simulated in parallel. Crops are catalog
+        positions, with -1 for an empty (fallow) step.
+
+        Args:
+            data_processor: DataProcessor instance providing the catalog and soil scoring
+            uptake_rates: Share of each N/P/K requirement a crop removes from the soil
+            recovery: N/P/K regained per month from natural processes (e.g. mineralization)
+        """
+        self.data_processor = data_processor
+        crop_catalog = data_processor.crop_catalog
+        requirements = np.column_stack([crop_catalog.column(f'{nutrient}_requirement') for nutrient in NUTRIENTS])
+
+        # One extra zero row so crop index -1 (fallow) takes nothing up
+        self.uptake = np.vstack([requirements * np.asarray(uptake_rates, dtype=float), np.zeros(3)])
+        self.recovery = np.asarray(recovery, dtype=float)
+        self.upper_limits = np.array([data_processor.soil_params_range[nutrient][1] for nutrient in NUTRIENTS], dtype=float)
+
+    def step(self, state, crops, fertilizer=None, months=0):
+        """
+        Apply fertilizer, one planting and the months it spends on the field.
+
+        Args:
+            state: Array (..., 3) of soil N/P/K before planting
+            crops: Integer array broadcastable to state.shape[:-1], -1 for no crop
+            fertilizer: Optional array broadcastable to (..., 3) added before planting
+            months: Months until the next planting, for recovery
+
+        Returns:
+            Array (..., 3) of soil N/P/K before the next planting
+        """
+        if fertilizer is not None:
+            state = state + fertilizer
+        state = state - self.uptake[crops] + self.recovery * np.asarray(months, dtype=float)[..., None]
+        return np.clip(state, 0, self.upper_limits)
+
+    def simulate(self, initial, crops, fertilizer=None, months=None):
+        """
+        Run a sequence of plantings.
+
+        Args:
+            initial: Array (..., 3) of starting soil N/P/K
+            crops: Integer array (..., T) of catalog positions, -1 for no crop
+            fertilizer: Optional array (..., T, 3) of N/P/K added at each planting
+            months: Optional array broadcastable to (..., T) of months spent per planting
+                    (defaults to each crop's growing_days in months, 1 for fallow steps)
+
+        Returns:
+            Tuple (planting_soil, final_soil): soil at each planting after fertilizer,
+            shape (..., T, 3), and the soil after the last planting, shape (..., 3)
+        """
+        crops = np.asarray(crops, dtype=int)
+        if months is None:
+            # Extra entry so fallow steps (-1) last one month
+            months = np.append(self.data_processor.crop_catalog.growing_months(), 1)[crops]
+        months = np.broadcast_to(np.asarray(months, dtype=float), crops.shape)
+
+        state = np.broadcast_to(np.asarray(initial, dtype=float), crops.shape[:-1] + (3,))
+        planting_soil = np.empty(crops.shape + (3,))
+        for t in range(crops.shape[-1]):
+            if fertilizer is not None:
+                state = state + np.asarray(fertilizer)[..., t, :]
+            state = np.clip(state, 0, self.upper_limits)
+            planting_soil[..., t, :] = state
+            state = self.step(state, crops[..., t], months=months[..., t])
+        return planting_soil, state
+
+    def score(self, soil, other_params, crops=None):
+        """
+        Score soil N/P/K states against every crop, or against one crop per state.
+
+        Args:
+            soil: Array (..., 3) of soil N/P/K
+            other_params: Dict of the other soil parameters (ph required; temperature,
+                          humidity and rainfall optional), scalars or arrays
+                          broadcastable to soil.shape[:-1]
+            crops: Optional integer array (...) of catalog positions to score against
+
+        Returns:
+            Array soil.shape[:-1] + (n_crops,) of compatibility scores (0-1), or
+            soil.shape[:-1] if crops is given
+        """
+        params = {param: value for param, value in other_params.items() if param not in NUTRIENTS}
+        for i, nutrient in enumerate(NUTRIENTS):
+            params[nutrient] = soil[..., i]
+        return self.data_processor.get_soil_compatibility_array(params, crops)
+
+    def evaluate(self, initial, crops, other_params, fertilizer=None, months=None):
+        """
+        Simulate crop/fertilizer scenarios and score every planting against the soil at that time.
+
+        Args:
+            initial: Array (..., 3) of starting soil N/P/K
+            crops: Integer array (..., T) of catalog positions, -1 for no crop
+            other_params: Dict of the other soil parameters, see score()
+            fertilizer: Optional array (..., T, 3) of N/P/K added at each planting
+            months: Optional months per planting, see simulate()
+
+        Returns:
+            Dict with planting_soil (..., T, 3), final_soil (..., 3), soil_scores (..., T)
+            with NaN for fallow steps, and mean_score (...) over the planted steps
+        """
+        crops = np.asarray(crops, dtype=int)
+        planting_soil, final_soil = self.simulate(initial, crops, fertilizer, months)
+        # Score each planting against its own crop only
+        soil_scores = self.score(planting_soil, other_params, np.maximum(crops, 0))
+        planted = crops >= 0
+        soil_scores = np.where(planted, soil_scores, np.nan)
+        # Mean over planted steps, 0 for scenarios without any planting
+        mean_score = np.where(planted, soil_scores, 0).sum(axis=-1) / np.maximum(planted.sum(axis=-1), 1)
+        return {
+            'planting_soil': planting_soil,
+            'final_soil': final_soil,
+            'soil_scores': soil_scores,
+            'mean_score': mean_score
+        }
@@ -0,0 +1,138 @@
+import argparse
+import base64
+import gzip
+import json
+from datetime import datetime
+
+from data_processor import DataProcessor
+from explanation_generator import ExplanationGenerator
+from market_trend_analyzer import MarketTrendAnalyzer
+
+# Soil type -> label and a representative profile for it; the static page asks for the
+# soil type rather than lab values
+SOIL_TYPES = {
+    'alluvial': ('Alluvial', {'nitrogen': 90, 'phosphorus': 45, 'potassium': 60, 'ph': 7.0}),
+    'black': ('Black (regur)', {'nitrogen': 60, 'phosphorus': 40, 'potassium': 100, 'ph': 7.8}),
+    'red': ('Red', {'nitrogen': 50, 'phosphorus': 30, 'potassium': 50, 'ph': 6.2}),
+    'laterite': ('Laterite', {'nitrogen': 40, 'phosphorus': 25, 'potassium': 40, 'ph': 5.5}),
+    'loamy': ('Loamy', {'nitrogen': 100, 'phosphorus': 55, 'potassium': 70, 'ph': 6.5}),
+    'sandy': ('Sandy / desert', {'nitrogen': 30, 'phosphorus': 20, 'potassium': 35, 'ph': 8.0})
+}
+SEASON_LABELS = {
+    'kharif': 'Kharif (Jun-Sep)',
+    'rabi': 'Rabi (Oct-Feb)',
+    'summer': 'Summer / zaid (Mar-May)'
+}
+
+
+def build_bundle(data_processor=None, market_analyzer=None, explanation_generator=None, top_k=5):
+    """
+    Precompute recommendations and explanations for every soil type and season.
+
+    Crops are ranked with the rule-based scores (soil compatibility and market score,
+    as DataProcessor.get_top_recommendations) averaged over the season's months.
+    Explanations use the season's first month and its market metrics. Crop names and
+    explanations are stored once and referenced by position.
+
+    Args:
+        data_processor: DataProcessor, created if not given
+        market_analyzer: MarketTrendAnalyzer, created if not given
+        explanation_generator: ExplanationGenerator, created if not given
+        top_k: Recommendations per soil type and season
+
+    Returns:
+        Dict with soil_types, seasons, crops, explanations and recommendations, which
+        maps 'soil_type|season' to lists of [crop, combined, soil, market, explanation]
+        (scores in percent, crop and explanation as positions)
+    """
+    data_processor = data_processor or DataProcessor()
+    market_analyzer = market_analyzer or MarketTrendAnalyzer()
+    explanation_generator = explanation_generator or ExplanationGenerator()
+    n_crops = len(data_processor.crop_catalog)
+
+    crops, crop_positions = [], {}
+    explanations, explanation_positions = [], {}
+    recommendations = {}
+    for soil_type, (_, profile) in SOIL_TYPES.items():
+        for season in SEASON_LABELS:
+            months = data_processor.season_mapping[season]
+            totals = {}
+            for month in months:
+                # The catalog can list a crop twice; count it once per month
+                month_recs = data_processor.get_top_recommendations(profile, month, limit=n_crops)
+                for rec in {rec['crop_name']: rec for rec in month_recs}.values():
+                    total = totals.setdefault(rec['crop_name'], dict(rec, combined_score=0.0, soil_score=0.0, market_score=0.0))
+                    for score in ('combined_score', 'soil_score', 'market_score'):
+                        total[score] += rec[score] / len(months)
+            ranked = sorted(totals.values(), key=lambda rec: rec['combined_score'], reverse=True)[:top_k]
+
+            entries = []
+            for rec in ranked:
+                crop_name = rec['crop_name']
+                if crop_name not in crop_positions:
+                    crop_positions[crop_name] = len(crops)
+                    crops.append(crop_name)
+                explanation = explanation_generator.generate_comprehensive_explanation(
+                    rec, dict(profile, month=months[0]), market_analyzer.get_market_metrics(crop_name, months[0]), months[0])
+                if explanation not in explanation_positions:
+                    explanation_positions[explanation] = len(explanations)
+                    explanations.append(explanation)
+                entries.append([crop_positions[crop_name],
+                                round(float(rec['combined_score']) * 100),
+                                round(float(rec['soil_score']) * 100),
+                                round(float(rec['market_score']) * 100),
+                                explanation_positions[explanation]])
+            recommendations[f'{soil_type}|{season}'] = entries
+
+    return {
+        'generated_at': datetime.now().strftime("%Y-%m-%d"),
+        'market_version': market_analyzer.market_version,
+        'soil_types': {soil_type: label for soil_type, (label, _) in SOIL_TYPES.items()},
+        'seasons': SEASON_LABELS,
+        'crops': crops,
+        'explanations': explanations,
+        'recommendations': recommendations
+    }
+
+
+def write_bundle(bundle, path):
+    """
+    Write a bundle as gzip-compressed JSON.
+
+    A .js path gets a script assigning the base64 of the compressed JSON to
+    window.CROP_BUNDLE, which a page can load with a script tag even from file://;
+    any other path gets the raw .json.gz bytes.
+
+    Args:
+        bundle: Dict returned by build_bundle
+        path: Output file
+
+    Returns:
+        Size of the written file in bytes
+    """
+    compressed = gzip.compress(json.dumps(bundle, separators=(',', ':')).encode('utf-8'), compresslevel=9, mtime=0)
+    if path.endswith('.js'):
+        content = f'window.CROP_BUNDLE = "{base64.b64encode(compressed).decode("ascii")}";\n'.encode('ascii')
+    else:
+        content = compressed
+    with open(path, 'wb') as f:
+        f.write(content)
+    return len(content)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export precomputed recommendations for index.html to answer offline, keyed by soil type and season.")
+    parser.add_argument('--output', default='crop_bundle.js',
+                        help="Output file: .js for the page's script bundle, else gzip JSON (default: crop_bundle.js)")
+    parser.add_argument('--top-k', type=int, default=5, help="Recommendations per soil type and season (default: 5)")
+    args = parser.parse_args(argv)
+
+    bundle = build_bundle(top_k=args.top_k)
+    size = write_bundle(bundle, args.output)
+    print(f"Wrote {len(bundle['recommendations'])} soil type/season combinations "
+          f"({len(bundle['explanations'])} explanations) to {args.output}: {size / 1024:.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_report import BatchReportGenerator
+from crop_recommendation_model import CropRecommendationModel
+from data_processor import DataProcessor
+from explanation_generator import ExplanationGenerator
+from recommendation_engine import HybridRankingEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(n_estimators=10)
+    return HybridRankingEngine(DataProcessor(), crop_model)
+
+
+@pytest.fixture(scope='module')
+def soil_tests(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    n = 57
+    frame = pd.DataFrame({
+        'farm_id': [f'farm-{i}' for i in range(n)],
+        'nitrogen': rng.uniform(0, 200, n), 'phosphorus': rng.uniform(0, 150, n),
+        'potassium': rng.uniform(0, 200, n), 'ph': rng.uniform(4, 9, n),
+        'temperature': rng.uniform(5, 45, n), 'humidity': rng.uniform(10, 100, n),
+        'rainfall': rng.uniform(0, 300, n), 'month': rng.integers(1, 13, n)
+    })
+    frame.loc[3, 'ph'] = np.nan
+    frame.loc[8, 'humidity'] = np.nan
+    path = tmp_path_factory.mktemp('input') / 'soil_tests.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_resumed_run_matches_uninterrupted_run(engine, soil_tests, tmp_path):
+    generator = BatchReportGenerator(engine, explanation_generator=ExplanationGenerator())
+    expected = tmp_path / 'expected.csv'
+    generator.run(soil_tests, str(expected), chunk_size=10, id_column='farm_id')
+
+    output, checkpoint = tmp_path / 'report.csv', str(tmp_path / 'report.ckpt')
+    interrupted = BatchReportGenerator(engine, explanation_generator=ExplanationGenerator())
+    process_chunk = interrupted.process_chunk
+
+    def failing_chunk(chunk, first_row, *args):
+        if first_row >= 30:
+            raise RuntimeError("interrupted")
+        return process_chunk(chunk, first_row, *args)
+
+    interrupted.process_chunk = failing_chunk
+    with pytest.raises(RuntimeError):
+        interrupted.run(soil_tests, str(output), chunk_size=10, checkpoint_path=checkpoint, id_column='farm_id')
+    # A partly written chunk after the checkpoint is dropped on resume
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('30,farm-30,partial')
+
+    rows = generator.run(soil_tests, str(output), chunk_size=10, checkpoint_path=checkpoint, id_column='farm_id')
+    assert rows == 57
+    assert output.read_bytes() == expected.read_bytes()
+
+
+def test_rows_with_missing_values_get_no_crops(engine, soil_tests):
+    chunk = pd.read_csv(soil_tests)
+    report = BatchReportGenerator(engine, explanation_generator=ExplanationGenerator()).process_chunk(chunk)
+
+    assert report.loc[3, 'missing_values'] == 'ph'
+    assert report.loc[8, 'missing_values'] == 'humidity'
+    for row in (3, 8):
+        assert report.loc[row, 'crop_1'] == ''
+        assert np.isnan(report.loc[row, 'score_1'])
+        assert report.loc[row, 'explanation'] == ''
+    valid = report.drop(index=[3, 8])
+    assert (valid['missing_values'] == '').all()
+    assert (valid['crop_1'] != '').all()
+
+
+def test_missing_model_features_are_allowed_without_ml(engine, soil_tests):
+    chunk = pd.read_csv(soil_tests)
+    report = BatchReportGenerator(engine, use_ml=False).process_chunk(chunk)
+    assert report.loc[3, 'missing_values'] == 'ph'
+    assert report.loc[8, 'missing_values'] == ''
+    assert report.loc[8, 'crop_1'] != ''
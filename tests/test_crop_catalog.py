@@ -0,0 +1,75 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crop_catalog import CROP_FIELDS, CropCatalog
+from data_processor import DataProcessor
+
+
+@pytest.fixture(scope='module')
+def crop_data():
+    return pd.read_csv('data/crop_data.csv')
+
+
+@pytest.fixture(scope='module')
+def crop_catalog(crop_data):
+    return CropCatalog(crop_data)
+
+
+def test_records_match_dataframe_rows(crop_data, crop_catalog):
+    assert len(crop_catalog) == len(crop_data)
+    for record, (_, row) in zip(crop_catalog, crop_data.iterrows()):
+        for field in CROP_FIELDS:
+            assert record[field] == row[field]
+    for field in CROP_FIELDS:
+        np.testing.assert_array_equal(crop_catalog.column(field), crop_data[field].to_numpy())
+
+
+def test_lookup_by_name(crop_catalog):
+    rice = crop_catalog.get('rice')
+    assert rice.crop_name == 'rice'
+    assert 'rice' in crop_catalog
+    assert crop_catalog.get('not a crop') is None
+    assert crop_catalog.index_of('not a crop') is None
+    with pytest.raises(KeyError):
+        rice['not_a_field']
+
+
+def test_catalog_is_immutable(crop_catalog):
+    with pytest.raises(AttributeError):
+        crop_catalog.records[0].ph_min = 0
+    with pytest.raises(ValueError):
+        crop_catalog.column('ph_min')[0] = 0
+
+
+def test_records_pickle(crop_catalog):
+    record = pickle.loads(pickle.dumps(crop_catalog.records[0]))
+    assert record.to_dict() == crop_catalog.records[0].to_dict()
+
+
+def test_from_array_wraps_without_copying(crop_catalog):
+    wrapped = CropCatalog.from_array(crop_catalog.array)
+    assert wrapped.array is crop_catalog.array
+    assert [record.to_dict() for record in wrapped] == [record.to_dict() for record in crop_catalog]
+
+
+def test_soil_score_on_record_matches_series(crop_data, crop_catalog):
+    data_processor = DataProcessor()
+    soil_params = {'nitrogen': 80, 'phosphorus': 40, 'potassium': 45, 'ph': 6.2,
+                   'temperature': 28, 'humidity': 70, 'rainfall': 150}
+    for record, (_, row) in zip(crop_catalog, crop_data.iterrows()):
+        assert np.isclose(data_processor.get_soil_compatibility_score(record, soil_params),
+                          data_processor.get_soil_compatibility_score(row, soil_params))
+
+
+def test_season_positions_partition_the_catalog(crop_catalog):
+    seasons = crop_catalog.column('season')
+    all_positions = []
+    for season in np.unique(seasons):
+        positions = crop_catalog.season_positions(season)
+        np.testing.assert_array_equal(positions, np.flatnonzero(seasons == season))
+        all_positions.extend(positions)
+    assert sorted(all_positions) == list(range(len(crop_catalog)))
+    assert len(crop_catalog.season_positions('unknown')) == 0
@@ -0,0 +1,24 @@
+import pytest
+
+from crop_recommendation_model import CropRecommendationModel
+
+
+@pytest.fixture(scope='module')
+def crop_model():
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(n_estimators=10)
+    return crop_model
+
+
+def test_permutation_importance_without_test_split_raises(crop_model):
+    crop_model.training_data = None
+    crop_model.feature_importance = None
+    with pytest.raises(ValueError, match="test split"):
+        crop_model.get_feature_importance(kind='permutation')
+    # The impurity path still works and falls back as before
+    assert set(crop_model.get_feature_importance()) == set(crop_model.features)
+
+
+def test_unknown_importance_kind_raises(crop_model):
+    with pytest.raises(ValueError, match="Unknown feature importance kind"):
+        crop_model.get_feature_importance(kind='shap')
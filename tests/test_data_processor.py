@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crop_catalog import get_crop_catalog
+from data_processor import DataProcessor
+from market_forecaster import MARKET_METRICS
+
+
+@pytest.fixture(scope='module')
+def data_processor():
+    return DataProcessor()
+
+
+def test_market_score_cube_matches_get_market_score(data_processor):
+    years = sorted(data_processor.market_data['year'].unique())
+    for year in [years[0] - 1, *years, years[-1] + 1, None]:
+        for month in range(1, 13):
+            scores = data_processor.get_market_scores(month, year)
+            expected = [data_processor.get_market_score(crop, month, year) for crop in data_processor.crop_catalog.names]
+            np.testing.assert_allclose(scores, expected)
+
+
+def test_market_scores_without_market_data_are_neutral():
+    empty = pd.DataFrame(columns=['crop_name', 'month', 'year', *MARKET_METRICS])
+    data_processor = DataProcessor(crop_catalog=get_crop_catalog(), market_data=empty)
+    n_crops = len(data_processor.crop_catalog)
+    for year in (None, 2023):
+        np.testing.assert_array_equal(data_processor.get_market_scores(6, year), np.full(n_crops, 0.5))
+        assert data_processor.get_market_score('rice', 6, year) == 0.5
+
+
+def test_market_scores_for_crop_list_match_get_market_score(data_processor):
+    crops = ['wheat', 'not a crop', *data_processor.crop_catalog.names[::3]]
+    for month in (1, 6, 11):
+        np.testing.assert_allclose(data_processor._get_market_scores(crops, month),
+                                   [data_processor.get_market_score(crop, month) for crop in crops])
+
+
+def test_top_recommendations_match_combined_score(data_processor):
+    soil_params = {'nitrogen': 80, 'phosphorus': 45, 'potassium': 40, 'ph': 6.5,
+                   'temperature': 24, 'humidity': 70, 'rainfall': 120}
+    for month in (3, 7, 10):
+        recommendations = data_processor.get_top_recommendations(soil_params, month, limit=100)
+        season_crops = data_processor.filter_crops_by_season(month)
+        assert sorted(r['crop_name'] for r in recommendations) == sorted(season_crops['crop_name'])
+        expected = {crop['crop_name']: data_processor.get_combined_score(crop, soil_params, month)
+                    for _, crop in season_crops.iterrows()}
+        for recommendation in recommendations:
+            assert recommendation['combined_score'] == pytest.approx(expected[recommendation['crop_name']])
+        scores = [r['combined_score'] for r in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+
+def random_soil_params(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'nitrogen': rng.uniform(0, 200), 'phosphorus': rng.uniform(0, 150), 'potassium': rng.uniform(0, 200),
+             'ph': rng.uniform(4, 9), 'temperature': rng.uniform(5, 45), 'humidity': rng.uniform(10, 100),
+             'rainfall': rng.uniform(0, 300)} for _ in range(n)]
+
+
+def reference_soil_score(crop, soil_params):
+    """The per-crop formula as originally written, with plain Python arithmetic."""
+    def nutrient(value, requirement):
+        if value >= requirement:
+            return max(0.5, 1 - (value - requirement * 2) / (requirement * 2)) if value > requirement * 2 else 1.0
+        return value / requirement
+
+    def in_range(param, max_penalty_distance):
+        if param not in soil_params:
+            return 1
+        value, low, high = soil_params[param], crop[f'{param}_min'], crop[f'{param}_max']
+        if low <= value <= high:
+            return 1
+        return max(0, 1 - min(abs(value - low), abs(value - high)) / max_penalty_distance)
+
+    return (0.2 * nutrient(soil_params['nitrogen'], crop['nitrogen_requirement']) +
+            0.15 * nutrient(soil_params['phosphorus'], crop['phosphorus_requirement']) +
+            0.15 * nutrient(soil_params['potassium'], crop['potassium_requirement']) +
+            0.2 * in_range('ph', 2) + 0.1 * in_range('temperature', 10) +
+            0.1 * in_range('humidity', 20) + 0.1 * in_range('rainfall', 50))
+
+
+def test_soil_compatibility_implementations_agree(data_processor):
+    records = data_processor.crop_catalog.records
+    profiles = random_soil_params(40)
+    # Drop some optional parameters to cover their defaults
+    for i, param in enumerate(['temperature', 'humidity', 'rainfall'] * 3):
+        del profiles[i][param]
+    for soil_params in profiles:
+        expected = [reference_soil_score(crop, soil_params) for crop in records]
+        scalar = [data_processor.get_soil_compatibility_score(crop, soil_params) for crop in records]
+        np.testing.assert_allclose(scalar, expected)
+        np.testing.assert_allclose(data_processor.get_soil_compatibility_scores(soil_params), expected)
+        np.testing.assert_allclose(data_processor.get_soil_compatibility_array(soil_params), expected)
+
+    # The array version broadcasts profiles; NaN stands for a missing optional parameter
+    frame = pd.DataFrame(profiles)
+    expected = [[reference_soil_score(crop, soil_params) for crop in records] for soil_params in profiles]
+    np.testing.assert_allclose(data_processor.get_soil_compatibility_matrix(frame), expected)
+
+
+def test_soil_compatibility_of_crop_subsets(data_processor):
+    soil_params = random_soil_params(1, seed=1)[0]
+    all_scores = data_processor.get_soil_compatibility_scores(soil_params)
+    positions = data_processor.get_season_candidates(7)
+    season_crops = data_processor.filter_crops_by_season(7)
+    np.testing.assert_allclose(data_processor.get_soil_compatibility_scores(soil_params, season_crops),
+                               all_scores[positions])
+    np.testing.assert_allclose(data_processor.get_soil_compatibility_array(soil_params, positions),
+                               all_scores[positions])
+
+
+def test_soil_compatibility_requires_nutrients_and_ph(data_processor):
+    soil_params = {'nitrogen': 80, 'phosphorus': 40, 'potassium': 40}
+    crop = data_processor.crop_catalog.records[0]
+    assert data_processor.get_soil_compatibility_score(crop, soil_params) == 0
+    np.testing.assert_array_equal(data_processor.get_soil_compatibility_scores(soil_params),
+                                  np.zeros(len(data_processor.crop_catalog)))
+    np.testing.assert_array_equal(data_processor.get_soil_compatibility_array({**soil_params, 'ph': np.nan}),
+                                  np.zeros(len(data_processor.crop_catalog)))
+
+
+def test_season_index_matches_boolean_filter(data_processor):
+    crop_data = data_processor.crop_data
+    for month in range(0, 14):
+        season = next((season for season, months in data_processor.season_mapping.items() if month in months), 'unknown')
+        assert data_processor.get_current_season(month) == season
+        for include_annual in (True, False):
+            mask = crop_data['season'] == season
+            if include_annual:
+                mask |= crop_data['season'] == 'annual'
+            candidates = data_processor.get_season_candidates(month, include_annual)
+            np.testing.assert_array_equal(candidates, np.flatnonzero(mask))
+            assert not candidates.flags.writeable
+            pd.testing.assert_frame_equal(data_processor.filter_crops_by_season(month, include_annual), crop_data[mask])
+
+
+def test_filtered_season_frames_are_independent_copies(data_processor):
+    season_crops = data_processor.filter_crops_by_season(7)
+    season_crops['season'] = 'changed'
+    season_crops.drop(season_crops.index[:2], inplace=True)
+    assert (data_processor.filter_crops_by_season(7)['season'] != 'changed').all()
+    assert len(data_processor.filter_crops_by_season(7)) == len(data_processor.get_season_candidates(7))
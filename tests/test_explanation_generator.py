@@ -0,0 +1,176 @@
+import random
+
+import pytest
+
+from explanation_generator import ExplanationGenerator
+
+# Boundary values of every band ladder, and values just either side of them
+SCORES = [0.0, 0.39, 0.4, 0.41, 0.59, 0.6, 0.61, 0.79, 0.8, 0.81, 1.0]
+MARKET_VALUES = [1, 3.9, 4, 4.1, 5, 5.9, 6, 6.1, 7, 7.1, 7.9, 8, 8.1, 10]
+SOIL_VALUES = {
+    'nitrogen': [0, 49, 50, 51, 99, 100, 101],
+    'phosphorus': [0, 29, 30, 31, 59, 60, 61],
+    'potassium': [0, 29, 30, 31, 79, 80, 81],
+    'ph': [4.0, 5.4, 5.5, 5.6, 6.9, 7.0, 7.1, 7.9, 8.0, 8.1]
+}
+
+
+def old_soil_quality(soil_score):
+    # The if/elif ladder ExplanationGenerator used before the band tables
+    if soil_score >= 0.8:
+        return "excellent", "Your soil is very well-suited for this crop."
+    elif soil_score >= 0.6:
+        return "good", "Your soil is suitable for this crop with minor adjustments."
+    elif soil_score >= 0.4:
+        return "moderate", "Your soil can support this crop, but may need some amendments."
+    return "poor", "Your soil will need significant amendments to support this crop well."
+
+
+def old_soil_sentence(param, value, display_name):
+    if param == 'nitrogen':
+        if value < 50:
+            return f"The nitrogen level ({value}) is on the lower side. Consider adding nitrogen-rich fertilizers like urea or composted manure."
+        elif value < 100:
+            return f"The nitrogen level ({value}) is adequate for many crops including {display_name}."
+        return f"The nitrogen level ({value}) is quite high, which is beneficial for leafy crops but may cause excessive vegetative growth in some plants."
+    if param == 'phosphorus':
+        if value < 30:
+            return f"The phosphorus level ({value}) is relatively low. Consider adding bone meal or rock phosphate to enhance flowering and root development."
+        elif value < 60:
+            return f"The phosphorus level ({value}) is sufficient for most crops including {display_name}."
+        return f"The phosphorus level ({value}) is high, which generally supports good root development and flowering."
+    if param == 'potassium':
+        if value < 30:
+            return f"The potassium level ({value}) is on the lower side. Wood ash or potassium sulfate can increase levels to improve crop resilience."
+        elif value < 80:
+            return f"The potassium level ({value}) is adequate for strong plant development and disease resistance."
+        return f"The potassium level ({value}) is high, which helps with water regulation and overall crop quality."
+    if value < 5.5:
+        return f"The soil pH ({value}) is acidic. Most crops prefer a slightly acidic to neutral pH. Consider adding lime to raise the pH."
+    elif value < 7.0:
+        return f"The soil pH ({value}) is slightly acidic to neutral, which is ideal for most crops including {display_name}."
+    elif value < 8.0:
+        return f"The soil pH ({value}) is slightly alkaline. Many crops can still grow well, but monitor for nutrient availability."
+    return f"The soil pH ({value}) is alkaline. Consider adding sulfur or organic matter to lower the pH for better nutrient absorption."
+
+
+def old_market_explanation(display_name, market_score, market_data):
+    if market_score >= 0.8:
+        outlook, recommendation = "excellent", "Current market conditions strongly favor this crop."
+    elif market_score >= 0.6:
+        outlook, recommendation = "favorable", "Market conditions are generally good for this crop."
+    elif market_score >= 0.4:
+        outlook, recommendation = "moderate", "Market conditions present a balanced opportunity with some risks."
+    else:
+        outlook, recommendation = "challenging", "Market conditions may be difficult for this crop right now."
+    details = [f"The current market price is approximately Rs. {market_data['price_per_kg']:.2f} per kg."]
+    demand = market_data['demand_score']
+    if demand >= 8:
+        details.append(f"Demand is very high (score: {demand}/10).")
+    elif demand >= 6:
+        details.append(f"Demand is good (score: {demand}/10).")
+    else:
+        details.append(f"Demand is moderate to low (score: {demand}/10).")
+    supply = market_data['supply_score']
+    if supply <= 4:
+        details.append(f"Supply is limited (score: {supply}/10), which may support higher prices.")
+    elif supply <= 7:
+        details.append(f"Supply is moderate (score: {supply}/10), creating balanced market conditions.")
+    else:
+        details.append(f"Supply is abundant (score: {supply}/10), which may put pressure on prices.")
+    profit = market_data['profit_potential']
+    if profit >= 8:
+        details.append(f"The profit potential is excellent (score: {profit}/10).")
+    elif profit >= 6:
+        details.append(f"The profit potential is good (score: {profit}/10).")
+    else:
+        details.append(f"The profit potential is moderate to low (score: {profit}/10).")
+    return f"{display_name} has {outlook} market prospects. {recommendation} " + " ".join(details)
+
+
+def old_overall_recommendation(display_name, combined_score):
+    if combined_score >= 0.8:
+        return f"{display_name} is highly recommended for your current conditions."
+    elif combined_score >= 0.6:
+        return f"{display_name} is a good choice for your current conditions."
+    elif combined_score >= 0.4:
+        return f"{display_name} is a reasonable option but will require some additional management."
+    return f"{display_name} may be challenging to grow under your current conditions."
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return ExplanationGenerator(cache_size=0)
+
+
+@pytest.mark.parametrize('param', list(SOIL_VALUES))
+def test_soil_sentences_match_old_ladder(generator, param):
+    for value in SOIL_VALUES[param]:
+        for soil_score in SCORES:
+            quality, advice = old_soil_quality(soil_score)
+            expected = (f"Your soil has {quality} compatibility with Black gram. {advice} "
+                        + old_soil_sentence(param, value, "Black gram"))
+            assert generator.generate_soil_explanation('black_gram', {param: value}, soil_score) == expected
+
+
+def test_soil_explanation_selects_old_sentences(generator):
+    soil_params = {'nitrogen': 40, 'phosphorus': 45, 'potassium': 90, 'ph': 8.2}
+    explanation = generator.generate_soil_explanation('rice', soil_params, 0.5)
+    sentences = [old_soil_sentence(param, value, "Rice") for param, value in soil_params.items()]
+    assert sum(sentence in explanation for sentence in sentences) == 3
+    # Relevance selection drops the one parameter in its ideal band
+    assert sentences[1] not in explanation
+
+
+def test_market_explanation_matches_old_ladder(generator):
+    for market_score in SCORES:
+        for value in MARKET_VALUES:
+            market_data = {'price_per_kg': 42.5, 'demand_score': value, 'supply_score': value,
+                           'profit_potential': value}
+            assert (generator.generate_market_explanation('rice', market_score, market_data)
+                    == old_market_explanation("Rice", market_score, market_data))
+
+
+def test_overall_recommendation_matches_old_ladder(generator):
+    for combined_score in SCORES:
+        explanation = generator.generate_comprehensive_explanation(
+            {'crop_name': 'rice', 'combined_score': combined_score, 'season': 'kharif'}, {}, {}, 7)
+        assert explanation.startswith(f"## Recommendation: {old_overall_recommendation('Rice', combined_score)}\n\n")
+
+
+PROFILE = {'nitrogen': 40, 'phosphorus': 45, 'potassium': 90, 'ph': 8.2,
+           'temperature': 25, 'humidity': 80, 'rainfall': 200}
+CROP = {'crop_name': 'rice', 'season': 'kharif', 'soil_score': 0.55, 'market_score': 0.7, 'combined_score': 0.62}
+MARKET = {'price_per_kg': 42.5, 'demand_score': 7, 'supply_score': 5, 'profit_potential': 8}
+
+
+@pytest.mark.parametrize('selection', ['relevance', 'seeded'])
+def test_selection_is_deterministic(selection):
+    first = ExplanationGenerator(selection=selection).generate_soil_explanation('rice', PROFILE, 0.5)
+    random.seed(1)
+    assert ExplanationGenerator(selection=selection).generate_soil_explanation('rice', PROFILE, 0.5) == first
+    random.seed(2)
+    assert ExplanationGenerator(selection=selection).generate_soil_explanation('rice', PROFILE, 0.5) == first
+
+
+def test_cached_explanation_matches_uncached():
+    generator = ExplanationGenerator()
+    cached = generator.generate_cached_comprehensive_explanation(CROP, PROFILE, MARKET, 7, market_version='v1')
+    assert cached == generator.generate_comprehensive_explanation(CROP, PROFILE, MARKET, 7)
+    # A profile that only differs below the slider resolution is served from the cache
+    nearby = dict(PROFILE, ph=8.21)
+    assert generator.generate_cached_comprehensive_explanation(CROP, nearby, MARKET, 7, market_version='v1') is cached
+    assert len(generator._explanation_cache) == 1
+
+
+def test_cache_is_bounded():
+    generator = ExplanationGenerator(cache_size=2)
+    for nitrogen in (10, 20, 30):
+        generator.generate_cached_comprehensive_explanation(CROP, dict(PROFILE, nitrogen=nitrogen), MARKET, 7)
+    assert len(generator._explanation_cache) == 2
+
+
+def test_etag_is_stable_and_follows_market_version():
+    etag = ExplanationGenerator().explanation_etag(CROP, PROFILE, MARKET, 7, market_version='v1')
+    assert ExplanationGenerator().explanation_etag(CROP, PROFILE, MARKET, 7, market_version='v1') == etag
+    assert ExplanationGenerator().explanation_etag(CROP, PROFILE, MARKET, 7, market_version='v2') != etag
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crop_recommendation_model import CropRecommendationModel
+from data_processor import DataProcessor
+from field_raster import NODATA_CROP, FieldRasterScorer
+from recommendation_engine import HybridRankingEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(n_estimators=30)
+    return HybridRankingEngine(DataProcessor(), crop_model)
+
+
+@pytest.fixture(scope='module')
+def layers():
+    rng = np.random.default_rng(0)
+    shape = (23, 17)
+    layers = {'nitrogen': rng.uniform(0, 200, shape), 'phosphorus': rng.uniform(0, 150, shape),
+              'potassium': rng.uniform(0, 200, shape), 'ph': rng.uniform(4, 9, shape),
+              'temperature': rng.uniform(5, 45, shape), 'humidity': 65.0, 'rainfall': rng.uniform(0, 300, shape)}
+    # Nodata cells in required layers, and a missing optional value
+    layers['nitrogen'][0, :5] = np.nan
+    layers['ph'][10, 3] = np.nan
+    layers['temperature'][5, 5] = np.nan
+    return layers
+
+
+@pytest.mark.parametrize('use_ml', [False, True])
+def test_raster_matches_batch_scoring(engine, layers, use_ml):
+    result = FieldRasterScorer(engine, tile_size=8).score(layers, 6, use_ml=use_ml, keep_scores=True)
+    shape = layers['nitrogen'].shape
+
+    profiles = pd.DataFrame({param: np.broadcast_to(layer, shape).ravel() for param, layer in layers.items()})
+    profiles['month'] = 6
+    scores = engine.score_batch(profiles, use_ml=use_ml)
+    combined = np.where(scores['in_season'], scores['combined_score'], -np.inf)
+    best = np.argmax(combined, axis=1)
+    cells = np.arange(len(best))
+
+    nodata = np.isnan(layers['nitrogen']) | np.isnan(layers['ph'])
+    assert (result['best_crop'][nodata] == NODATA_CROP).all()
+    assert np.isnan(result['best_score'][nodata]).all()
+    assert np.isnan(result['crop_scores'][nodata]).all()
+
+    valid = ~nodata.ravel()
+    np.testing.assert_array_equal(result['best_crop'].ravel()[valid], best[valid])
+    np.testing.assert_allclose(result['best_score'].ravel()[valid], combined[cells, best][valid], rtol=1e-6)
+    np.testing.assert_allclose(result['soil_score'].ravel()[valid], scores['soil_score'][cells, best][valid], rtol=1e-6)
+    np.testing.assert_allclose(result['market_score'].ravel()[valid], scores['market_score'][cells, best][valid], rtol=1e-6)
+    np.testing.assert_allclose(result['crop_scores'].reshape(len(best), -1)[valid], scores['combined_score'][valid],
+                               rtol=1e-6)
+
+
+def test_tile_size_and_memory_mapped_output_do_not_change_results(engine, layers, tmp_path):
+    in_memory = FieldRasterScorer(engine, tile_size=256).score(layers, 11, use_ml=False)
+
+    # Layers read from .npy files, outputs written to memory-mapped files
+    paths = {}
+    for param, layer in layers.items():
+        if np.ndim(layer):
+            paths[param] = tmp_path / f'{param}.npy'
+            np.save(paths[param], layer)
+        else:
+            paths[param] = layer
+    tiled = FieldRasterScorer(engine, tile_size=5).score(paths, 11, use_ml=False, output_dir=tmp_path / 'out')
+
+    for name in ['best_crop', 'best_score', 'soil_score', 'market_score']:
+        np.testing.assert_array_equal(tiled[name], in_memory[name])
+        np.testing.assert_array_equal(np.load(tmp_path / 'out' / f'{name}.npy'), in_memory[name])
+    assert json.loads((tmp_path / 'out' / 'crop_names.json').read_text()) == in_memory['crop_names']
+
+
+def test_raster_requires_soil_layers(engine, layers):
+    scorer = FieldRasterScorer(engine)
+    with pytest.raises(ValueError, match='ph'):
+        scorer.score({param: layer for param, layer in layers.items() if param != 'ph'}, 6, use_ml=False)
+    with pytest.raises(ValueError, match='humidity'):
+        scorer.score({param: layer for param, layer in layers.items() if param != 'humidity'}, 6)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from data_processor import DataProcessor
+from market_forecaster import MARKET_METRICS, MarketForecaster
+
+
+def market_frame(crops, years, months=range(1, 13), offset=0.0):
+    rows = []
+    for year in years:
+        for month in months:
+            for i, crop in enumerate(crops):
+                value = offset + year * 100 + month + i / 10
+                rows.append({'crop_name': crop, 'month': month, 'year': year,
+                             **{metric: value for metric in MARKET_METRICS}})
+    return pd.DataFrame(rows)
+
+
+def test_update_with_backfilled_years_matches_full_fit():
+    history = market_frame(['rice', 'wheat'], [2022, 2023])
+    backfill = market_frame(['rice', 'wheat'], [2021], months=range(1, 4))
+
+    updated = MarketForecaster().fit(history).update(backfill)
+    refitted = MarketForecaster().fit(pd.concat([history, backfill], ignore_index=True))
+
+    assert updated.first_period == refitted.first_period
+    np.testing.assert_array_equal(updated.values, refitted.values)
+    # The backfilled rows must not land in later periods
+    assert updated.forecast_period(1, 2023)[0, 0] == 2023 * 100 + 1
+    assert updated.forecast_period(1, 2021)[0, 0] == 2021 * 100 + 1
+    np.testing.assert_allclose(updated.forecast(3), refitted.forecast(3))
+
+
+def test_add_market_data_backfills_earlier_year():
+    processor = DataProcessor()
+    processor.enable_market_forecasts()
+    backfill = processor.market_data.assign(year=processor.market_data['year'] - 1)
+
+    processor.add_market_data(backfill)
+
+    assert len(processor.market_data) == 2 * len(backfill)
+    first_month, first_year = backfill['month'].min(), int(backfill['year'].min())
+    crop = backfill['crop_name'].iloc[0]
+    forecast = processor.market_forecaster.forecast_period(first_month, first_year)
+    crop_position = processor.market_forecaster.crop_names.index(crop)
+    expected = backfill[(backfill['crop_name'] == crop) & (backfill['month'] == first_month)]['price_per_kg'].iloc[0]
+    assert forecast[0, crop_position] == expected
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_forecaster import MARKET_METRICS
+from market_statistics import MarketStatistics
+from market_store import MarketStore
+
+
+def market_frame(crops, periods, seed=0, skip=()):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for year, month in periods:
+        for crop in crops:
+            if (crop, year, month) in skip:
+                continue
+            rows.append({'crop_name': crop, 'month': month, 'year': year,
+                         **{metric: round(float(rng.uniform(1, 100)), 2) for metric in MARKET_METRICS}})
+    return pd.DataFrame(rows)
+
+
+def months(first_year, last_year):
+    return [(year, month) for year in range(first_year, last_year + 1) for month in range(1, 13)]
+
+
+def assert_matches_full_recompute(statistics):
+    full = MarketStatistics(statistics.store)
+    assert statistics.stats.keys() == full.stats.keys()
+    for name, values in full.stats.items():
+        np.testing.assert_array_equal(statistics.stats[name], values, err_msg=name)
+    np.testing.assert_allclose(statistics.seasonal_index, full.seasonal_index, equal_nan=True)
+
+
+@pytest.mark.parametrize('update', [
+    # Next months appended one at a time, past the buffer capacity
+    [market_frame(['rice', 'wheat'], [(2024, month)], seed=month) for month in range(1, 13)],
+    # Earlier months replaced, and a gap filled
+    [market_frame(['rice'], [(2022, 5), (2023, 2)], seed=7)],
+    # A crop added
+    [market_frame(['maize'], months(2023, 2023), seed=8)],
+    # Months before the start of the timeline
+    [market_frame(['wheat'], [(2020, 11), (2020, 12)], seed=9)]
+])
+def test_incremental_update_matches_full_recompute(update):
+    history = market_frame(['rice', 'wheat'], months(2021, 2023), skip={('rice', 2022, 7)})
+    statistics = MarketStatistics(MarketStore(history))
+    for new_data in update:
+        statistics.apply(statistics.store.update(new_data))
+        assert_matches_full_recompute(statistics)
+
+
+def test_appending_reads_only_the_new_windows():
+    statistics = MarketStatistics(MarketStore(market_frame(['rice'], months(2015, 2023))))
+    buffer = statistics._buffers['ma_12']
+    statistics.apply(statistics.store.update(market_frame(['rice'], [(2024, 1)], seed=1)))
+    # Grown once by doubling, then filled in place
+    assert statistics._buffers['ma_12'].shape[1] == 2 * buffer.shape[1]
+    grown = statistics._buffers['ma_12']
+    statistics.apply(statistics.store.update(market_frame(['rice'], [(2024, 2)], seed=2)))
+    assert statistics._buffers['ma_12'] is grown
+    assert_matches_full_recompute(statistics)
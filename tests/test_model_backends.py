@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend_benchmark import select_backend
+from crop_recommendation_model import CropRecommendationModel
+from model_backends import BACKENDS, SoftNearestCentroid, create_backend
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    return CropRecommendationModel().prepare_training_data()
+
+
+def test_soft_nearest_centroid_is_a_softmax_over_distances():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 4))
+    y = np.repeat(['a', 'b', 'c'], 20)
+    model = SoftNearestCentroid(bandwidth=0.5).fit(X, y)
+    np.testing.assert_allclose(model.centroids_, [X[y == label].mean(axis=0) for label in 'abc'])
+
+    distances = ((X[:, None, :] - model.centroids_[None]) ** 2).sum(axis=2)
+    expected = np.exp(-distances / (2 * 0.5))
+    expected /= expected.sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(model.predict_proba(X), expected)
+    np.testing.assert_array_equal(model.predict(X), model.classes_[np.argmin(distances, axis=1)])
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError, match="Unknown model backend"):
+        create_backend('svm')
+
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+def test_backends_serve_aligned_probabilities(backend, training_data, tmp_path):
+    crop_model = CropRecommendationModel(backend=backend)
+    crop_model.train_model(calibrate=True, n_estimators=10, data=training_data)
+    assert crop_model.metadata['backend'] == backend
+    # Unique names, so the aligned probabilities cover every class once
+    crop_names = list(dict.fromkeys(crop_model.crop_catalog.names))
+
+    profiles = crop_model.training_data['X_test'].iloc[:5]
+    batch = crop_model.predict_probabilities_batch(profiles, crop_names)
+    assert batch.shape == (5, len(crop_names))
+    np.testing.assert_allclose(batch.sum(axis=1), 1)
+    for i in range(len(profiles)):
+        np.testing.assert_allclose(crop_model.predict_probabilities(profiles.iloc[i].to_dict(), crop_names), batch[i])
+
+    crop_model.save_model(tmp_path / 'model.joblib')
+    loaded = CropRecommendationModel()
+    loaded.load_model(tmp_path / 'model.joblib')
+    assert loaded.backend == backend
+    np.testing.assert_allclose(loaded.predict_probabilities_batch(profiles, crop_names), batch)
+
+
+def test_select_backend_prefers_accuracy_within_budget():
+    results = pd.DataFrame({
+        'backend': ['random_forest', 'knn', 'nearest_centroid'],
+        'accuracy': [0.95, 0.90, 0.90],
+        'p99_ms': [12.0, 4.0, 1.0]
+    })
+    assert select_backend(results, 20) == 'random_forest'
+    # Ties on accuracy go to the faster backend
+    assert select_backend(results, 5) == 'nearest_centroid'
+    # Nothing fits: the fastest
+    assert select_backend(results, 0.5) == 'nearest_centroid'
@@ -0,0 +1,69 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_report import BatchReportGenerator
+from crop_recommendation_model import CropRecommendationModel
+from data_processor import DataProcessor
+from parallel_scoring import OrderedProcessPool, SharedScoringState, shared_state_directory
+from recommendation_engine import HybridRankingEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(n_estimators=10)
+    return HybridRankingEngine(DataProcessor(), crop_model)
+
+
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'nitrogen': rng.uniform(0, 200, n), 'phosphorus': rng.uniform(0, 150, n),
+        'potassium': rng.uniform(0, 200, n), 'ph': rng.uniform(4, 9, n),
+        'temperature': rng.uniform(5, 45, n), 'humidity': rng.uniform(10, 100, n),
+        'rainfall': rng.uniform(0, 300, n), 'month': rng.integers(1, 13, n)
+    })
+
+
+def square(value):
+    return value * value
+
+
+def test_loaded_engine_matches_and_maps_shared_state(engine):
+    directory = SharedScoringState.export(engine, shared_state_directory())
+    try:
+        loaded = SharedScoringState.load(directory)
+        profiles = random_profiles(100)
+        expected_crops, expected_scores = engine.rank_batch(profiles)
+        crops, scores = loaded.rank_batch(profiles)
+        np.testing.assert_array_equal(crops, expected_crops)
+        for name, values in expected_scores.items():
+            np.testing.assert_allclose(scores[name], values)
+
+        # Workers read the memory-mapped arrays and do not rebuild pandas state
+        catalog = loaded.data_processor.crop_catalog
+        assert isinstance(catalog.array, np.memmap)
+        assert isinstance(loaded.market_index.scores, np.memmap)
+        assert loaded.data_processor.market_data is None
+        assert catalog._crop_data is None and catalog._records is None
+        for month in [None, *range(1, 13)]:
+            assert loaded.data_processor.resolve_market_year(month) == engine.data_processor.resolve_market_year(month)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_ordered_pool_keeps_submission_order():
+    with OrderedProcessPool(2, max_pending=3) as pool:
+        assert list(pool.imap(square, range(20))) == [value * value for value in range(20)]
+
+
+def test_parallel_report_matches_serial_report(engine, tmp_path):
+    input_path = tmp_path / 'soil_tests.csv'
+    random_profiles(45, seed=1).to_csv(input_path, index=False)
+    generator = BatchReportGenerator(engine)
+    generator.run(str(input_path), str(tmp_path / 'serial.csv'), chunk_size=7)
+    generator.run(str(input_path), str(tmp_path / 'parallel.csv'), chunk_size=7, workers=2)
+    assert (tmp_path / 'parallel.csv').read_bytes() == (tmp_path / 'serial.csv').read_bytes()
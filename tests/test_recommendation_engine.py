@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from crop_index import CropIndex
+from crop_recommendation_model import CropRecommendationModel
+from data_processor import DataProcessor
+from recommendation_engine import HybridRankingEngine, MarketScoreIndex, RankFusion
+
+
+@pytest.fixture(scope='module')
+def engines():
+    data_processor = DataProcessor()
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(n_estimators=30)
+    crop_index = CropIndex(data_processor)
+    return data_processor, crop_model, crop_index
+
+
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'nitrogen': rng.uniform(0, 200), 'phosphorus': rng.uniform(0, 150), 'potassium': rng.uniform(0, 200),
+             'ph': rng.uniform(4, 9), 'temperature': rng.uniform(5, 45), 'humidity': rng.uniform(10, 100),
+             'rainfall': rng.uniform(0, 300), 'month': int(rng.integers(1, 13))} for _ in range(n)]
+
+
+def test_indexed_rank_matches_exhaustive(engines):
+    data_processor, crop_model, crop_index = engines
+    exhaustive = HybridRankingEngine(data_processor, crop_model)
+    indexed = HybridRankingEngine(data_processor, crop_model, crop_index=crop_index, candidate_k=5)
+    for profile in random_profiles(50):
+        for season_only in (True, False):
+            assert (indexed.rank(profile, profile['month'], limit=5, season_only=season_only)
+                    == exhaustive.rank(profile, profile['month'], limit=5, season_only=season_only))
+
+
+def test_rank_fusion_candidate_scores_match_score_all(engines):
+    data_processor, crop_model, crop_index = engines
+    engine = HybridRankingEngine(data_processor, crop_model, fusion_strategy=RankFusion(), crop_index=crop_index)
+    profile = random_profiles(1)[0]
+    candidates = np.array([0, 5, 7])
+    np.testing.assert_allclose(engine.score_candidates(profile, 6, candidates)['combined_score'],
+                               engine.score_all(profile, 6)['combined_score'][candidates])
+
+
+def test_tune_candidate_k_meets_recall(engines):
+    data_processor, crop_model, crop_index = engines
+    engine = HybridRankingEngine(data_processor, crop_model, crop_index=crop_index, approximate=True)
+    profiles = random_profiles(40, seed=1)
+    tuned = engine.tune_candidate_k(profiles, target_recall=0.95)
+    assert tuned['recall'] >= 0.95
+    assert engine.measure_recall(profiles)['recall'] == tuned['recall']
+
+
+def test_market_score_index_matches_get_market_scores(engines):
+    data_processor = engines[0]
+    market_index = MarketScoreIndex.build(data_processor, data_processor.crop_catalog.names)
+    years = sorted(data_processor.market_data['year'].unique())
+    periods = [(month, year) for year in (years[0] - 1, *years, years[-1] + 1) for month in range(1, 13)]
+    for month, year in periods:
+        np.testing.assert_array_equal(market_index.lookup(month, year), data_processor.get_market_scores(month, year))
+    months, period_years = np.array(periods).T
+    np.testing.assert_array_equal(market_index.lookup_many(months, period_years),
+                                  [market_index.lookup(month, year) for month, year in periods])
+
+
+def test_market_score_index_reorders_crops(engines):
+    data_processor = engines[0]
+    crop_names = list(data_processor.crop_catalog.names[::-2])
+    market_index = MarketScoreIndex.build(data_processor, crop_names)
+    year = int(data_processor.market_data['year'].max())
+    np.testing.assert_allclose(market_index.lookup(5, year),
+                               [data_processor.get_market_score(crop, 5, year) for crop in crop_names])
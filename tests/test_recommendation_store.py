@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+import recommendation_store
+from recommendation_store import RecommendationStore, quantize
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecommendationStore(str(tmp_path / 'recommendations.db'), max_age_days=30)
+    yield store
+    store.close()
+
+
+PROFILE = {'nitrogen': 82, 'phosphorus': 41, 'potassium': 43, 'ph': 6.52,
+           'temperature': 25.4, 'humidity': 61, 'rainfall': 104, 'month': 6}
+RESULTS = [{'crop_name': 'rice', 'combined_score': 0.8}, {'crop_name': 'maize', 'combined_score': 0.7}]
+
+
+def test_quantize_snaps_to_the_slider_grid():
+    key, quantized = quantize(PROFILE)
+    assert quantized == {'nitrogen': 80, 'phosphorus': 40, 'potassium': 45, 'ph': 6.5,
+                         'temperature': 25, 'humidity': 60, 'rainfall': 100, 'month': 6}
+    assert key == '80|40|45|6.5|25|60|100|6'
+    # Absent optional parameters get their own key
+    basic = {param: PROFILE[param] for param in ['nitrogen', 'phosphorus', 'potassium', 'ph', 'month']}
+    assert quantize(basic)[0] == '80|40|45|6.5|-|-|-|6'
+
+
+def test_results_are_reused_for_the_same_grid_point(store):
+    assert store.lookup(PROFILE, 'v1') is None
+    store.record(PROFILE, RESULTS, region='Kerala', version='v1')
+
+    nearby = dict(PROFILE, nitrogen=79, ph=6.48)
+    assert store.lookup(nearby, 'v1') == RESULTS
+    # Other versions and other grid points are computed afresh
+    assert store.lookup(nearby, 'v2') is None
+    assert store.lookup(dict(PROFILE, nitrogen=90), 'v1') is None
+
+    # Reused answers are logged but do not overwrite the stored results
+    store.record(nearby, [{'crop_name': 'wheat'}], region='Punjab', version='v1', reused=True)
+    assert store.lookup(PROFILE, 'v1') == RESULTS
+    assert [query['region'] for query in store.recent()] == ['Punjab', 'Kerala']
+    assert store.hotspots()[0]['input_key'] == quantize(PROFILE)[0]
+    summary = {row['region']: row for row in store.summary()}
+    assert summary['Punjab']['reuse_rate'] == 1.0 and summary['Kerala']['reuse_rate'] == 0.0
+
+
+def test_expired_results_are_ignored_and_pruned(store, monkeypatch):
+    store.record(PROFILE, RESULTS, version='v1')
+    store.record(dict(PROFILE, month=7), RESULTS, version='v1')
+    now = time.time()
+
+    # Five weeks later the results are past max_age_days
+    monkeypatch.setattr(recommendation_store.time, 'time', lambda: now + 35 * 86400)
+    store.record(dict(PROFILE, month=8), RESULTS, version='v1')
+    assert store.lookup(PROFILE, 'v1') is None
+    assert store.prune() == 2
+    assert store.lookup(dict(PROFILE, month=8), 'v1') == RESULTS
+    # The query log is kept
+    assert len(store.recent()) == 3
+
+
+def test_store_is_shared_between_connections(store):
+    store.record(PROFILE, RESULTS, version='v1')
+    other = RecommendationStore(store.path)
+    try:
+        assert other.lookup(PROFILE, 'v1') == RESULTS
+    finally:
+        other.close()
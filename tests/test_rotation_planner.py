@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from data_processor import DataProcessor
+from rotation_planner import RotationPlanner
+from soil_simulator import SoilSimulator
+
+
+@pytest.fixture(scope='module')
+def data_processor():
+    return DataProcessor()
+
+
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'nitrogen': rng.uniform(0, 200), 'phosphorus': rng.uniform(0, 150), 'potassium': rng.uniform(0, 200),
+             'ph': rng.uniform(4, 9), 'temperature': rng.uniform(5, 45), 'humidity': rng.uniform(10, 100),
+             'rainfall': rng.uniform(0, 300), 'month': int(rng.integers(1, 13))} for _ in range(n)]
+
+
+def test_beam_search_without_depletion_matches_dp(data_processor):
+    no_depletion = SoilSimulator(data_processor, uptake_rates=(0.0, 0.0, 0.0))
+    planner = RotationPlanner(data_processor, soil_simulator=no_depletion)
+    for profile in random_profiles(5):
+        soil_params = {param: value for param, value in profile.items() if param != 'month'}
+        for years in (1, 2):
+            exact = planner.plan(soil_params, profile['month'], years=years)
+            beam = planner.plan_with_depletion(soil_params, profile['month'], years=years, beam_width=256)
+            assert beam['score'] == pytest.approx(exact['score'])
+
+
+def test_plan_plantings_are_in_season_and_do_not_overlap(data_processor):
+    planner = RotationPlanner(data_processor)
+    for profile in random_profiles(5, seed=1):
+        soil_params = {param: value for param, value in profile.items() if param != 'month'}
+        plan = planner.plan(soil_params, profile['month'], years=2)
+        start_year = data_processor.resolve_market_year(profile['month'])
+        next_free, last, total = 0, None, 0.0
+        for planting in plan['plantings']:
+            c = data_processor.crop_catalog.index_of(planting['crop_name'])
+            assert planner.season_masks[planting['planting_month'] - 1, c]
+            t = (planting['planting_year'] - start_year) * 12 + planting['planting_month'] - profile['month']
+            assert t >= next_free
+            # A crop following itself directly (without a fallow month) loses repeat_penalty
+            gain = planting['combined_score'] * min(planner.durations[c], 24 - t)
+            total += gain * (1 - planner.repeat_penalty) if (c == last and t == next_free) else gain
+            next_free, last = t + planner.durations[c], c
+        assert plan['score'] == pytest.approx(total / 24)
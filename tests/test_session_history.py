@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from data_processor import DataProcessor
+from session_history import SessionHistory
+
+PROFILE = {'nitrogen': 90, 'phosphorus': 40, 'potassium': 40, 'ph': 6.5,
+           'temperature': 25, 'humidity': 80, 'rainfall': 200, 'month': 7}
+
+
+@pytest.fixture(scope='module')
+def crop_catalog():
+    return DataProcessor().crop_catalog
+
+
+def test_spill_keeps_one_connection_and_caps_rows(crop_catalog, tmp_path):
+    history = SessionHistory(crop_catalog, capacity=2, spill_path=str(tmp_path / 'history.db'),
+                             session_id='a', max_spilled=3)
+    now = int(time.time())
+    for i in range(10):
+        history.append(dict(PROFILE, nitrogen=i), ['rice'], timestamp=now + i)
+    connection = history.connection
+    history.append(PROFILE, ['rice'], timestamp=now + 10)
+    assert history.connection is connection
+
+    spilled = history.spilled()
+    # 9 records left the buffer; the newest 3 are kept
+    assert [entry['soil_params']['nitrogen'] for entry in spilled] == [8, 7, 6]
+    history.close()
+
+
+def test_expired_records_are_pruned(crop_catalog, tmp_path):
+    path = str(tmp_path / 'history.db')
+    old = SessionHistory(crop_catalog, capacity=1, spill_path=path, session_id='old')
+    long_ago = int(time.time()) - 40 * 86400
+    for i in range(3):
+        old.append(PROFILE, ['rice'], timestamp=long_ago + i)
+    assert len(old.spilled()) == 2
+    old.close()
+
+    # Opening the file from another session deletes records past max_age_days
+    new = SessionHistory(crop_catalog, capacity=1, spill_path=path, session_id='new', max_age_days=30)
+    new.append(PROFILE, ['rice'])
+    new.append(PROFILE, ['rice'])
+    assert len(new.spilled()) == 1
+    assert new.connection.execute("SELECT COUNT(*) FROM history WHERE session = 'old'").fetchone()[0] == 0
+    new.close()
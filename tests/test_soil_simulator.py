@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from data_processor import DataProcessor
+from soil_simulator import SoilSimulator
+
+
+@pytest.fixture(scope='module')
+def simulator():
+    return SoilSimulator(DataProcessor(), recovery=(2.0, 1.0, 1.0))
+
+
+def test_simulate_removes_uptake_and_adds_recovery(simulator):
+    crop_catalog = simulator.data_processor.crop_catalog
+    crops = [crop_catalog.index_of('rice'), -1, crop_catalog.index_of('wheat')]
+    planting_soil, final_soil = simulator.simulate([150.0, 60.0, 80.0], crops)
+
+    state = np.array([150.0, 60.0, 80.0])
+    months = np.append(crop_catalog.growing_months(), 1)
+    for t, c in enumerate(crops):
+        np.testing.assert_allclose(planting_soil[t], state)
+        if c >= 0:
+            record = crop_catalog.records[c]
+            state = state - 0.3 * np.array([record['nitrogen_requirement'], record['phosphorus_requirement'],
+                                            record['potassium_requirement']])
+        state = np.clip(state + np.array([2.0, 1.0, 1.0]) * months[c], 0, simulator.upper_limits)
+    np.testing.assert_allclose(final_soil, state)
+
+
+def test_evaluate_scenarios_match_one_at_a_time(simulator):
+    data_processor = simulator.data_processor
+    rng = np.random.default_rng(0)
+    n_crops = len(data_processor.crop_catalog)
+    initial = rng.uniform([20, 10, 20], [200, 150, 200], size=(6, 3))
+    crops = rng.integers(-1, n_crops, size=(6, 4))
+    fertilizer = rng.uniform(0, 30, size=(6, 4, 3))
+    other_params = {'ph': 6.5, 'temperature': 25, 'rainfall': 120}
+
+    batch = simulator.evaluate(initial, crops, other_params, fertilizer)
+    for s in range(len(initial)):
+        single = simulator.evaluate(initial[s], crops[s], other_params, fertilizer[s])
+        np.testing.assert_allclose(batch['final_soil'][s], single['final_soil'])
+        np.testing.assert_allclose(batch['mean_score'][s], single['mean_score'])
+        for t, c in enumerate(crops[s]):
+            if c < 0:
+                assert np.isnan(single['soil_scores'][t])
+                continue
+            soil_params = dict(zip(['nitrogen', 'phosphorus', 'potassium'], single['planting_soil'][t]), **other_params)
+            expected = data_processor.get_soil_compatibility_score(data_processor.crop_catalog.records[c], soil_params)
+            assert single['soil_scores'][t] == pytest.approx(expected)
+            assert batch['soil_scores'][s, t] == pytest.approx(expected)
@@ -0,0 +1,66 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from data_processor import DataProcessor
+from static_bundle import SEASON_LABELS, SOIL_TYPES, build_bundle, write_bundle
+
+
+@pytest.fixture(scope='module')
+def data_processor():
+    return DataProcessor()
+
+
+@pytest.fixture(scope='module')
+def bundle(data_processor):
+    return build_bundle(data_processor, top_k=5)
+
+
+def test_bundle_round_trips_through_gzip_and_base64(bundle, tmp_path):
+    script = tmp_path / 'crop_bundle.js'
+    size = write_bundle(bundle, str(script))
+    content = script.read_text(encoding='ascii')
+    assert size == len(content)
+    prefix, suffix = 'window.CROP_BUNDLE = "', '";\n'
+    assert content.startswith(prefix) and content.endswith(suffix)
+    decoded = gzip.decompress(base64.b64decode(content[len(prefix):-len(suffix)]))
+    assert json.loads(decoded) == bundle
+
+    archive = tmp_path / 'crop_bundle.json.gz'
+    write_bundle(bundle, str(archive))
+    assert json.loads(gzip.decompress(archive.read_bytes())) == bundle
+    # No timestamp in the gzip header, so unchanged bundles give identical files
+    write_bundle(bundle, str(tmp_path / 'again.json.gz'))
+    assert (tmp_path / 'again.json.gz').read_bytes() == archive.read_bytes()
+
+
+def test_bundle_entries_are_ranked_percentages(bundle):
+    assert set(bundle['recommendations']) == {f'{soil}|{season}' for soil in SOIL_TYPES for season in SEASON_LABELS}
+    for entries in bundle['recommendations'].values():
+        assert 0 < len(entries) <= 5
+        crops = [entry[0] for entry in entries]
+        assert len(set(crops)) == len(crops)
+        combined = [entry[1] for entry in entries]
+        assert combined == sorted(combined, reverse=True)
+        for crop, *scores, explanation in entries:
+            assert 0 <= crop < len(bundle['crops'])
+            assert 0 <= explanation < len(bundle['explanations'])
+            assert all(0 <= score <= 100 for score in scores)
+
+
+def test_bundle_ranks_by_the_season_average(bundle, data_processor):
+    profile = SOIL_TYPES['loamy'][1]
+    months = data_processor.season_mapping['rabi']
+    totals = {}
+    for month in months:
+        month_recs = data_processor.get_top_recommendations(profile, month, limit=len(data_processor.crop_catalog))
+        # A crop listed twice in the catalog counts once
+        for rec in {rec['crop_name']: rec for rec in month_recs}.values():
+            totals[rec['crop_name']] = totals.get(rec['crop_name'], 0.0) + rec['combined_score'] / len(months)
+    expected = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:5]
+
+    entries = bundle['recommendations']['loamy|rabi']
+    assert [bundle['crops'][entry[0]] for entry in entries] == [crop for crop, _ in expected]
+    assert [entry[1] for entry in entries] == [round(score * 100) for _, score in expected]
@@ -0,0 +1,77 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.neighbors import KNeighborsClassifier
+
+from crop_recommendation_model import CropRecommendationModel
+from tree_explainer import TreeExplainer
+
+
+def conditional_expectation(tree, x, known):
+    """Path-dependent expected class fractions of one tree given the features in known."""
+    def visit(node):
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            return tree.value[node, 0] / tree.value[node, 0].sum()
+        feature = tree.feature[node]
+        if feature in known:
+            return visit(left if x[feature] <= tree.threshold[node] else right)
+        weights = tree.weighted_n_node_samples
+        return (weights[left] * visit(left) + weights[right] * visit(right)) / weights[node]
+    return visit(0)
+
+
+def brute_force_shap(forest, x):
+    """Shapley values by enumerating every feature subset."""
+    n_features = forest.n_features_in_
+
+    def value(known):
+        return np.mean([conditional_expectation(tree.tree_, x, known) for tree in forest.estimators_], axis=0)
+
+    phi = np.zeros((n_features, forest.n_classes_))
+    for j in range(n_features):
+        others = [k for k in range(n_features) if k != j]
+        for size in range(n_features):
+            weight = factorial(size) * factorial(n_features - size - 1) / factorial(n_features)
+            for subset in combinations(others, size):
+                phi[j] += weight * (value(set(subset) | {j}) - value(set(subset)))
+    return phi
+
+
+def test_matches_brute_force_shapley_values():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 5))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int) + (X[:, 3] > 1)
+    forest = RandomForestClassifier(n_estimators=3, max_depth=4, random_state=0).fit(X, y)
+    explainer = TreeExplainer(forest)
+    # Thresholds are float32 in the trees, so compare on float32-representable inputs
+    samples = X[:4].astype(np.float32).astype(float)
+    shap_values = explainer.shap_values(samples)
+    for i, x in enumerate(samples):
+        np.testing.assert_allclose(shap_values[i], brute_force_shap(forest, x), atol=1e-10)
+
+
+def test_attributions_sum_to_uncalibrated_probabilities():
+    crop_model = CropRecommendationModel()
+    crop_model.train_model(calibrate=True, n_estimators=10)
+    crop_names = list(dict.fromkeys(crop_model.crop_catalog.names))
+    profiles = crop_model.training_data['X_test'].iloc[:20]
+
+    attributions = crop_model.get_prediction_attributions_batch(profiles, crop_names)
+    votes = crop_model.model.predict_proba(crop_model.scaler.transform(profiles))
+    positions = [list(crop_model.model.classes_).index(crop) for crop in crop_names]
+    expected_value = crop_model.explainer.expected_value[positions]
+    np.testing.assert_allclose(attributions.sum(axis=1), votes[:, positions] - expected_value, atol=1e-10)
+
+    # The single-profile version returns the same numbers by crop and feature
+    single = crop_model.get_prediction_attributions(profiles.iloc[0].to_dict(), crop_names[:3])
+    for c, crop in enumerate(crop_names[:3]):
+        assert list(single[crop].values()) == pytest.approx(attributions[0, :, c])
+
+
+def test_requires_a_forest():
+    with pytest.raises(ValueError, match="forest"):
+        TreeExplainer(KNeighborsClassifier().fit([[0.0], [1.0]], [0, 1]))
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from warmup import FAILED, PENDING, READY, Warmup
+
+
+def test_tasks_receive_dependency_results_and_overlap():
+    release = threading.Event()
+    warmup = (Warmup()
+              .add('data', lambda: 2)
+              .add('slow', lambda: release.wait(5) and 'slow')
+              .add('model', lambda data: data * 10, depends_on=('data',))
+              .add('engine', lambda data, model: (data, model), depends_on=('data', 'model')))
+    assert warmup.progress() == 0
+    warmup.start()
+
+    # Independent tasks finish while another is still running
+    assert warmup.result('engine', timeout=5) == (2, 20)
+    assert warmup.ready('data', 'model', 'engine')
+    assert not warmup.ready()
+    assert warmup.progress() == 0.75
+
+    release.set()
+    assert warmup.result('slow', timeout=5) == 'slow'
+    assert warmup.ready() and warmup.progress() == 1.0
+    assert all(task['state'] == READY and task['seconds'] >= 0 for task in warmup.status().values())
+
+
+def test_failure_propagates_to_dependents(capsys):
+    def broken():
+        raise OSError("no model file")
+
+    warmup = (Warmup()
+              .add('model', broken)
+              .add('engine', lambda model: model, depends_on=('model',))
+              .add('data', lambda: 'data')
+              .start())
+    with pytest.raises(RuntimeError, match="OSError: no model file"):
+        warmup.result('model', timeout=5)
+    with pytest.raises(RuntimeError, match="dependency failed: model"):
+        warmup.result('engine', timeout=5)
+    assert warmup.result('data', timeout=5) == 'data'
+    assert warmup.failed('engine') and not warmup.failed('data')
+    # A task that never ran because of its dependency has no run time
+    assert warmup.status()['engine'] == {'state': FAILED, 'seconds': None, 'error': "dependency failed: model"}
+    assert "Warm-up task model failed" in capsys.readouterr().out
+
+
+def test_result_times_out_while_running():
+    release = threading.Event()
+    warmup = Warmup().add('slow', lambda: release.wait(5)).start()
+    with pytest.raises(TimeoutError, match="slow"):
+        warmup.result('slow', timeout=0.05)
+    release.set()
+    assert warmup.result('slow', timeout=5) is True
+
+
+def test_unknown_dependency_raises_and_tasks_wait_for_start():
+    warmup = Warmup().add('data', lambda: 1)
+    with pytest.raises(ValueError, match="Unknown warm-up dependencies"):
+        warmup.add('model', lambda data: data, depends_on=('dta',))
+    assert warmup.status()['data']['state'] == PENDING
+    with pytest.raises(TimeoutError):
+        warmup.result('data', timeout=0.01)
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class TreeExplainer:
+    def __init__(self, model, chunk_size=16):
+        """
+        Exact path-dependent TreeSHAP attributions for a fitted forest, vectorized over inputs.
+
+        Every leaf of every tree is flattened at construction into per-feature conditions:
+        the interval the feature must fall in to reach the leaf, and the product of the
+        cover fractions along the leaf's path for splits on that feature. The expected
+        prediction given a feature subset S is then, per leaf, a product over features
+        (the condition for features in S, the cover fraction otherwise), and the Shapley
+        value of such a product has the closed form
+
+            phi_j = (a_j - b_j) * integral_0^1 prod_{k != j} (t * a_k + (1 - t) * b_k) dt
+
+        The integrand is a polynomial of degree n_features - 1, so Gauss-Legendre
+        quadrature with n_features / 2 nodes is exact. This matches TreeSHAP (including
+        features split on several times along a path) with only array operations per
+        request.
+
+        Args:
+            model: Fitted tree ensemble whose trees predict class fractions (e.g. a
+                   RandomForestClassifier); attributions explain its predict_proba
+            chunk_size: Inputs processed per vectorized step, bounding memory use
+        """
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None or not all(hasattr(estimator, 'tree_') for estimator in estimators):
+            raise ValueError("TreeExplainer needs a forest of decision trees (random_forest backend)")
+        self.chunk_size = chunk_size
+        self.n_features = model.n_features_in_
+
+        lows, highs, covers, values = [], [], [], []
+        for estimator in estimators:
+            tree = estimator.tree_
+            weights = tree.weighted_n_node_samples
+            node_values = tree.value[:, 0, :]
+            node_values = node_values / node_values.sum(axis=1, keepdims=True)
+
+            # Depth-first walk carrying each path's feature intervals and cover products
+            stack = [(0, np.full(self.n_features, -np.inf), np.full(self.n_features, np.inf), np.ones(self.n_features))]
+            while stack:
+                node, low, high, cover = stack.pop()
+                left, right = tree.children_left[node], tree.children_right[node]
+                if left == -1:
+                    lows.append(low)
+                    highs.append(high)
+                    covers.append(cover)
+                    values.append(node_values[node])
+                    continue
+                feature, threshold = tree.feature[node], tree.threshold[node]
+                # Samples go left when x <= threshold
+                left_high, left_cover = high.copy(), cover.copy()
+                left_high[feature] = min(high[feature], threshold)
+                left_cover[feature] *= weights[left] / weights[node]
+                right_low, right_cover = low.copy(), cover.copy()
+                right_low[feature] = max(low[feature], threshold)
+                right_cover[feature] *= weights[right] / weights[node]
+                stack.append((left, low, left_high, left_cover))
+                stack.append((right, right_low, high, right_cover))
+
+        self.low = np.array(lows)
+        self.high = np.array(highs)
+        self.cover = np.array(covers)
+        # The forest averages its trees
+        self.leaf_values = np.array(values) / len(estimators)
+        # Prediction with no feature known: every path weighted by its cover
+        self.expected_value = self.cover.prod(axis=1) @ self.leaf_values
+
+        nodes, weights = np.polynomial.legendre.leggauss(max(1, (self.n_features + 1) // 2))
+        self._nodes = (nodes + 1) / 2
+        self._weights = weights / 2
+
+    def shap_values(self, X, classes=None):
+        """
+        Compute feature attributions for a batch of inputs.
+
+        Args:
+            X: Array (n_samples, n_features) in the model's input space (already scaled)
+            classes: Optional class positions to explain, defaults to every class
+
+        Returns:
+            Array (n_samples, n_features, n_classes) of attributions; for each input and
+            class they sum to predict_proba minus expected_value
+        """
+        # Trees compare float32 inputs against their thresholds
+        X = np.asarray(X, dtype=np.float32).astype(float)
+        values = self.leaf_values if classes is None else self.leaf_values[:, classes]
+        result = np.empty((len(X), self.n_features, values.shape[1]))
+        nodes = self._nodes[:, None, None, None]
+        weights = self._weights[:, None, None, None]
+
+        for start in range(0, len(X), self.chunk_size):
+            x = X[start:start + self.chunk_size, None, :]
+            # (sample, leaf, feature): does the input satisfy the leaf's condition on the feature
+            satisfied = ((x > self.low) & (x <= self.high)).astype(float)
+            # (node, sample, leaf, feature); every factor is positive since covers are
+            factors = nodes * satisfied + (1 - nodes) * self.cover
+            others = factors.prod(axis=-1, keepdims=True) / factors
+            integral = (weights * others).sum(axis=0)
+            result[start:start + len(x)] = np.einsum('slf,lc->sfc', (satisfied - self.cover) * integral, values)
+        return result
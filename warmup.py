@@ -0,0 +1,145 @@
+import threading
+import time
+import traceback
+
+# Task states, in order
+PENDING = 'pending'
+RUNNING = 'running'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class WarmupTask:
+    def __init__(self, name, function, depends_on=()):
+        """
+        One named warm-up step.
+
+        Args:
+            name: Task name
+            function: Callable receiving the results of depends_on, in order
+            depends_on: Names of tasks whose results this task needs
+        """
+        self.name = name
+        self.function = function
+        self.depends_on = tuple(depends_on)
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    @property
+    def seconds(self):
+        """Run time so far (or in total once finished), None if not started."""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+class Warmup:
+    def __init__(self):
+        """
+        Run warm-up tasks (data loading, index building, model loading or training, cache
+        priming) concurrently in background threads, with readiness and progress states.
+
+        Each task gets its own daemon thread, which waits for the tasks it depends on, so
+        independent tasks overlap. Callers poll ready()/progress() or block on result().
+        """
+        self.tasks = {}
+        self.started = False
+
+    def add(self, name, function, depends_on=()):
+        """
+        Register a task; must be called before start().
+
+        Args:
+            name: Task name
+            function: Callable receiving the results of depends_on, in order
+            depends_on: Names of previously added tasks this task needs
+
+        Returns:
+            self, for chaining
+        """
+        unknown = [dependency for dependency in depends_on if dependency not in self.tasks]
+        if unknown:
+            raise ValueError(f"Unknown warm-up dependencies for {name}: {unknown}")
+        self.tasks[name] = WarmupTask(name, function, depends_on)
+        return self
+
+    def start(self):
+        """Start every task in a background thread. Returns self."""
+        if not self.started:
+            self.started = True
+            for task in self.tasks.values():
+                threading.Thread(target=self._run, args=(task,), name=f'warmup-{task.name}', daemon=True).start()
+        return self
+
+    def _run(self, task):
+        dependencies = [self.tasks[name] for name in task.depends_on]
+        for dependency in dependencies:
+            dependency.done.wait()
+        failed = [dependency.name for dependency in dependencies if dependency.state == FAILED]
+        if failed:
+            task.error = f"dependency failed: {', '.join(failed)}"
+            task.state = FAILED
+            task.done.set()
+            return
+
+        task.state = RUNNING
+        task.started_at = time.perf_counter()
+        try:
+            task.result = task.function(*[dependency.result for dependency in dependencies])
+            task.state = READY
+        except Exception as e:
+            task.error = f"{type(e).__name__}: {e}"
+            task.state = FAILED
+            print(f"Warm-up task {task.name} failed:\n{traceback.format_exc()}")
+        finally:
+            task.finished_at = time.perf_counter()
+            task.done.set()
+
+    def ready(self, *names):
+        """True if the named tasks (all tasks if none are named) finished successfully."""
+        return all(self.tasks[name].state == READY for name in (names or self.tasks))
+
+    def failed(self, *names):
+        """True if any of the named tasks (any task if none are named) failed."""
+        return any(self.tasks[name].state == FAILED for name in (names or self.tasks))
+
+    def progress(self):
+        """Share of tasks that have finished (successfully or not), 0-1."""
+        if not self.tasks:
+            return 1.0
+        return sum(task.done.is_set() for task in self.tasks.values()) / len(self.tasks)
+
+    def status(self):
+        """
+        Get the state of every task.
+
+        Returns:
+            Dict of task name to a dict with state, seconds and error
+        """
+        return {name: {'state': task.state, 'seconds': task.seconds, 'error': task.error}
+                for name, task in self.tasks.items()}
+
+    def result(self, name, timeout=None):
+        """
+        Get a task's result, waiting for it to finish.
+
+        Args:
+            name: Task name
+            timeout: Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            The task function's return value
+
+        Raises:
+            TimeoutError if the task is not done in time, RuntimeError if it failed
+        """
+        task = self.tasks[name]
+        if not task.done.wait(timeout):
+            raise TimeoutError(f"Warm-up task {name} is still {task.state}")
+        if task.state == FAILED:
+            raise RuntimeError(f"Warm-up task {name} failed: {task.error}")
+        return task.result